@@ -0,0 +1,407 @@
+"""Runs load against cap-grpc servers started from the fixture config.
+
+Usage: python benchmarks/load.py [-t SECONDS] [-c CONCURRENCY] [-o RESULTS]
+       [-b BASELINE] [--threshold PERCENT] [-k CASE [CASE ...]]
+
+Every case is a mock method of benchmarks/fixtures/load.proto, results
+(throughput, p50/p99/p999 latency and server RSS) are printed and written
+to a JSON file which can be used as a baseline for next runs.
+"""
+from argparse import ArgumentParser
+import asyncio
+from datetime import datetime
+import json
+import math
+import os
+import platform
+from string import Template
+import subprocess
+import sys
+import tempfile
+import time
+
+import grpc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from google.protobuf.message_factory import GetMessageClass
+
+from protobuf.compilers import generate_descriptor_pool
+from protobuf.definitions import ProtoFilesPaths
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FIXTURES_DIR = os.path.join(ROOT_DIR, "benchmarks", "fixtures")
+SERVICE_NAME = "load.LoadService"
+SERVER_START_SECONDS_TIMEOUT = 60
+SERVER_STOP_SECONDS_TIMEOUT = 10
+
+UNARY = "unary"
+SERVER_STREAM = "server_stream"
+CLIENT_STREAM = "client_stream"
+BIDI = "bidi"
+
+CASES = {
+    "unary_static": ("UnaryStatic", UNARY),
+    "unary_template": ("UnaryTemplate", UNARY),
+    "unary_state": ("UnaryState", UNARY),
+    "unary_shell": ("UnaryShell", UNARY),
+    "unary_proxy": ("UnaryProxy", UNARY),
+    "server_stream": ("ServerStream", SERVER_STREAM),
+    "client_stream": ("ClientStream", CLIENT_STREAM),
+    "bidi": ("Bidi", BIDI),
+    "bidi_proxy": ("BidiProxy", BIDI),
+}
+
+
+class Messages:
+    def __init__(self):
+        proto_paths = ProtoFilesPaths(
+            base_dir_abs=FIXTURES_DIR,
+            proto_files_abs=[os.path.join(FIXTURES_DIR, "load.proto")],
+        )
+        pool = generate_descriptor_pool(proto_paths)
+        self.request = GetMessageClass(
+            pool.FindMessageTypeByName("load.Request")
+        )
+        self.response = GetMessageClass(
+            pool.FindMessageTypeByName("load.Response")
+        )
+        self.summary = GetMessageClass(
+            pool.FindMessageTypeByName("load.Summary")
+        )
+
+
+def get_processes_ids(pid: int) -> list[int]:
+    result = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as file:
+            for child_pid in file.read().split():
+                result.extend(get_processes_ids(int(child_pid)))
+    except OSError:
+        pass
+    return result
+
+
+def get_processes_memory(pid: int) -> dict[str, int | None]:
+    result = {"rss_kb": None, "peak_rss_kb": None}
+    for process_id in get_processes_ids(pid):
+        try:
+            with open(f"/proc/{process_id}/status") as file:
+                for line in file:
+                    if line.startswith("VmRSS:"):
+                        key = "rss_kb"
+                    elif line.startswith("VmHWM:"):
+                        key = "peak_rss_kb"
+                    else:
+                        continue
+                    result[key] = (result[key] or 0) + int(line.split()[1])
+        except OSError:
+            pass
+    return result
+
+
+def get_percentile(sorted_values: list[float], percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(percentile * len(sorted_values)) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def create_callable(
+    channel: grpc.aio.Channel, messages: Messages, method: str, shape: str,
+):
+    path = f"/{SERVICE_NAME}/{method}"
+    serializer = messages.request.SerializeToString
+    if shape == UNARY:
+        return channel.unary_unary(
+            path, serializer, messages.response.FromString,
+        )
+    elif shape == SERVER_STREAM:
+        return channel.unary_stream(
+            path, serializer, messages.response.FromString,
+        )
+    elif shape == CLIENT_STREAM:
+        return channel.stream_unary(
+            path, serializer, messages.summary.FromString,
+        )
+    return channel.stream_stream(
+        path, serializer, messages.response.FromString,
+    )
+
+
+async def call_once(
+    rpc, messages: Messages, shape: str, request_id: int, stream_size: int,
+):
+    if shape == UNARY:
+        await rpc(messages.request(id=request_id, name=f"n{request_id}"))
+    elif shape == SERVER_STREAM:
+        async for _ in rpc(messages.request(id=request_id)):
+            pass
+    elif shape == CLIENT_STREAM:
+        await rpc(iter([
+            messages.request(id=request_id + index)
+            for index in range(stream_size)
+        ]))
+    else:
+        call = rpc()
+        for index in range(stream_size):
+            await call.write(messages.request(
+                id=request_id + index, name=f"n{index}",
+            ))
+            await call.read()
+        await call.done_writing()
+        while await call.read() is not grpc.aio.EOF:
+            pass
+
+
+async def run_case(
+    socket: str,
+    messages: Messages,
+    method: str,
+    shape: str,
+    concurrency: int,
+    seconds: float,
+    warm_up_seconds: float,
+    stream_size: int,
+) -> dict:
+    latencies = []
+    errors = 0
+    measuring = False
+    request_ids = iter(range(1, sys.maxsize, stream_size))
+
+    async with grpc.aio.insecure_channel(socket) as channel:
+        rpc = create_callable(channel, messages, method, shape)
+
+        async def run_worker(deadline: float):
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    await call_once(
+                        rpc, messages, shape, next(request_ids), stream_size,
+                    )
+                except grpc.RpcError:
+                    if measuring:
+                        errors += 1
+                    continue
+                if measuring:
+                    latencies.append(time.perf_counter() - started)
+
+        if warm_up_seconds > 0:
+            deadline = time.perf_counter() + warm_up_seconds
+            await asyncio.gather(
+                *[run_worker(deadline) for _ in range(concurrency)]
+            )
+
+        measuring = True
+        started = time.perf_counter()
+        deadline = started + seconds
+        await asyncio.gather(
+            *[run_worker(deadline) for _ in range(concurrency)]
+        )
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": {
+            name: round(get_percentile(latencies, percentile) * 1000, 3)
+            for name, percentile in (
+                ("p50", 0.5), ("p99", 0.99), ("p999", 0.999),
+            )
+        },
+    }
+
+
+async def wait_for_servers(
+    process: subprocess.Popen, sockets: list[str],
+):
+    deadline = time.perf_counter() + SERVER_START_SECONDS_TIMEOUT
+    for socket in sockets:
+        async with grpc.aio.insecure_channel(socket) as channel:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(
+                        f"Servers process exited with code "
+                        f"{process.returncode}"
+                    )
+                try:
+                    await asyncio.wait_for(channel.channel_ready(), 0.5)
+                    break
+                except asyncio.TimeoutError:
+                    if time.perf_counter() > deadline:
+                        raise RuntimeError(
+                            f"Server on '{socket}' was not started in "
+                            f"{SERVER_START_SECONDS_TIMEOUT} seconds"
+                        )
+
+
+def start_servers(
+    config_dir: str, port: int, workers: int,
+) -> subprocess.Popen:
+    with open(os.path.join(FIXTURES_DIR, "load.yml")) as file:
+        config = Template(file.read()).substitute(
+            port=port, backend_port=port + 1, fixtures_dir=FIXTURES_DIR,
+        )
+    config_path = os.path.join(config_dir, "load.yml")
+    with open(config_path, "w") as file:
+        file.write(config)
+    return subprocess.Popen([
+        sys.executable,
+        os.path.join(ROOT_DIR, "src", "main.py"),
+        "-c", config_path,
+        "-w", str(workers),
+    ])
+
+
+def stop_servers(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(SERVER_STOP_SECONDS_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def compare_results(
+    results: dict, baseline: dict, threshold: float,
+) -> list[str]:
+    regressions = []
+    print(
+        f"\n{'case':<16} {'throughput':>12} {'p99':>12} (change to baseline)"
+    )
+    for case_name, case_result in results["cases"].items():
+        baseline_result = baseline.get("cases", {}).get(case_name)
+        if baseline_result is None:
+            print(f"{case_name:<16} {'no baseline':>12}")
+            continue
+        throughput_change = get_change(
+            baseline_result["throughput_rps"], case_result["throughput_rps"],
+        )
+        p99_change = get_change(
+            baseline_result["latency_ms"]["p99"],
+            case_result["latency_ms"]["p99"],
+        )
+        print(
+            f"{case_name:<16} {throughput_change:>+11.1f}% "
+            f"{p99_change:>+11.1f}%"
+        )
+        if throughput_change < -threshold or p99_change > threshold:
+            regressions.append(case_name)
+    return regressions
+
+
+def get_change(baseline_value: float, value: float) -> float:
+    if not baseline_value:
+        return 0.0
+    return (value - baseline_value) / baseline_value * 100
+
+
+async def run_cases(parsed, process: subprocess.Popen) -> dict:
+    socket = f"localhost:{parsed.p}"
+    await wait_for_servers(process, [socket, f"localhost:{parsed.p + 1}"])
+    messages = Messages()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "grpc": grpc.__version__,
+            "platform": platform.platform(),
+            "concurrency": parsed.c,
+            "seconds": parsed.t,
+            "stream_size": parsed.s,
+            "workers": parsed.w,
+            "idle_memory": get_processes_memory(process.pid),
+        },
+        "cases": {},
+    }
+    print(
+        f"{'case':<16} {'requests':>9} {'errors':>7} {'rps':>10} "
+        f"{'p50 ms':>9} {'p99 ms':>9} {'p999 ms':>9} {'rss kb':>9}"
+    )
+    for case_name in parsed.k:
+        method, shape = CASES[case_name]
+        case_result = await run_case(
+            socket, messages, method, shape,
+            parsed.c, parsed.t, parsed.warm_up, parsed.s,
+        )
+        case_result.update(get_processes_memory(process.pid))
+        results["cases"][case_name] = case_result
+        latency = case_result["latency_ms"]
+        print(
+            f"{case_name:<16} {case_result['requests']:>9} "
+            f"{case_result['errors']:>7} "
+            f"{case_result['throughput_rps']:>10.1f} "
+            f"{latency['p50']:>9.3f} {latency['p99']:>9.3f} "
+            f"{latency['p999']:>9.3f} {case_result['rss_kb'] or '-':>9}"
+        )
+    return results
+
+
+def main():
+    arg_parser = ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument(
+        "-t", type=float, default=5, help="seconds of load for every case",
+    )
+    arg_parser.add_argument(
+        "-c", type=int, default=16, help="concurrent requests",
+    )
+    arg_parser.add_argument(
+        "-s", type=int, default=10,
+        help="messages in client and bidirectional streams",
+    )
+    arg_parser.add_argument(
+        "-p", type=int, default=18900,
+        help="server port, next port is used by the proxy backend",
+    )
+    arg_parser.add_argument(
+        "-w", type=int, default=1, help="server worker processes",
+    )
+    arg_parser.add_argument(
+        "-k", nargs="+", choices=list(CASES), default=list(CASES),
+        metavar="CASE", help=f"cases to run: {', '.join(CASES)}",
+    )
+    arg_parser.add_argument(
+        "-o", default="benchmark-results.json", help="results JSON file",
+    )
+    arg_parser.add_argument(
+        "-b", default=None, help="baseline results JSON file to compare",
+    )
+    arg_parser.add_argument(
+        "--threshold", type=float, default=10,
+        help="allowed throughput and p99 regression in percents",
+    )
+    arg_parser.add_argument(
+        "--warm-up", type=float, default=1,
+        help="warm up seconds before every case",
+    )
+    parsed = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        process = start_servers(config_dir, parsed.p, parsed.w)
+        try:
+            results = asyncio.run(run_cases(parsed, process))
+        finally:
+            stop_servers(process)
+
+    with open(parsed.o, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"\nResults are written to '{parsed.o}'")
+
+    if parsed.b is not None:
+        with open(parsed.b) as file:
+            baseline = json.load(file)
+        regressions = compare_results(results, baseline, parsed.threshold)
+        if regressions:
+            print(
+                f"Regressions over {parsed.threshold}%: "
+                f"{', '.join(regressions)}"
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
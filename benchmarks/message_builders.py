@@ -0,0 +1,425 @@
+"""Compares precompiled message builders with the recursive builder.
+
+The recursive builder is the reference implementation message builders
+replaced, it is kept here only for comparison.
+
+Usage: python benchmarks/message_builders.py [-n ITERATIONS] [-d DEPTH]
+"""
+from argparse import ArgumentParser
+from logging import getLogger
+import os
+import sys
+import tempfile
+import timeit
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from config.model import ServerConfig, ResponseMockConfig
+from protobuf.compilers import StructureParser, generate_descriptor_pool
+from protobuf.definitions import (
+    MessageField, PropertyLabel, ProtoFilesPaths
+)
+from protobuf.types import GRPC_PYTHON_TYPES, ProtoType, SimpleProtoType
+from server.helpers import ProtoObjectResolver
+from server.processors.base import ProcessingMeta
+
+logger = getLogger(__name__)
+
+PROTO_TEMPLATE = """
+syntax = "proto3";
+
+package bench;
+
+enum Kind {
+    KIND_UNKNOWN = 0;
+    KIND_FIRST = 1;
+    KIND_SECOND = 2;
+}
+
+message Node {
+    int64 id = 1;
+    string name = 2;
+    Kind kind = 3;
+    double weight = 4;
+    repeated string tags = 5;
+    map<string, int32> counters = 6;
+    Node child = 7;
+}
+
+message Item {
+    int64 id = 1;
+    string name = 2;
+    Kind kind = 3;
+    repeated int32 values = 4;
+}
+
+message ItemsList {
+    repeated Item items = 1;
+    uint32 total = 2;
+}
+
+message Request {}
+
+service BenchService {
+    rpc GetNode (Request) returns (Node) {}
+    rpc GetItems (Request) returns (ItemsList) {}
+}
+"""
+
+
+def get_enum_value(
+    meta: ProcessingMeta,
+    field_data: MessageField,
+    enum_name: str,
+    value: str | int | None = None,
+) -> tuple[str | None, object | None]:
+    if field_data.label == PropertyLabel.OPTIONAL and value is None:
+        return None, None
+
+    enum_data = meta.object_resolver.summarized_structure.enums[
+        enum_name
+    ]
+    enum_values = meta.object_resolver.get_enum_values(enum_data)
+    if value is None and field_data.default is not None:
+        value = field_data.default
+    if value is not None:
+        result = enum_values.resolve(value)
+        if result is not None:
+            return result
+    return enum_values.default
+
+
+def get_simple_value(
+    field_data: MessageField,
+    grpc_type: ProtoType,
+    value: Any,
+) -> tuple[Any, Any]:
+    if field_data.label == PropertyLabel.OPTIONAL and value is None:
+        return None, None
+
+    type_data = GRPC_PYTHON_TYPES[grpc_type]
+    result = type_data.default_value
+    if field_data.default is not None:
+        result = field_data.default
+    if value is not None:
+        if type(value) is type_data.python_type or isinstance(
+            value, SimpleProtoType
+        ):
+            try:
+                result = type_data.converter(value)
+                if result != value:
+                    logger.debug(
+                        f"Field '{field_data.name}' converted to "
+                        f"corresponding prototype '{grpc_type.value}'"
+                    )
+            except Exception:
+                logger.warning(
+                    f"Error converting field '{field_data.name}' to "
+                    f"type '{type_data.python_type.__name__}'"
+                )
+    return result, result
+
+
+def _fill_object(
+    field_data: MessageField,
+    value: Any,
+    field_name: str | None = None,
+) -> dict:
+    if field_name is None:
+        field_name = field_data.name
+    if field_data.is_map and value is None:
+        return {}
+    if field_data.label == field_data.label.OPTIONAL and value is None:
+        return {}
+    else:
+        return {field_name: value}
+
+
+def _repeat_if_required(
+    field_data: MessageField,
+    mock_value: Any,
+    inner_message_function: Callable,
+    *args,
+) -> tuple[list, list]:
+    if field_data.label == PropertyLabel.REPEATED:
+        raw_values = []
+        object_values = []
+        if mock_value is None:
+            return [], []
+
+        if not isinstance(mock_value, list):
+            mock_value = [mock_value]
+        for mock_data in mock_value:
+            raw_value, object_value = inner_message_function(
+                *args, mock_data
+            )
+            raw_values.append(raw_value)
+            object_values.append(object_value)
+        return raw_values, object_values
+    else:
+        return inner_message_function(
+            *args, mock_value
+        )
+
+
+def get_kv_message_value(
+    meta: ProcessingMeta,
+    parent_field: MessageField | None,
+    message_name: str,
+    mock_value: Any,
+) -> tuple[dict | None, dict | None]:
+    if mock_value is None:
+        return None, None
+
+    message_data = meta.object_resolver.summarized_structure.messages[
+        message_name
+    ]
+
+    raw_dict = {}
+    objects_dict = {}
+    if not isinstance(mock_value, dict):
+        mock_value = {}
+
+    key_field = message_data.fields[0]
+    value_field = message_data.fields[1]
+
+    for property_key, property_value in mock_value.items():
+        raw_key, object_key = get_simple_value(
+            key_field, key_field.simple_type, property_key,
+        )
+        if value_field.simple_type == ProtoType.MESSAGE:
+            raw_value, object_value = _repeat_if_required(
+                value_field,
+                property_value,
+                get_message_value,
+                meta,
+                value_field,
+                value_field.message_type,
+            )
+        elif value_field.simple_type == ProtoType.ENUM:
+            raw_value, object_value = _repeat_if_required(
+                value_field,
+                property_value,
+                get_enum_value,
+                meta,
+                value_field,
+                value_field.enum_type,
+            )
+        elif value_field.simple_type == ProtoType.GROUP:
+            raw_value, object_value = get_message_value(
+                meta,
+                value_field,
+                value_field.message_type,
+                property_value,
+            )
+        else:
+            raw_value, object_value = _repeat_if_required(
+                value_field,
+                property_value,
+                get_simple_value,
+                value_field,
+                value_field.simple_type,
+            )
+        raw_dict.update(_fill_object(
+            key_field, raw_value, raw_key,
+        ))
+        objects_dict.update(_fill_object(
+            key_field, object_value, object_key
+        ))
+
+    return raw_dict, objects_dict
+
+
+def get_message_value(
+    meta: ProcessingMeta,
+    parent_field: MessageField | None,
+    message_name: str,
+    mock_value: Any,
+) -> tuple[dict | None, object | None]:
+    if (
+        parent_field and
+        parent_field.label == PropertyLabel.OPTIONAL and
+        mock_value is None
+    ):
+        return None, None
+
+    raw_dict = {}
+    objects_dict = {}
+
+    message_data = meta.object_resolver.summarized_structure.messages[
+        message_name
+    ]
+    message_type = meta.object_resolver.get_message_type(message_data)
+
+    if not isinstance(mock_value, dict):
+        mock_value = None
+
+    for field_data in message_data.fields:
+        mock_property_value = None
+        if mock_value is not None:
+            mock_property_value = mock_value.get(field_data.name)
+
+        if field_data.simple_type == ProtoType.MESSAGE:
+            if field_data.is_map:
+                raw_value, object_value = get_kv_message_value(
+                    meta,
+                    field_data,
+                    field_data.message_type,
+                    mock_property_value,
+                )
+            else:
+                raw_value, object_value = _repeat_if_required(
+                    field_data,
+                    mock_property_value,
+                    get_message_value,
+                    meta,
+                    field_data,
+                    field_data.message_type,
+                )
+        elif field_data.simple_type == ProtoType.ENUM:
+            raw_value, object_value = _repeat_if_required(
+                field_data,
+                mock_property_value,
+                get_enum_value,
+                meta,
+                field_data,
+                field_data.enum_type,
+            )
+        elif field_data.simple_type == ProtoType.GROUP:
+            raw_value, object_value = get_message_value(
+                meta,
+                field_data,
+                field_data.message_type,
+                mock_property_value,
+            )
+        else:
+            raw_value, object_value = _repeat_if_required(
+                field_data,
+                mock_property_value,
+                get_simple_value,
+                field_data,
+                field_data.simple_type,
+            )
+        raw_dict.update(_fill_object(
+            field_data, raw_value
+        ))
+        objects_dict.update(_fill_object(
+            field_data, object_value
+        ))
+
+    return raw_dict, message_type(**objects_dict)
+
+
+def create_nested_mock(depth: int) -> dict:
+    result = None
+    for index in range(depth):
+        result = {
+            "id": str(index),
+            "name": f"node-{index}",
+            "kind": "KIND_FIRST",
+            "weight": index,
+            "tags": ["a", "b", "c"],
+            "counters": {"x": 1, "y": "2"},
+            "child": result,
+        }
+    return result
+
+
+def create_repeated_mock(count: int) -> dict:
+    return {
+        "items": [
+            {
+                "id": index,
+                "name": f"item-{index}",
+                "kind": "KIND_SECOND",
+                "values": [1, 2, "3", 4],
+            }
+            for index in range(count)
+        ],
+        "total": count,
+    }
+
+
+def create_meta(base_dir: str) -> ProcessingMeta:
+    proto_path = os.path.join(base_dir, "bench.proto")
+    with open(proto_path, "w") as file:
+        file.write(PROTO_TEMPLATE)
+    proto_paths = ProtoFilesPaths(
+        base_dir_abs=base_dir, proto_files_abs=[proto_path],
+    )
+    pool = generate_descriptor_pool(proto_paths)
+    structures = StructureParser(pool, proto_paths).get_structures()
+    resolver = ProtoObjectResolver(structures, pool)
+    service_data = resolver.summarized_structure.services[
+        "bench.BenchService"
+    ]
+    return ProcessingMeta(
+        object_resolver=resolver,
+        server_config=ServerConfig(
+            alias="bench", sockets=[], proto_files=[proto_path],
+        ),
+        service_data=service_data,
+        method_data=service_data.methods["GetNode"],
+        mock_config=ResponseMockConfig(),
+    )
+
+
+def run_case(
+    meta: ProcessingMeta,
+    case_name: str,
+    message_name: str,
+    mock_value: dict,
+    iterations: int,
+):
+    builder = meta.object_resolver.get_message_builder(message_name)
+
+    def recursive():
+        return get_message_value(meta, None, message_name, mock_value)
+
+    def plan():
+        return builder.build(mock_value)
+
+    recursive_raw, recursive_message = recursive()
+    plan_raw, plan_message = plan()
+    if recursive_raw != plan_raw or recursive_message != plan_message:
+        raise RuntimeError(f"Builders results differ for case '{case_name}'")
+
+    recursive_time = min(timeit.repeat(recursive, number=iterations, repeat=3))
+    plan_time = min(timeit.repeat(plan, number=iterations, repeat=3))
+    print(
+        f"{case_name:<24} "
+        f"recursive {recursive_time / iterations * 1e6:10.1f} us  "
+        f"plan {plan_time / iterations * 1e6:10.1f} us  "
+        f"speedup {recursive_time / plan_time:5.2f}x"
+    )
+
+
+def main():
+    arg_parser = ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("-n", type=int, default=200, help="iterations")
+    arg_parser.add_argument("-d", type=int, default=16, help="nesting depth")
+    parsed = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        meta = create_meta(base_dir)
+
+    run_case(
+        meta,
+        f"nested depth {parsed.d}",
+        "bench.Node",
+        create_nested_mock(parsed.d),
+        parsed.n,
+    )
+    for count in (10, 1000):
+        run_case(
+            meta,
+            f"repeated {count} items",
+            "bench.ItemsList",
+            create_repeated_mock(count),
+            max(1, parsed.n * 10 // count),
+        )
+
+
+if __name__ == "__main__":
+    main()
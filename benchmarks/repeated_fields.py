@@ -0,0 +1,112 @@
+"""Compares bulk and per-item conversion of repeated numeric fields.
+
+Usage: python benchmarks/repeated_fields.py [-n ITERATIONS] [-c COUNT]
+"""
+from argparse import ArgumentParser
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from protobuf.compilers import StructureParser, generate_descriptor_pool
+from protobuf.definitions import ProtoFilesPaths
+from server.builders import create_repeated_builder, create_simple_builder
+from server.helpers import ProtoObjectResolver
+
+PROTO_TEMPLATE = """
+syntax = "proto3";
+
+package bench;
+
+message Numbers {
+    repeated int32 int32_values = 1;
+    repeated int64 int64_values = 2;
+    repeated uint32 uint32_values = 3;
+    repeated uint64 uint64_values = 4;
+    repeated sint64 sint64_values = 5;
+    repeated fixed32 fixed32_values = 6;
+    repeated double double_values = 7;
+    repeated float float_values = 8;
+}
+"""
+
+MESSAGE_NAME = "bench.Numbers"
+
+
+def create_resolver(base_dir: str) -> ProtoObjectResolver:
+    proto_path = os.path.join(base_dir, "bench.proto")
+    with open(proto_path, "w") as file:
+        file.write(PROTO_TEMPLATE)
+    proto_paths = ProtoFilesPaths(
+        base_dir_abs=base_dir, proto_files_abs=[proto_path],
+    )
+    pool = generate_descriptor_pool(proto_paths)
+    structures = StructureParser(pool, proto_paths).get_structures()
+    return ProtoObjectResolver(structures, pool)
+
+
+def create_values(field_name: str, count: int) -> list:
+    if field_name.startswith(("double", "float")):
+        return [index * 0.5 for index in range(count)]
+    return list(range(count))
+
+
+def run_case(
+    case_name: str, per_item, bulk, values: list, iterations: int,
+):
+    if per_item(values) != bulk(values):
+        raise RuntimeError(f"Builders results differ for case '{case_name}'")
+
+    per_item_time = min(timeit.repeat(
+        lambda: per_item(values), number=iterations, repeat=3,
+    ))
+    bulk_time = min(timeit.repeat(
+        lambda: bulk(values), number=iterations, repeat=3,
+    ))
+    print(
+        f"{case_name:<24} "
+        f"per-item {per_item_time / iterations * 1e3:8.2f} ms  "
+        f"bulk {bulk_time / iterations * 1e3:8.2f} ms  "
+        f"speedup {per_item_time / bulk_time:6.2f}x"
+    )
+
+
+def main():
+    arg_parser = ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("-n", type=int, default=5, help="iterations")
+    arg_parser.add_argument(
+        "-c", type=int, default=100_000, help="repeated field elements",
+    )
+    parsed = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        resolver = create_resolver(base_dir)
+
+    message_data = resolver.summarized_structure.messages[MESSAGE_NAME]
+    builder = resolver.get_message_builder(MESSAGE_NAME)
+    bulk_builders = dict(builder.fields)
+    mock_value = {}
+    for field_data in message_data.fields:
+        values = create_values(field_data.name, parsed.c)
+        mock_value[field_data.name] = values
+        run_case(
+            f"{field_data.simple_type.value} x {parsed.c}",
+            create_repeated_builder(create_simple_builder(field_data)),
+            bulk_builders[field_data.name],
+            values,
+            parsed.n,
+        )
+
+    message_time = min(timeit.repeat(
+        lambda: builder.build(mock_value), number=parsed.n, repeat=3,
+    ))
+    print(
+        f"{'message build':<24} "
+        f"{message_time / parsed.n * 1e3:8.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
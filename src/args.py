@@ -1,7 +1,17 @@
-from argparse import Namespace, ArgumentParser
+from argparse import Namespace, ArgumentParser, ArgumentTypeError
 from sys import exit
 
 
+def positive_int(value: str) -> int:
+    try:
+        result = int(value)
+    except ValueError:
+        raise ArgumentTypeError(f"invalid int value: '{value}'")
+    if result < 1:
+        raise ArgumentTypeError("value should be greater than 0")
+    return result
+
+
 def get_args() -> Namespace:
     arg_parser = ArgumentParser(
         prog="cap-grpc",
@@ -12,6 +22,12 @@ def get_args() -> Namespace:
         metavar="config file",
         type=str,
         help="configuration .yml file path")
+    arg_parser.add_argument(
+        "-w",
+        default=1,
+        metavar="workers",
+        type=positive_int,
+        help="number of worker processes serving the same sockets")
     arg_parser.add_argument(
         "-e",
         default=None,
@@ -3,14 +3,16 @@ import sys
 from enum import Enum
 from typing import Any, Annotated
 
-from grpc import StatusCode
+from grpc import Compression, StatusCode
 from pydantic import (
-    BaseModel, RootModel, AfterValidator, ConfigDict
+    BaseModel, RootModel, AfterValidator, ConfigDict, model_validator
 )
 
 from logs import LoggerConfig
-from logs.formatters import YamlFormatter
+from logs.formatters import JsonLinesFormatter, YamlFormatter
+from logs.handlers import BufferedHandler
 import config.validators as v
+import constants as c
 
 
 MetadataKey = Annotated[str, AfterValidator(v.validate_grpc_meta_key)]
@@ -18,7 +20,14 @@ MetadataValue = Annotated[str, AfterValidator(v.validate_grpc_meta_value)]
 GRPCErrorCode = Annotated[int, AfterValidator(
     v.validate_grpc_error_status_code
 )]
+PositiveInt = Annotated[int, AfterValidator(v.validate_positive_int)]
+PositiveFloat = Annotated[float, AfterValidator(v.validate_positive_float)]
+NonNegativeFloat = Annotated[
+    float, AfterValidator(v.validate_non_negative_float)
+]
+HTTP2FrameSize = Annotated[int, AfterValidator(v.validate_http2_frame_size)]
 FormatLine = Annotated[str, AfterValidator(v.validate_logging_keys)]
+Command = Annotated[list[str], AfterValidator(v.validate_command)]
 
 
 class BaseConfigModel(BaseModel):
@@ -30,9 +39,50 @@ class ErrorConfig(BaseConfigModel):
     details: str = ""
 
 
+class ProxyCertificatesConfig(BaseConfigModel):
+    root_certificate: str | None = None
+    certificate: str | None = None
+    key_file: str | None = None
+
+    @model_validator(mode="after")
+    def check_client_certificate(self) -> "ProxyCertificatesConfig":
+        if (self.certificate is None) != (self.key_file is None):
+            raise ValueError(
+                "Proxy client certificate and key file should be set together"
+            )
+        return self
+
+
+class ChannelsBalancing(str, Enum):
+    ROUND_ROBIN = "round_robin"
+    LEAST_IN_FLIGHT = "least_in_flight"
+
+
+class CompressionType(str, Enum):
+    NONE = "none"
+    DEFLATE = "deflate"
+    GZIP = "gzip"
+
+    def to_grpc_value(self) -> Compression:
+        if self is CompressionType.DEFLATE:
+            return Compression.Deflate
+        elif self is CompressionType.GZIP:
+            return Compression.Gzip
+        else:
+            return Compression.NoCompression
+
+
 class ProxyConfig(BaseConfigModel):
     socket: str
     seconds_timeout: float | str | None = None
+    queue_size: PositiveInt = c.PROXY_DEFAULT_QUEUE_SIZE
+    certificates: ProxyCertificatesConfig | None = None
+    keepalive_seconds: PositiveFloat | None = None
+    keepalive_timeout_seconds: PositiveFloat | None = None
+    max_message_size: PositiveInt | None = None
+    compression: CompressionType | None = None
+    channels: PositiveInt = 1
+    balancing: ChannelsBalancing = ChannelsBalancing.ROUND_ROBIN
 
 
 class ResponseMockConfig(BaseConfigModel):
@@ -41,6 +91,7 @@ class ResponseMockConfig(BaseConfigModel):
     error: ErrorConfig | None = None
     seconds_delay: str | float | None = None
     proxy: ProxyConfig | None = None
+    requests_streaming: bool = False
 
 
 class GrpcMockData(RootModel):
@@ -86,6 +137,18 @@ class LoggingLevel(str, Enum):
 class LoggingFormat(str, Enum):
     TEXT = "text"
     YAML = "yaml"
+    JSONL = "jsonl"
+
+
+class LoggingBufferPolicy(str, Enum):
+    DROP = "drop"
+    BLOCK = "block"
+
+
+class LoggingBufferConfig(BaseConfigModel):
+    size: PositiveInt = 10000
+    policy: LoggingBufferPolicy = LoggingBufferPolicy.DROP
+    batch_size: PositiveInt = 256
 
 
 class LoggingConfig(BaseConfigModel):
@@ -94,10 +157,13 @@ class LoggingConfig(BaseConfigModel):
     level: LoggingLevel = LoggingLevel.INFO
     format: LoggingFormat = LoggingFormat.TEXT
     format_line: FormatLine = "%(message)s"
+    buffer: LoggingBufferConfig | None = None
 
     def get_loggers_config(self) -> LoggerConfig:
         if self.format == LoggingFormat.TEXT:
             formatter = logging.Formatter(self.format_line)
+        elif self.format == LoggingFormat.JSONL:
+            formatter = JsonLinesFormatter(self.format_line)
         else:
             formatter = YamlFormatter(self.format_line)
         handlers = []
@@ -109,6 +175,13 @@ class LoggingConfig(BaseConfigModel):
             handler = logging.FileHandler(filepath)
             handler.setFormatter(formatter)
             handlers.append(handler)
+        if self.buffer is not None and handlers:
+            handlers = [BufferedHandler(
+                handlers,
+                self.buffer.size,
+                self.buffer.policy == LoggingBufferPolicy.BLOCK,
+                self.buffer.batch_size,
+            )]
         return LoggerConfig(
             level=self.level.to_int_value(),
             disabled=not handlers,
@@ -116,17 +189,92 @@ class LoggingConfig(BaseConfigModel):
         )
 
 
+class ServerOptionsConfig(BaseConfigModel):
+    max_concurrent_rpcs: PositiveInt | None = None
+    max_send_message_size: PositiveInt | None = None
+    max_receive_message_size: PositiveInt | None = None
+    keepalive_seconds: PositiveFloat | None = None
+    keepalive_timeout_seconds: PositiveFloat | None = None
+    keepalive_without_calls: bool | None = None
+    keepalive_min_ping_seconds: PositiveFloat | None = None
+    flow_control_window: PositiveInt | None = None
+    bdp_probe: bool | None = None
+    max_frame_size: HTTP2FrameSize | None = None
+    compression: CompressionType | None = None
+    thread_pool_size: PositiveInt | None = None
+
+
 class ServerConfig(BaseConfigModel):
     alias: str
     sockets: list[SocketsConfig]
     reflection_enabled: bool = True
+    mocked_services_only: bool = False
     proto_files: list[str] | str
     proto_files_base_dir: str | None = None
+    options: ServerOptionsConfig = ServerOptionsConfig()
     mocks: GrpcMockData | None = None
 
 
+class ShellWorkerConfig(BaseConfigModel):
+    command: Command
+    processes: PositiveInt = 1
+    seconds_timeout: PositiveFloat = 10
+    max_waiting_calls: PositiveInt | None = None
+
+
+class FilesCacheConfig(BaseConfigModel):
+    max_size: PositiveInt = c.FILES_CACHE_DEFAULT_MAX_SIZE
+    max_file_size: PositiveInt | None = None
+    seconds_check_interval: NonNegativeFloat = (
+        c.FILES_CACHE_DEFAULT_SECONDS_CHECK_INTERVAL
+    )
+
+
+class StateConfig(BaseConfigModel):
+    session_metadata: MetadataKey = c.STATE_DEFAULT_SESSION_METADATA
+    snapshot_file: str | None = None
+
+
+class ReloadConfig(BaseConfigModel):
+    signal: bool = True
+    watch: bool = False
+    seconds_interval: PositiveFloat = c.RELOAD_DEFAULT_SECONDS_INTERVAL
+    seconds_grace: PositiveFloat = c.RELOAD_DEFAULT_SECONDS_GRACE
+
+
+class RecordingMode(str, Enum):
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+class RecordingConfig(BaseConfigModel):
+    mode: RecordingMode
+    file: str
+    reproduce_latency: bool = False
+
+
+class MetricsConfig(BaseConfigModel):
+    socket: str = "localhost:9090"
+    buckets: list[PositiveFloat] = list(c.METRICS_DEFAULT_BUCKETS)
+
+    @model_validator(mode="after")
+    def check_buckets(self) -> "MetricsConfig":
+        if len(self.buckets) == 0:
+            raise ValueError("At least one histogram bucket should be set")
+        self.buckets = sorted(set(self.buckets))
+        return self
+
+
 class Config(BaseConfigModel):
     servers: list[ServerConfig]
+    metrics: MetricsConfig | None = None
+    shell_workers: dict[str, ShellWorkerConfig] = {}
+    files_cache: FilesCacheConfig = FilesCacheConfig()
+    state: StateConfig = StateConfig()
+    recording: RecordingConfig | None = None
+    reload: ReloadConfig | None = None
+    descriptors_cache: bool = True
+    descriptors_cache_dir: str | None = None
     general_logging_config: LoggingConfig = LoggingConfig(
         console=True,
         level=LoggingLevel.INFO,
@@ -141,3 +289,15 @@ class Config(BaseConfigModel):
                     "%(method)s %(service)s %(code)s %(error_details)s"
                     "%(metadata)s %(alias)s %(timestamp)s",
     )
+
+    @model_validator(mode="after")
+    def check_servers_aliases(self) -> "Config":
+        aliases = set()
+        for server_config in self.servers:
+            if server_config.alias in aliases:
+                raise ValueError(
+                    f"Server alias '{server_config.alias}' is used by "
+                    f"several servers, aliases should be unique"
+                )
+            aliases.add(server_config.alias)
+        return self
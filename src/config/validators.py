@@ -25,6 +25,33 @@ def validate_grpc_error_status_code(value: int) -> int:
     return value
 
 
+def validate_positive_int(value: int) -> int:
+    if value < 1:
+        raise ValueError("Value should be greater than 0")
+    return value
+
+
+def validate_positive_float(value: float) -> float:
+    if value <= 0:
+        raise ValueError("Value should be greater than 0")
+    return value
+
+
+def validate_non_negative_float(value: float) -> float:
+    if value < 0:
+        raise ValueError("Value should be greater than or equal to 0")
+    return value
+
+
+def validate_http2_frame_size(value: int) -> int:
+    if value < c.HTTP2_MIN_FRAME_SIZE or value > c.HTTP2_MAX_FRAME_SIZE:
+        raise ValueError(
+            f"HTTP/2 frame size should be from {c.HTTP2_MIN_FRAME_SIZE} to "
+            f"{c.HTTP2_MAX_FRAME_SIZE}"
+        )
+    return value
+
+
 def validate_logging_keys(message_format: str):
     used_keys = set(c.PY_LOGS_FORMAT_PATTERN.findall(message_format))
     invalid_keys = used_keys.difference(c.ALLOWED_LOGGING_KEYS)
@@ -35,3 +62,9 @@ def validate_logging_keys(message_format: str):
             f"'{"', '".join(c.ALLOWED_LOGGING_KEYS)}'"
         )
     return message_format
+
+
+def validate_command(value: list[str]) -> list[str]:
+    if len(value) == 0:
+        raise ValueError("Command should contain program name")
+    return value
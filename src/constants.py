@@ -9,10 +9,58 @@ ALLOWED_LOGGING_KEYS = {
     "thread", "threadName", "timestamp", "request_message", "response_message",
 }
 
+HTTP2_MIN_FRAME_SIZE = 16384
+HTTP2_MAX_FRAME_SIZE = 16777215
+
 RPC_HEADER_KEY_PATTERN = re.compile(r"^[a-z0-9-_.]{1,256}$")
 RPC_HEADER_VALUE_PATTERN = re.compile(r"^[a-z0-9-_.]{0,8192}$")
 
 DESCRIPTOR_TEMP_FILENAME = "descriptor.pb"
+DESCRIPTORS_CACHE_DIR_NAME = "cap-grpc"
+DESCRIPTORS_CACHE_EXTENSION = ".pb"
+PROTO_IMPORT_PATTERN = re.compile(
+    rb'^\s*import\s+(?:public\s+|weak\s+)?"([^"]+)"\s*;', re.MULTILINE
+)
+
+LOGS_DROPPED_REPORT_SECONDS = 5
+
+WORKERS_CHECK_SECONDS_INTERVAL = 1
+WORKERS_RESTART_SECONDS_DELAY = 1
+WORKERS_STOP_SECONDS_TIMEOUT = 10
+
+PROXY_DEFAULT_QUEUE_SIZE = 16
+PROXY_WARM_UP_SECONDS_TIMEOUT = 5
+PROXY_CLOSE_SECONDS_GRACE = 5
+PROXY_RENDERED_POOLS_MAX_COUNT = 64
+
+SHELL_WORKER_LINE_LIMIT = 16 * 1024 * 1024
+SHELL_WORKERS_STOP_SECONDS_TIMEOUT = 5
+
+METRICS_PATH = "/metrics"
+METRICS_PREFIX = "capgrpc"
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRICS_DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+    2.5, 5.0, 10.0,
+)
+METRICS_REQUEST_MAX_SIZE = 8192
+METRICS_REQUEST_SECONDS_TIMEOUT = 5
+
+FILES_CACHE_DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+FILES_CACHE_DEFAULT_SECONDS_CHECK_INTERVAL = 1.0
+
+STATE_SERVER_SCOPE = "server"
+STATE_METHOD_SCOPE = "method"
+STATE_SESSION_SCOPE = "session"
+STATE_DEFAULT_SCOPE = STATE_SERVER_SCOPE
+STATE_DEFAULT_SESSION_METADATA = "session-id"
+STATE_EXPIRATIONS_COMPACT_MIN_SIZE = 1024
+
+RELOAD_DEFAULT_SECONDS_INTERVAL = 1
+RELOAD_DEFAULT_SECONDS_GRACE = 30
+
+RECORDS_MAGIC = b"CGR1"
+RECORDS_MISS_DETAILS = "No recorded response for request"
 
 TEMP_BASE_DIR_KEY = "directory"
 TEMP_FILES_CACHE_KEY = "files_cache"
@@ -20,8 +68,10 @@ TEMP_FILES_CACHE_KEY = "files_cache"
 TEMP_RELATIVE_KEY = "relative"
 TEMP_INSERT_KEY = "insert"
 TEMP_SCRIPT_KEY = "shell"
+TEMP_SHELL_WORKER_KEY = "shell_worker"
 TEMP_SET_STATE_KEY = "set_state"
 TEMP_GET_STATE_KEY = "get_state"
+TEMP_STATE_KEY = "state"
 TEMP_INITIAL_STATE = "initial"
 TEMP_SOCKETS_KEY = "sockets"
 TEMP_ALIAS_KEY = "alias"
@@ -1,13 +1,49 @@
+import base64
 from datetime import datetime
+import json
 import logging
-from typing import Set, Iterable
+from typing import Any, Set, Iterable
 
 import yaml
 
 from constants import PY_LOGS_FORMAT_PATTERN
 
+try:
+    from yaml import CSafeDumper as YamlDumper
+except ImportError:
+    from yaml import SafeDumper as YamlDumper
 
-class YamlFormatter(logging.Formatter):
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def get_json_default(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(value).decode()
+    return str(value)
+
+
+def dump_json_line(value: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(
+            value, default=get_json_default, option=orjson.OPT_NON_STR_KEYS
+        ).decode()
+    return json.dumps(value, default=get_json_default, separators=(",", ":"))
+
+
+class JsonMessage:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self) -> str:
+        return json.dumps(self.value, default=get_json_default)
+
+
+class FieldsFormatter(logging.Formatter):
     def __init__(self, used_keys: Iterable | str = None, *args, **kwargs):
         logging.Formatter.__init__(self, *args, **kwargs)
 
@@ -22,32 +58,45 @@ class YamlFormatter(logging.Formatter):
         return self.__used_keys
 
     @used_keys.setter
-    def used_keys(self, keys: Set[str]):
-        self.__used_keys = keys
+    def used_keys(self, keys: Iterable[str]):
+        self.__used_keys = set(keys)
+        self.__record_keys = tuple(
+            key for key in dict.fromkeys(keys)
+            if key not in ("message", "timestamp")
+        )
+        self.__message_used = "message" in self.__used_keys
+        self.__timestamp_used = "timestamp" in self.__used_keys
 
-    def format_fields(self, record: logging.LogRecord) -> dict:
-        values = dict(record.__dict__)
-        values.pop("args")
-        if record.args:
-            values["message"] = record.msg % record.args
-            if "color_message" in values.keys():
-                values["color_message"] = values["color_message"] % record.args
-        else:
-            values["message"] = record.msg
+    def format_value(self, value: Any) -> Any:
+        if isinstance(value, JsonMessage):
+            return str(value)
+        return value
 
+    def format_fields(self, record: logging.LogRecord) -> dict:
+        values = {}
+        if self.__message_used:
+            values["message"] = record.getMessage()
+        record_values = record.__dict__
+        for key in self.__record_keys:
+            if key in record_values:
+                values[key] = self.format_value(record_values[key])
+        if self.__timestamp_used:
+            values["timestamp"] = datetime.fromtimestamp(
+                record.created
+            ).isoformat()
         return values
 
-    def add_fields(self, record: dict) -> dict:
-        record["timestamp"] = datetime.fromtimestamp(
-            record.get("created")
-        ).isoformat()
-        return record
+
+class YamlFormatter(FieldsFormatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return yaml.dump([self.format_fields(record)], Dumper=YamlDumper)
+
+
+class JsonLinesFormatter(FieldsFormatter):
+    def format_value(self, value: Any) -> Any:
+        if isinstance(value, JsonMessage):
+            return value.value
+        return value
 
     def format(self, record: logging.LogRecord) -> str:
-        record_dict = self.format_fields(record)
-        record_dict = self.add_fields(record_dict)
-        for key in set(record_dict.keys()):
-            if key not in self.used_keys:
-                record_dict.pop(key)
-        result = yaml.safe_dump([record_dict])
-        return result
+        return dump_json_line(self.format_fields(record))
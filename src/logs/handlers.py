@@ -0,0 +1,137 @@
+import logging
+from queue import Queue, Empty, Full
+from threading import Thread
+from time import monotonic
+
+from constants import LOGS_DROPPED_REPORT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+QUEUE_STOP = object()
+
+
+class BufferedHandler(logging.Handler):
+    def __init__(
+        self,
+        handlers: list[logging.Handler],
+        size: int,
+        block: bool,
+        batch_size: int,
+    ):
+        logging.Handler.__init__(self)
+        self._handlers = handlers
+        self._queue = Queue(size)
+        self._block = block
+        self._batch_size = batch_size
+        self._dropped = 0
+        self._reported_dropped = 0
+        self._reported_time = monotonic()
+        self._thread = Thread(
+            target=self._process_records,
+            name="BufferedLogHandler",
+            daemon=True,
+        )
+
+    @property
+    def handlers(self) -> list[logging.Handler]:
+        return self._handlers
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def emit(self, record: logging.LogRecord):
+        if self._block:
+            self._queue.put(record)
+            return
+        try:
+            self._queue.put_nowait(record)
+        except Full:
+            self._dropped += 1
+
+    def _get_batch(self) -> tuple[list[logging.LogRecord], bool]:
+        record = self._queue.get()
+        if record is QUEUE_STOP:
+            return [], True
+        batch = [record]
+        while len(batch) < self._batch_size:
+            try:
+                record = self._queue.get_nowait()
+            except Empty:
+                break
+            if record is QUEUE_STOP:
+                return batch, True
+            batch.append(record)
+        return batch, False
+
+    @staticmethod
+    def _write_stream_batch(
+        handler: logging.StreamHandler, batch: list[logging.LogRecord],
+    ):
+        lines = []
+        for record in batch:
+            if record.levelno < handler.level or not handler.filter(record):
+                continue
+            try:
+                lines.append(handler.format(record) + handler.terminator)
+            except Exception:
+                handler.handleError(record)
+        if not lines:
+            return
+        handler.acquire()
+        try:
+            handler.stream.write("".join(lines))
+            handler.flush()
+        except Exception:
+            handler.handleError(batch[-1])
+        finally:
+            handler.release()
+
+    def _write_batch(self, batch: list[logging.LogRecord]):
+        for handler in self._handlers:
+            if isinstance(
+                handler, logging.StreamHandler
+            ) and handler.stream is not None:
+                self._write_stream_batch(handler, batch)
+            else:
+                for record in batch:
+                    handler.handle(record)
+
+    def _report_dropped(self, force: bool = False):
+        dropped = self._dropped
+        if dropped == self._reported_dropped:
+            return
+        now = monotonic()
+        if force or now - self._reported_time >= LOGS_DROPPED_REPORT_SECONDS:
+            logger.warning(
+                f"{dropped - self._reported_dropped} log records were "
+                f"dropped, logs buffer is full"
+            )
+            self._reported_dropped = dropped
+            self._reported_time = now
+
+    def _process_records(self):
+        stopped = False
+        while not stopped:
+            batch, stopped = self._get_batch()
+            if batch:
+                self._write_batch(batch)
+            self._report_dropped(stopped)
+
+    def start(self):
+        if self._thread.ident is None:
+            self._thread.start()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(QUEUE_STOP)
+            self._thread.join()
+        for handler in self._handlers:
+            handler.close()
+        logging.Handler.close(self)
+
+
+def start_buffered_handlers(handlers: list[logging.Handler] | None):
+    for handler in handlers or []:
+        if isinstance(handler, BufferedHandler):
+            handler.start()
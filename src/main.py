@@ -1,20 +1,44 @@
 from args import args
 import asyncio
 import logging
+from multiprocessing import freeze_support, get_context
+from multiprocessing.connection import wait
+from multiprocessing.managers import SyncManager
+from multiprocessing.process import BaseProcess
+from multiprocessing.synchronize import Event as EventType
 import os
 import sys
-from signal import SIGINT, SIGTERM, signal
+import time
+from contextlib import AbstractContextManager
+from signal import SIGINT, SIGTERM, SIG_IGN, Signals, signal
+from typing import Callable, MutableMapping
 
 from grpc.aio import Server
 
 from logs import configure_all
-from server import create_server
-from utils import get_exception_error, read_file_bytes, parse_from_yaml
+from logs.handlers import start_buffered_handlers
+from metrics import MetricsRegistry, MetricsServer, get_worker_socket
+from protobuf import get_proto_files_paths
+from protobuf.cache import DescriptorsCache, get_default_cache_dir
+from recordings import RecordsReplayer, RecordsWriter
+from reload import ConfigReloader
+from server import ServersConfigurers, build_servers, create_configurers
+from shell_workers import ShellWorkers
+from state import StateStore
+from templates import FilesCache
+from utils import (
+    get_exception_error, get_relative_abs_path, read_file_bytes,
+    parse_from_yaml,
+)
 from config import parse_config
+from config.model import Config, RecordingMode, ServerConfig
+import constants as c
 from server.configurers import GRPCServerConfigurer
 
 logger = logging.getLogger(__name__)
 
+SIGHUP = getattr(Signals, "SIGHUP", None)
+
 
 def set_default_logging_config():
     os.environ["GRPC_VERBOSITY"] = "NONE"
@@ -24,10 +48,17 @@ def set_default_logging_config():
     configure_all(logging.INFO, False, [handler])
 
 
+def configure_general_logging(config: Config):
+    loggers_config = config.general_logging_config.get_loggers_config()
+    start_buffered_handlers(loggers_config.handlers)
+    configure_all(**loggers_config.model_dump())
+
+
 async def stop_grpc_server(
     server_data: tuple[Server, GRPCServerConfigurer],
+    seconds_grace: float | None = None,
 ):
-    await server_data[0].stop(None)
+    await server_data[0].stop(seconds_grace)
 
     server_config = server_data[1].server_config
     alias = ""
@@ -49,6 +80,8 @@ async def start_grpc_server(
     sockets_str = ", ".join([v.socket for v in server_config.sockets])
     logger.info(f"Started {alias} gRPC server on {sockets_str}")
 
+    await server_data[1].response_processor.prepare_resources()
+
 
 async def start_grpc_servers(
     servers: list[tuple[Server, GRPCServerConfigurer]],
@@ -60,8 +93,11 @@ async def start_grpc_servers(
 
 
 async def shutdown_grpc_servers(
-    servers: list[tuple[Server, GRPCServerConfigurer]]
+    servers: list[tuple[Server, GRPCServerConfigurer]],
+    reloader: ConfigReloader | None = None,
 ):
+    if reloader is not None:
+        await reloader.stop()
     await asyncio.gather(
         *[stop_grpc_server(server_data) for server_data in servers]
     )
@@ -78,61 +114,352 @@ async def shutdown_grpc_servers(
 async def wait_for_servers_termination(
     servers: list[tuple[Server, GRPCServerConfigurer]],
 ):
-    await asyncio.gather(
-        *[server_data[0].wait_for_termination() for server_data in servers]
-    )
+    while True:
+        waited = list(servers)
+        await asyncio.gather(
+            *[server_data[0].wait_for_termination() for server_data in waited]
+        )
+        if waited == servers:
+            break
 
 
 async def run_servers(
-    servers: list[tuple[Server, GRPCServerConfigurer]]
+    servers: list[tuple[Server, GRPCServerConfigurer]],
+    metrics_server: MetricsServer | None = None,
+    shell_workers: ShellWorkers | None = None,
+    reloader: ConfigReloader | None = None,
+    on_started: Callable[[], None] | None = None,
 ):
+    if shell_workers is not None:
+        await shell_workers.start()
     await start_grpc_servers(servers)
+    if metrics_server is not None:
+        await metrics_server.start()
+    if on_started is not None:
+        on_started()
 
     loop = asyncio.get_event_loop()
 
     def grace_shutdown(*args):
-        asyncio.run_coroutine_threadsafe(shutdown_grpc_servers(servers), loop)
+        asyncio.run_coroutine_threadsafe(
+            shutdown_grpc_servers(servers, reloader), loop,
+        )
 
     signal(SIGINT, grace_shutdown)
     signal(SIGTERM, grace_shutdown)
 
+    if reloader is not None:
+        reloader.start()
+        if reloader.reload_config.signal and SIGHUP is not None:
+            def reload_config(*args):
+                asyncio.run_coroutine_threadsafe(reloader.reload(), loop)
+
+            signal(SIGHUP, reload_config)
+
     await wait_for_servers_termination(servers)
+    if metrics_server is not None:
+        await metrics_server.stop()
+    if shell_workers is not None:
+        await shell_workers.stop()
 
 
-def main():
-    try:
-        set_default_logging_config()
+def load_config() -> Config:
+    return parse_config(parse_from_yaml(read_file_bytes(args.c)))
 
-        config = parse_config(
-            parse_from_yaml(read_file_bytes(args.c))
-        )
-        config_file_dir = os.path.dirname(args.c)
 
-        configure_all(
-            **config.general_logging_config.get_loggers_config().model_dump()
+def create_descriptors_cache(
+    config: Config, config_file_dir: str,
+) -> DescriptorsCache:
+    cache_dir = None
+    if config.descriptors_cache:
+        cache_dir = get_default_cache_dir()
+        if config.descriptors_cache_dir is not None:
+            cache_dir = get_relative_abs_path(
+                config_file_dir, config.descriptors_cache_dir,
+            )
+    return DescriptorsCache(cache_dir)
+
+
+def create_state_store(
+    config: Config,
+    storage: MutableMapping | None = None,
+    lock: AbstractContextManager | None = None,
+) -> StateStore:
+    return StateStore(
+        storage, lock, config.state.session_metadata, storage is not None,
+    )
+
+
+def get_state_snapshot_path(
+    config: Config, config_file_dir: str,
+) -> str | None:
+    if config.state.snapshot_file is None:
+        return None
+    return get_relative_abs_path(config_file_dir, config.state.snapshot_file)
+
+
+def serve(
+    config: Config,
+    config_file_dir: str,
+    reuse_port: bool = False,
+    state_store: StateStore | None = None,
+    worker_index: int | None = None,
+    on_started: Callable[[], None] | None = None,
+):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    snapshot_path = None
+    if state_store is None:
+        state_store = create_state_store(config)
+        snapshot_path = get_state_snapshot_path(config, config_file_dir)
+        if snapshot_path is not None:
+            state_store.load_snapshot(snapshot_path)
+
+    metrics_registry = None
+    metrics_server = None
+    if config.metrics is not None:
+        metrics_registry = MetricsRegistry(config.metrics.buckets)
+        metrics_socket = config.metrics.socket
+        if worker_index is not None:
+            metrics_socket = get_worker_socket(metrics_socket, worker_index)
+        metrics_server = MetricsServer(metrics_registry, metrics_socket)
+
+    shell_workers = ShellWorkers(config.shell_workers)
+    files_cache = FilesCache(
+        config.files_cache.max_size,
+        config.files_cache.max_file_size,
+        config.files_cache.seconds_check_interval,
+    )
+
+    records_writer = None
+    records_replayer = None
+    if config.recording is not None:
+        records_path = get_relative_abs_path(
+            config_file_dir, config.recording.file,
+        )
+        if config.recording.mode is RecordingMode.RECORD:
+            records_writer = RecordsWriter(records_path)
+            records_writer.open()
+        else:
+            records_replayer = RecordsReplayer(
+                records_path, config.recording.reproduce_latency,
+            )
+            records_replayer.load()
+
+    api_loggers_config = config.api_logging_config.get_loggers_config()
+    start_buffered_handlers(api_loggers_config.handlers)
+    descriptors_cache = create_descriptors_cache(config, config_file_dir)
+
+    def prepare_servers(
+        server_configs: list[ServerConfig],
+    ) -> ServersConfigurers:
+        return create_configurers(
+            server_configs,
+            config_file_dir,
+            api_loggers_config,
+            descriptors_cache,
+            state_store,
+            metrics_registry,
+            shell_workers,
+            files_cache,
+            records_writer,
+            records_replayer,
+            config.reload is not None,
         )
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+    def build_grpc_servers(
+        servers_configurers: ServersConfigurers,
+    ) -> list[tuple[Server, GRPCServerConfigurer]]:
+        return build_servers(
+            servers_configurers, config_file_dir, loop, reuse_port,
+        )
 
-        servers_data = []
-        for server_config in config.servers:
-            server_data = create_server(
-                server_config,
-                config_file_dir,
-                loop,
-                config.api_logging_config.get_loggers_config(),
+    try:
+        servers_data = build_grpc_servers(prepare_servers(config.servers))
+
+        reloader = None
+        if config.reload is not None:
+            reloader = ConfigReloader(
+                args.c,
+                config,
+                servers_data,
+                load_config,
+                prepare_servers,
+                build_grpc_servers,
+                start_grpc_server,
+                stop_grpc_server,
             )
-            servers_data.append(server_data)
 
-        loop.run_until_complete(run_servers(servers_data))
+        loop.run_until_complete(run_servers(
+            servers_data, metrics_server, shell_workers, reloader, on_started,
+        ))
+    finally:
+        if records_writer is not None:
+            records_writer.close()
+        if records_replayer is not None:
+            records_replayer.close()
+        if snapshot_path is not None:
+            state_store.save_snapshot(snapshot_path)
+
+
+def run_worker(
+    index: int,
+    shared_states: MutableMapping,
+    states_lock: AbstractContextManager,
+    started: EventType,
+):
+    if SIGHUP is not None:
+        signal(SIGHUP, SIG_IGN)
+    try:
+        set_default_logging_config()
+
+        config = load_config()
+        configure_general_logging(config)
+
+        serve(
+            config,
+            os.path.dirname(args.c),
+            True,
+            create_state_store(config, shared_states, states_lock),
+            index,
+            started.set,
+        )
     except SystemExit:
         pass
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        logger.critical(get_exception_error(e))
+        sys.exit(1)
+
+
+def ignore_interrupts():
+    signal(SIGINT, SIG_IGN)
+
+
+def supervise_workers(config: Config, config_file_dir: str, workers: int):
+    descriptors_cache = create_descriptors_cache(config, config_file_dir)
+    if descriptors_cache.cache_dir is not None:
+        descriptors_cache.get_pools([
+            get_proto_files_paths(server_config, config_file_dir)
+            for server_config in config.servers
+        ])
+
+    context = get_context("spawn")
+    manager = SyncManager(ctx=context)
+    manager.start(ignore_interrupts)
+    shared_states = manager.dict()
+    states_lock = manager.Lock()
+    state_store = create_state_store(config, shared_states, states_lock)
+    snapshot_path = get_state_snapshot_path(config, config_file_dir)
+    if snapshot_path is not None:
+        state_store.load_snapshot(snapshot_path)
+
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+
+    signal(SIGINT, stop)
+    signal(SIGTERM, stop)
+
+    processes: list[BaseProcess] = []
+    started_events: list[EventType] = []
+
+    def reload_workers(*_):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, SIGHUP)
+
+    if config.reload is not None and config.reload.signal and (
+        SIGHUP is not None
+    ):
+        signal(SIGHUP, reload_workers)
+
+    def start_worker(index: int) -> tuple[BaseProcess, EventType]:
+        started = context.Event()
+        process = context.Process(
+            target=run_worker,
+            args=(index, shared_states, states_lock, started),
+            name=f"cap-grpc-worker-{index}",
+        )
+        process.start()
+        logger.info(f"Started worker {index} with pid {process.pid}")
+        return process, started
+
+    for index in range(workers):
+        process, started = start_worker(index)
+        processes.append(process)
+        started_events.append(started)
+    failed = False
+    try:
+        while not stopping:
+            wait(
+                [process.sentinel for process in processes],
+                c.WORKERS_CHECK_SECONDS_INTERVAL,
+            )
+            for index, process in enumerate(processes):
+                if stopping or process.is_alive():
+                    continue
+                if not started_events[index].is_set():
+                    logger.critical(
+                        f"Worker {index} with pid {process.pid} exited with "
+                        f"code {process.exitcode} before servers were "
+                        f"started, stopping all workers"
+                    )
+                    failed = stopping = True
+                    break
+                logger.warning(
+                    f"Worker {index} with pid {process.pid} exited with "
+                    f"code {process.exitcode}, restarting"
+                )
+                time.sleep(c.WORKERS_RESTART_SECONDS_DELAY)
+                if not stopping:
+                    processes[index], started_events[index] = start_worker(
+                        index
+                    )
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join(c.WORKERS_STOP_SECONDS_TIMEOUT)
+            if process.is_alive():
+                logger.warning(
+                    f"Worker with pid {process.pid} was not stopped in "
+                    f"{c.WORKERS_STOP_SECONDS_TIMEOUT} seconds, killing"
+                )
+                process.kill()
+        if snapshot_path is not None:
+            state_store.save_snapshot(snapshot_path)
+        manager.shutdown()
+        logger.info("All workers stopped")
+    if failed:
+        sys.exit(1)
+
+
+def main():
+    try:
+        set_default_logging_config()
+
+        config = load_config()
+        config_file_dir = os.path.dirname(args.c)
+
+        configure_general_logging(config)
+
+        if args.w > 1:
+            supervise_workers(config, config_file_dir, args.w)
+        else:
+            serve(config, config_file_dir)
     except KeyboardInterrupt:
         logger.critical("Interrupted")
     except Exception as e:
         logger.critical(get_exception_error(e))
+        sys.exit(1)
 
 
 if __name__ == "__main__":
+    freeze_support()
     main()
@@ -0,0 +1,4 @@
+from metrics.collectors import (
+    Counter, Gauge, Histogram, MetricsRegistry,
+)
+from metrics.server import MetricsServer, get_worker_socket
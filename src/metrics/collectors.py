@@ -0,0 +1,214 @@
+from bisect import bisect_left
+from threading import Lock
+from typing import Iterable
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace(
+        '"', '\\"'
+    )
+
+
+def format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    labels = ",".join(
+        f'{name}="{escape_label_value(value)}"'
+        for name, value in zip(names, values)
+    )
+    return f"{{{labels}}}"
+
+
+class CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class GaugeValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metric:
+    metric_type = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, label_names: Iterable[str] = (),
+    ):
+        self._name = name
+        self._documentation = documentation
+        self._label_names = tuple(label_names)
+        self._values: dict[tuple[str, ...], object] = {}
+        self._lock = Lock()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def label_names(self) -> tuple[str, ...]:
+        return self._label_names
+
+    def _create_value(self) -> object:
+        raise NotImplementedError()
+
+    def labels(self, *values: str) -> object:
+        if len(values) != len(self._label_names):
+            raise ValueError(
+                f"Metric '{self._name}' requires labels "
+                f"{', '.join(self._label_names)}"
+            )
+        value = self._values.get(values)
+        if value is None:
+            with self._lock:
+                value = self._values.get(values)
+                if value is None:
+                    value = self._create_value()
+                    self._values[values] = value
+        return value
+
+    def _render_samples(self) -> list[str]:
+        return [
+            f"{self._name}{format_labels(self._label_names, labels)} "
+            f"{format_number(value.value)}"
+            for labels, value in list(self._values.items())
+        ]
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self._name} {self._documentation}",
+            f"# TYPE {self._name} {self.metric_type}",
+        ]
+        lines.extend(self._render_samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def _create_value(self) -> CounterValue:
+        return CounterValue()
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def _create_value(self) -> GaugeValue:
+        return GaugeValue()
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Iterable[str] = (),
+        buckets: Iterable[float] = (),
+    ):
+        Metric.__init__(self, name, documentation, label_names)
+        self._bounds = tuple(sorted(buckets))
+
+    def _create_value(self) -> HistogramValue:
+        return HistogramValue(self._bounds)
+
+    def _render_samples(self) -> list[str]:
+        bucket_names = self._label_names + ("le",)
+        bounds = [format_number(bound) for bound in self._bounds]
+        bounds.append("+Inf")
+        lines = []
+        for labels, value in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, value.counts):
+                cumulative += count
+                bucket_labels = format_labels(bucket_names, labels + (bound,))
+                lines.append(
+                    f"{self._name}_bucket{bucket_labels} {cumulative}"
+                )
+            value_labels = format_labels(self._label_names, labels)
+            lines.append(
+                f"{self._name}_sum{value_labels} {format_number(value.sum)}"
+            )
+            lines.append(f"{self._name}_count{value_labels} {value.count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, buckets: Iterable[float]):
+        self._buckets = tuple(buckets)
+        self._metrics: dict[str, Metric] = {}
+        self._lock = Lock()
+
+    def _get_metric(self, metric_class: type, name: str, *args) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_class(name, *args)
+                self._metrics[name] = metric
+            elif not isinstance(metric, metric_class):
+                raise ValueError(
+                    f"Metric '{name}' is already registered with another type"
+                )
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, label_names: Iterable[str] = (),
+    ) -> Counter:
+        return self._get_metric(Counter, name, documentation, label_names)
+
+    def gauge(
+        self, name: str, documentation: str, label_names: Iterable[str] = (),
+    ) -> Gauge:
+        return self._get_metric(Gauge, name, documentation, label_names)
+
+    def histogram(
+        self, name: str, documentation: str, label_names: Iterable[str] = (),
+    ) -> Histogram:
+        return self._get_metric(
+            Histogram, name, documentation, label_names, self._buckets,
+        )
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from asyncio import StreamReader, StreamWriter
+
+from metrics.collectors import MetricsRegistry
+from utils import get_exception_error
+import constants as c
+
+logger = logging.getLogger(__name__)
+
+
+def parse_socket(socket: str) -> tuple[str, int]:
+    host, separator, port = socket.rpartition(":")
+    if not separator or not port.isdigit():
+        raise ValueError(f"Invalid metrics socket '{socket}'")
+    return host.strip("[]") or None, int(port)
+
+
+def get_worker_socket(socket: str, worker_index: int) -> str:
+    parse_socket(socket)
+    host, _, port = socket.rpartition(":")
+    return f"{host}:{int(port) + worker_index}"
+
+
+def create_response(status: str, content_type: str, body: bytes) -> bytes:
+    headers = (
+        f"HTTP/1.1 {status}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n"
+    )
+    return headers.encode() + body
+
+
+class MetricsServer:
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        socket: str,
+    ):
+        self._registry = registry
+        self._socket = socket
+        self._server: asyncio.Server | None = None
+
+    @property
+    def socket(self) -> str:
+        return self._socket
+
+    def _get_response(self, request_line: bytes) -> bytes:
+        parts = request_line.decode("latin-1").split()
+        if len(parts) < 2 or parts[0] not in ("GET", "HEAD"):
+            return create_response(
+                "405 Method Not Allowed", "text/plain", b"Method not allowed\n"
+            )
+        if parts[1].split("?", 1)[0] != c.METRICS_PATH:
+            return create_response("404 Not Found", "text/plain", b"")
+        body = b""
+        if parts[0] == "GET":
+            body = self._registry.render().encode()
+        return create_response("200 OK", c.METRICS_CONTENT_TYPE, body)
+
+    async def _handle_connection(
+        self, reader: StreamReader, writer: StreamWriter,
+    ):
+        try:
+            request = await asyncio.wait_for(
+                reader.readuntil(b"\r\n\r\n"),
+                c.METRICS_REQUEST_SECONDS_TIMEOUT,
+            )
+            writer.write(self._get_response(request.split(b"\r\n", 1)[0]))
+            await writer.drain()
+        except (
+            asyncio.TimeoutError,
+            asyncio.IncompleteReadError,
+            asyncio.LimitOverrunError,
+            ConnectionError,
+        ):
+            pass
+        except Exception as e:
+            logger.warning(
+                f"Metrics request processing error. {get_exception_error(e)}"
+            )
+        finally:
+            writer.close()
+
+    async def start(self):
+        host, port = parse_socket(self._socket)
+        self._server = await asyncio.start_server(
+            self._handle_connection,
+            host,
+            port,
+            limit=c.METRICS_REQUEST_MAX_SIZE,
+        )
+        logger.info(f"Started metrics server on {self._socket}")
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        logger.info(f"Stopped metrics server on {self._socket}")
@@ -0,0 +1,162 @@
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import logging
+from multiprocessing import get_context
+import os
+import tempfile
+
+from google.protobuf.descriptor_pool import DescriptorPool
+from grpc_tools.grpc_version import VERSION as PROTOC_VERSION
+
+from constants import (
+    DESCRIPTORS_CACHE_DIR_NAME, DESCRIPTORS_CACHE_EXTENSION,
+    PROTO_IMPORT_PATTERN,
+)
+from protobuf.compilers import compile_descriptor_set, create_descriptor_pool
+from protobuf.definitions import ProtoFilesPaths
+from utils import get_exception_error, read_file_bytes
+
+logger = logging.getLogger(__name__)
+
+
+def get_default_cache_dir() -> str:
+    base_dir = os.environ.get("XDG_CACHE_HOME")
+    if not base_dir:
+        base_dir = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base_dir, DESCRIPTORS_CACHE_DIR_NAME)
+
+
+def get_descriptor_key(proto_paths: ProtoFilesPaths) -> str:
+    digest = hashlib.sha256()
+    digest.update(PROTOC_VERSION.encode())
+    digest.update(b"\0")
+    digest.update(proto_paths.base_dir_abs.encode())
+
+    files_paths = sorted(proto_paths.proto_files_abs)
+    visited = set(files_paths)
+    index = 0
+    while index < len(files_paths):
+        file_path = files_paths[index]
+        index += 1
+        content = read_file_bytes(file_path)
+        digest.update(b"\0")
+        digest.update(file_path.encode())
+        digest.update(b"\0")
+        digest.update(hashlib.sha256(content).digest())
+        for import_path in PROTO_IMPORT_PATTERN.findall(content):
+            import_abs = os.path.normpath(os.path.join(
+                proto_paths.base_dir_abs, import_path.decode(),
+            ))
+            if import_abs not in visited and os.path.isfile(import_abs):
+                visited.add(import_abs)
+                files_paths.append(import_abs)
+    return digest.hexdigest()
+
+
+class DescriptorsCache:
+    def __init__(self, cache_dir: str | None = None):
+        self._cache_dir = cache_dir
+        self._pools: dict[str, DescriptorPool] = {}
+
+    @property
+    def cache_dir(self) -> str | None:
+        return self._cache_dir
+
+    def _get_file_path(self, key: str) -> str:
+        return os.path.join(
+            self._cache_dir, f"{key}{DESCRIPTORS_CACHE_EXTENSION}"
+        )
+
+    def _load(self, key: str) -> bytes | None:
+        file_path = self._get_file_path(key)
+        if not os.path.isfile(file_path):
+            return None
+        try:
+            return read_file_bytes(file_path)
+        except IOError as e:
+            logger.warning(get_exception_error(e))
+            return None
+
+    def _save(self, key: str, descriptor_data: bytes):
+        temp_path = None
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(
+                dir=self._cache_dir, suffix=".tmp",
+            )
+            with os.fdopen(file_descriptor, "wb") as file:
+                file.write(descriptor_data)
+            os.replace(temp_path, self._get_file_path(key))
+        except OSError as e:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+            logger.warning(
+                f"Proto descriptors cache saving error. "
+                f"{get_exception_error(e)}"
+            )
+
+    def _get_cached_pool(self, key: str) -> DescriptorPool | None:
+        pool = self._pools.get(key)
+        if pool is not None or self._cache_dir is None:
+            return pool
+
+        descriptor_data = self._load(key)
+        if descriptor_data is None:
+            return None
+        try:
+            pool = create_descriptor_pool(descriptor_data)
+        except Exception as e:
+            logger.warning(
+                f"Cached proto descriptors loading error. "
+                f"{get_exception_error(e)}"
+            )
+            return None
+        logger.debug("Proto files descriptors loaded from cache")
+        self._pools[key] = pool
+        return pool
+
+    def _add_descriptor_data(self, key: str, descriptor_data: bytes):
+        self._pools[key] = create_descriptor_pool(descriptor_data)
+        if self._cache_dir is not None:
+            self._save(key, descriptor_data)
+
+    def get_pool(self, proto_paths: ProtoFilesPaths) -> DescriptorPool:
+        key = get_descriptor_key(proto_paths)
+        pool = self._get_cached_pool(key)
+        if pool is None:
+            self._add_descriptor_data(
+                key, compile_descriptor_set(proto_paths)
+            )
+            pool = self._pools[key]
+        return pool
+
+    def get_pools(
+        self, proto_paths_list: list[ProtoFilesPaths],
+    ) -> list[tuple[str, DescriptorPool]]:
+        keys = [get_descriptor_key(paths) for paths in proto_paths_list]
+        missing = {}
+        for key, proto_paths in zip(keys, proto_paths_list):
+            if key not in missing and self._get_cached_pool(key) is None:
+                missing[key] = proto_paths
+
+        if len(missing) > 1:
+            with ProcessPoolExecutor(
+                min(len(missing), os.cpu_count() or 1),
+                mp_context=get_context("spawn"),
+            ) as executor:
+                compiled = executor.map(
+                    compile_descriptor_set, missing.values()
+                )
+                for key, descriptor_data in zip(missing.keys(), compiled):
+                    self._add_descriptor_data(key, descriptor_data)
+        else:
+            for key, proto_paths in missing.items():
+                self._add_descriptor_data(
+                    key, compile_descriptor_set(proto_paths)
+                )
+
+        logger.debug(
+            f"Proto files descriptors prepared for {len(keys)} server/s, "
+            f"{len(missing)} compiled"
+        )
+        return [(key, self._pools[key]) for key in keys]
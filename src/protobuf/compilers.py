@@ -6,6 +6,7 @@ from google.protobuf.descriptor import (
     FieldDescriptor,
     EnumDescriptor,
     EnumValueDescriptor,
+    FileDescriptor,
     ServiceDescriptor, MethodDescriptor,
 )
 from google.protobuf.descriptor_pool import DescriptorPool
@@ -15,6 +16,7 @@ from constants import DESCRIPTOR_TEMP_FILENAME
 from protobuf.types import ProtoType
 from protobuf.definitions import (
     InMethodMessageData,
+    LazyDefinitions,
     MethodData,
     EnumField,
     MessageField,
@@ -61,9 +63,7 @@ def update_if_map(message_data: MessageData):
         message_data.is_map = True
 
 
-def generate_descriptor_pool(proto_paths: ProtoFilesPaths):
-    pool = DescriptorPool()
-
+def compile_descriptor_set(proto_paths: ProtoFilesPaths) -> bytes:
     with tempfile.TemporaryDirectory() as dir_name:
         descriptor_abs = get_relative_abs_path(dir_name, DESCRIPTOR_TEMP_FILENAME)
         command_code = protoc.main((
@@ -75,14 +75,22 @@ def generate_descriptor_pool(proto_paths: ProtoFilesPaths):
         if command_code != 0:
             raise RuntimeError("Proto files compilation failed")
 
-        descriptor_set = proto.FileDescriptorSet()
-        data = read_file_bytes(descriptor_abs)
-        descriptor_set.ParseFromString(data)
-        for file_proto in descriptor_set.file:
-            pool.Add(file_proto)
+        return read_file_bytes(descriptor_abs)
+
+
+def create_descriptor_pool(descriptor_data: bytes) -> DescriptorPool:
+    pool = DescriptorPool()
+    descriptor_set = proto.FileDescriptorSet()
+    descriptor_set.ParseFromString(descriptor_data)
+    for file_proto in descriptor_set.file:
+        pool.Add(file_proto)
     return pool
 
 
+def generate_descriptor_pool(proto_paths: ProtoFilesPaths) -> DescriptorPool:
+    return create_descriptor_pool(compile_descriptor_set(proto_paths))
+
+
 class StructureParser:
     def __init__(
         self,
@@ -199,42 +207,74 @@ class StructureParser:
             fields=fields,
         )
 
-    def get_structures(self) -> dict[str, ProtoFileStructure]:
-        pool = self.descriptor_pool
-        result = {}
+    def _parse_services(
+        self, file_descriptor: FileDescriptor,
+    ) -> dict[str, ServiceData]:
+        services_result = {}
+        for name, service_data in file_descriptor.services_by_name.items():
+            service_data: ServiceDescriptor
+            methods_result = {}
+
+            for method in service_data.methods:
+                method: MethodDescriptor
+                methods_result[method.name] = MethodData(
+                    name=method.name,
+                    input_message=InMethodMessageData(
+                        name=method.input_type.full_name,
+                        streaming=method.client_streaming,
+                    ),
+                    output_message=InMethodMessageData(
+                        name=method.output_type.full_name,
+                        streaming=method.server_streaming,
+                    ),
+                )
+            services_result[service_data.full_name] = ServiceData(
+                name=service_data.name,
+                full_name=service_data.full_name,
+                methods=methods_result,
+            )
+        return services_result
 
+    def _get_file_descriptors(self) -> list[FileDescriptor]:
+        result = []
         for file_relative in self.proto_paths.get_relative_map().values():
             try:
-                file_descriptor = pool.FindFileByName(file_relative)
+                result.append(
+                    self.descriptor_pool.FindFileByName(file_relative)
+                )
             except KeyError as e:
                 raise KeyError(f"Required component not found: {e}")
-            services_result = {}
+        return result
+
+    def _get_lazy_structures(self) -> dict[str, ProtoFileStructure]:
+        pool = self.descriptor_pool
+        messages_result = LazyDefinitions(lambda name: self._parse_message(
+            pool.FindMessageTypeByName(name), messages_result, enums_result,
+        ))
+        enums_result = LazyDefinitions(lambda name: self._parse_enum(
+            pool.FindEnumTypeByName(name), enums_result,
+        ))
+        return {
+            file_descriptor.name: ProtoFileStructure.model_construct(
+                package=file_descriptor.package or None,
+                messages=messages_result,
+                services=self._parse_services(file_descriptor),
+                enums=enums_result,
+            )
+            for file_descriptor in self._get_file_descriptors()
+        }
+
+    def get_structures(
+        self, lazy: bool = False,
+    ) -> dict[str, ProtoFileStructure]:
+        if lazy:
+            return self._get_lazy_structures()
+
+        result = {}
+        for file_descriptor in self._get_file_descriptors():
             messages_result = {}
             enums_result = {}
 
-            for name, service_data in file_descriptor.services_by_name.items():
-                service_data: ServiceDescriptor
-                methods_result = {}
-
-                for method in service_data.methods:
-                    method: MethodDescriptor
-                    methods_result[method.name] = MethodData(
-                        name=method.name,
-                        input_message=InMethodMessageData(
-                            name=method.input_type.full_name,
-                            streaming=method.client_streaming,
-                        ),
-                        output_message=InMethodMessageData(
-                            name=method.output_type.full_name,
-                            streaming=method.server_streaming,
-                        ),
-                    )
-                services_result[service_data.full_name] = ServiceData(
-                    name=service_data.name,
-                    full_name=service_data.full_name,
-                    methods=methods_result,
-                )
-
             for message_data in file_descriptor.message_types_by_name.values():
                 self._parse_message(message_data, messages_result, enums_result)
 
@@ -244,7 +284,7 @@ class StructureParser:
             result[file_descriptor.name] = ProtoFileStructure(
                 package=file_descriptor.package or None,
                 messages=messages_result,
-                services=services_result,
+                services=self._parse_services(file_descriptor),
                 enums=enums_result,
             )
         return result
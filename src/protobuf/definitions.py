@@ -1,5 +1,6 @@
 import os
 from enum import Enum
+from typing import Callable
 
 from pydantic import BaseModel
 
@@ -78,6 +79,25 @@ class ServiceData(BaseModel):
     methods: dict[str, MethodData]
 
 
+class LazyDefinitions(dict):
+    def __init__(self, parse: Callable[[str], None]):
+        super().__init__()
+        self._parse = parse
+
+    def __missing__(self, key: str):
+        self._parse(key)
+        value = super().get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
 class ProtoFileStructure(BaseModel):
     package: str | None = None
     messages: dict[str, MessageData]
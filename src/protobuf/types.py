@@ -1,4 +1,6 @@
-from ctypes import c_double, c_float, c_int64, c_uint64, c_int32, c_uint32
+import math
+import struct
+from array import array
 from enum import Enum
 from typing import Callable, Any
 
@@ -9,7 +11,7 @@ class ProtoType(str, Enum):
     DOUBLE = "double"
     FLOAT = "float"
     INT64 = "int64"
-    UINT64 = "uint32"
+    UINT64 = "uint64"
     INT32 = "int32"
     FIXED64 = "fixed64"
     FIXED32 = "fixed32"
@@ -34,44 +36,87 @@ class TypeData(BaseModel):
     python_type: type
     converter: Callable
     default_value: Any
+    array_typecode: str | None = None
+
+
+FLOAT_STRUCT = struct.Struct("<f")
+
+
+def get_array_typecode(size: int, signed: bool) -> str | None:
+    for typecode in ("i", "l", "q"):
+        if not signed:
+            typecode = typecode.upper()
+        if array(typecode).itemsize == size:
+            return typecode
+    return None
+
+
+def create_signed_converter(bits: int) -> Callable[[Any], int]:
+    mask = (1 << bits) - 1
+    sign_bit = 1 << (bits - 1)
+
+    def convert_signed(value: Any) -> int:
+        return ((int(value) + sign_bit) & mask) - sign_bit
+
+    return convert_signed
+
+
+def create_unsigned_converter(bits: int) -> Callable[[Any], int]:
+    mask = (1 << bits) - 1
+
+    def convert_unsigned(value: Any) -> int:
+        return int(value) & mask
+
+    return convert_unsigned
+
+
+def convert_float(value: Any) -> float:
+    value = float(value)
+    try:
+        return FLOAT_STRUCT.unpack(FLOAT_STRUCT.pack(value))[0]
+    except OverflowError:
+        return math.copysign(math.inf, value)
+
+
+def convert_bytes(value: Any) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode()
+    return str(value).encode()
+
+
+def create_integer_type_data(bits: int, signed: bool) -> TypeData:
+    if signed:
+        converter = create_signed_converter(bits)
+    else:
+        converter = create_unsigned_converter(bits)
+    return TypeData(
+        python_type=int,
+        converter=converter,
+        default_value=0,
+        array_typecode=get_array_typecode(bits // 8, signed),
+    )
 
 
 GRPC_PYTHON_TYPES = {
     ProtoType.DOUBLE: TypeData(
-        python_type=int,
-        converter=lambda v: c_double(int(v)).value,
-        default_value=0
+        python_type=float,
+        converter=float,
+        default_value=0.0,
+        array_typecode="d",
     ),
     ProtoType.FLOAT: TypeData(
-        python_type=int,
-        converter=lambda v: c_float(int(v)).value,
-        default_value=0
-    ),
-    ProtoType.INT64: TypeData(
-        python_type=int,
-        converter=lambda v: c_int64(int(v)).value,
-        default_value=0
-    ),
-    ProtoType.UINT64: TypeData(
-        python_type=int,
-        converter=lambda v: c_uint64(int(v)).value,
-        default_value=0
-    ),
-    ProtoType.INT32: TypeData(
-        python_type=int,
-        converter=lambda v: c_int32(int(v)).value,
-        default_value=0
-    ),
-    ProtoType.FIXED64: TypeData(
-        python_type=int,
-        converter=lambda v: c_int64(int(v)).value,
-        default_value=0
-    ),
-    ProtoType.FIXED32: TypeData(
-        python_type=int,
-        converter=lambda v: c_int64(int(v)).value,
-        default_value=0
+        python_type=float,
+        converter=convert_float,
+        default_value=0.0,
+        array_typecode="f",
     ),
+    ProtoType.INT64: create_integer_type_data(64, True),
+    ProtoType.UINT64: create_integer_type_data(64, False),
+    ProtoType.INT32: create_integer_type_data(32, True),
+    ProtoType.FIXED64: create_integer_type_data(64, False),
+    ProtoType.FIXED32: create_integer_type_data(32, False),
     ProtoType.BOOL: TypeData(
         python_type=bool,
         converter=lambda v: bool(v),
@@ -86,35 +131,15 @@ GRPC_PYTHON_TYPES = {
     ProtoType.MESSAGE: None,
     ProtoType.BYTES: TypeData(
         python_type=bytes,
-        converter=lambda v: v if isinstance(v, bytes) else bytes(v),
-        default_value=0
-    ),
-    ProtoType.UINT32: TypeData(
-        python_type=int,
-        converter=lambda v: c_uint32(int(v)).value,
-        default_value=0
+        converter=convert_bytes,
+        default_value=b""
     ),
+    ProtoType.UINT32: create_integer_type_data(32, False),
     ProtoType.ENUM: None,
-    ProtoType.SFIXED32: TypeData(
-        python_type=int,
-        converter=lambda v: c_int32(int(v)).value,
-        default_value=0
-    ),
-    ProtoType.SFIXED64: TypeData(
-        python_type=int,
-        converter=lambda v: c_int64(int(v)).value,
-        default_value=0
-    ),
-    ProtoType.SINT32: TypeData(
-        python_type=int,
-        converter=lambda v: c_int32(int(v)).value,
-        default_value=0
-    ),
-    ProtoType.SINT64: TypeData(
-        python_type=int,
-        converter=lambda v: c_int64(int(v)).value,
-        default_value=0
-    ),
+    ProtoType.SFIXED32: create_integer_type_data(32, True),
+    ProtoType.SFIXED64: create_integer_type_data(64, True),
+    ProtoType.SINT32: create_integer_type_data(32, True),
+    ProtoType.SINT64: create_integer_type_data(64, True),
 }
 
 SimpleProtoType = str | float | int | bool | bytes
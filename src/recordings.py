@@ -0,0 +1,366 @@
+import mmap
+import os
+import struct
+import time
+from hashlib import sha256
+from logging import getLogger
+from time import perf_counter
+from typing import AsyncIterator, Iterable
+
+from google.protobuf.message import Message
+from grpc import StatusCode
+
+from utils import get_exception_error
+import constants as c
+
+logger = getLogger(__name__)
+
+LENGTH = struct.Struct(">I")
+HEADER = struct.Struct(">32sHdd")
+OFFSET = struct.Struct(">d")
+
+STATUS_CODES = {code.value[0]: code for code in StatusCode}
+
+
+class RecordsFormatError(Exception):
+    pass
+
+
+def get_fingerprint(method: str, requests: Iterable[bytes]) -> bytes:
+    digest = sha256(method.encode())
+    for request in requests:
+        digest.update(LENGTH.pack(len(request)))
+        digest.update(request)
+    return digest.digest()
+
+
+def pack_fields(fields: Iterable[bytes]) -> bytes:
+    fields = list(fields)
+    parts = [LENGTH.pack(len(fields))]
+    for field in fields:
+        parts.append(LENGTH.pack(len(field)))
+        parts.append(field)
+    return b"".join(parts)
+
+
+def unpack_fields(data: memoryview, offset: int) -> tuple[list[bytes], int]:
+    (count,) = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    fields = []
+    for _ in range(count):
+        (size,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        if offset + size > len(data):
+            raise RecordsFormatError("Record field exceeds record size")
+        fields.append(bytes(data[offset:offset + size]))
+        offset += size
+    return fields, offset
+
+
+def pack_metadata(metadata: Iterable[tuple[str, str | bytes]]) -> bytes:
+    fields = []
+    for key, value in metadata:
+        fields.append(key.encode())
+        if isinstance(value, str):
+            value = value.encode()
+        fields.append(value)
+    return pack_fields(fields)
+
+
+def unpack_metadata(fields: list[bytes]) -> list[tuple[str, str | bytes]]:
+    metadata = []
+    for index in range(0, len(fields) - 1, 2):
+        key = fields[index].decode()
+        value = fields[index + 1]
+        if not key.endswith("-bin"):
+            value = value.decode()
+        metadata.append((key, value))
+    return metadata
+
+
+class Record:
+    __slots__ = (
+        "method", "fingerprint", "code", "details", "timestamp", "duration",
+        "metadata", "trailing_metadata", "requests", "responses", "offsets",
+    )
+
+    def __init__(
+        self,
+        method: str,
+        fingerprint: bytes,
+        code: StatusCode,
+        details: str,
+        timestamp: float,
+        duration: float,
+        metadata: list[tuple[str, str | bytes]],
+        trailing_metadata: list[tuple[str, str | bytes]],
+        requests: list[bytes],
+        responses: list[bytes],
+        offsets: list[float],
+    ):
+        self.method = method
+        self.fingerprint = fingerprint
+        self.code = code
+        self.details = details
+        self.timestamp = timestamp
+        self.duration = duration
+        self.metadata = metadata
+        self.trailing_metadata = trailing_metadata
+        self.requests = requests
+        self.responses = responses
+        self.offsets = offsets
+
+    def to_bytes(self) -> bytes:
+        payload = b"".join((
+            HEADER.pack(
+                self.fingerprint,
+                self.code.value[0],
+                self.timestamp,
+                self.duration,
+            ),
+            pack_fields((self.method.encode(), self.details.encode())),
+            pack_metadata(self.metadata),
+            pack_metadata(self.trailing_metadata),
+            pack_fields(self.requests),
+            pack_fields(self.responses),
+            b"".join(OFFSET.pack(offset) for offset in self.offsets),
+        ))
+        return c.RECORDS_MAGIC + LENGTH.pack(len(payload)) + payload
+
+    @classmethod
+    def from_bytes(cls, data: memoryview) -> "Record":
+        fingerprint, code, timestamp, duration = HEADER.unpack_from(data)
+        offset = HEADER.size
+        (method, details), offset = unpack_fields(data, offset)
+        metadata, offset = unpack_fields(data, offset)
+        trailing_metadata, offset = unpack_fields(data, offset)
+        requests, offset = unpack_fields(data, offset)
+        responses, offset = unpack_fields(data, offset)
+        if offset + OFFSET.size * len(responses) != len(data):
+            raise RecordsFormatError("Invalid record responses offsets")
+        offsets = [
+            OFFSET.unpack_from(data, offset + index * OFFSET.size)[0]
+            for index in range(len(responses))
+        ]
+        status_code = STATUS_CODES.get(code)
+        if status_code is None:
+            raise RecordsFormatError(f"Unknown record status code {code}")
+        return cls(
+            method.decode(),
+            fingerprint,
+            status_code,
+            details.decode(),
+            timestamp,
+            duration,
+            unpack_metadata(metadata),
+            unpack_metadata(trailing_metadata),
+            requests,
+            responses,
+            offsets,
+        )
+
+
+class RecordsWriter:
+    def __init__(self, filepath: str):
+        self._filepath = filepath
+        self._fd: int | None = None
+        self._records = 0
+
+    @property
+    def filepath(self) -> str:
+        return self._filepath
+
+    @property
+    def records(self) -> int:
+        return self._records
+
+    def open(self):
+        self._fd = os.open(
+            self._filepath,
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(
+                os, "O_BINARY", 0
+            ),
+            0o644,
+        )
+        logger.info(f"Recording proxied calls to '{self._filepath}'")
+
+    def write(self, record: Record):
+        if self._fd is None:
+            return
+        data = memoryview(record.to_bytes())
+        while data:
+            written = os.write(self._fd, data)
+            data = data[written:]
+        self._records += 1
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            logger.info(
+                f"{self._records} proxied call/s recorded to "
+                f"'{self._filepath}'"
+            )
+
+
+class CallRecording:
+    __slots__ = (
+        "_writer", "_method", "_metadata", "_timestamp", "_started",
+        "_requests", "_responses", "_offsets",
+    )
+
+    def __init__(
+        self,
+        writer: RecordsWriter,
+        method: str,
+        metadata: list[tuple[str, str | bytes]],
+    ):
+        self._writer = writer
+        self._method = method
+        self._metadata = metadata
+        self._timestamp = time.time()
+        self._started = perf_counter()
+        self._requests: list[bytes] = []
+        self._responses: list[bytes] = []
+        self._offsets: list[float] = []
+
+    def add_request(self, request: Message):
+        self._requests.append(request.SerializeToString(deterministic=True))
+
+    def add_response(self, response: Message):
+        self._offsets.append(perf_counter() - self._started)
+        self._responses.append(response.SerializeToString())
+
+    async def _watch_iterator(self, requests: AsyncIterator) -> AsyncIterator:
+        async for request in requests:
+            self.add_request(request)
+            yield request
+
+    def watch_requests(self, requests: object) -> object:
+        if isinstance(requests, Message):
+            self.add_request(requests)
+            return requests
+        if isinstance(requests, list):
+            for request in requests:
+                self.add_request(request)
+            return requests
+        return self._watch_iterator(requests)
+
+    def finish(
+        self,
+        code: StatusCode,
+        details: str | None = None,
+        trailing_metadata: Iterable[tuple[str, str | bytes]] | None = None,
+    ):
+        try:
+            self._writer.write(Record(
+                self._method,
+                get_fingerprint(self._method, self._requests),
+                code,
+                details or "",
+                self._timestamp,
+                perf_counter() - self._started,
+                self._metadata,
+                list(trailing_metadata or ()),
+                self._requests,
+                self._responses,
+                self._offsets,
+            ))
+        except Exception as e:
+            logger.error(
+                f"Proxied call recording error. {get_exception_error(e)}"
+            )
+
+
+class RecordsReplayer:
+    def __init__(self, filepath: str, reproduce_latency: bool = False):
+        self._filepath = filepath
+        self._reproduce_latency = reproduce_latency
+        self._file = None
+        self._data: mmap.mmap | None = None
+        self._index: dict[tuple[str, bytes], list[tuple[int, int]]] = {}
+        self._positions: dict[tuple[str, bytes], int] = {}
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def reproduce_latency(self) -> bool:
+        return self._reproduce_latency
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._index.values())
+
+    def load(self):
+        self._file = open(self._filepath, "rb")
+        if os.fstat(self._file.fileno()).st_size > 0:
+            self._data = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ,
+            )
+            self._build_index()
+        logger.info(
+            f"Replaying {len(self)} recorded call/s for {len(self._index)} "
+            f"request/s from '{self._filepath}'"
+        )
+
+    def _build_index(self):
+        data = memoryview(self._data)
+        magic_size = len(c.RECORDS_MAGIC)
+        offset = 0
+        try:
+            while offset < len(data):
+                prefix_end = offset + magic_size + LENGTH.size
+                if prefix_end > len(data):
+                    raise RecordsFormatError("Truncated record prefix")
+                if data[offset:offset + magic_size] != c.RECORDS_MAGIC:
+                    raise RecordsFormatError("Invalid record prefix")
+                (size,) = LENGTH.unpack_from(data, offset + magic_size)
+                if prefix_end + size > len(data):
+                    raise RecordsFormatError("Truncated record")
+                record_data = data[prefix_end:prefix_end + size]
+                fingerprint = HEADER.unpack_from(record_data)[0]
+                (method, _), _ = unpack_fields(record_data, HEADER.size)
+                self._index.setdefault(
+                    (method.decode(), fingerprint), []
+                ).append((prefix_end, size))
+                offset = prefix_end + size
+        except (RecordsFormatError, struct.error) as e:
+            logger.warning(
+                f"Records file '{self._filepath}' is damaged at offset "
+                f"{offset}, following records are ignored. "
+                f"{get_exception_error(e)}"
+            )
+        finally:
+            data.release()
+
+    def find(self, method: str, requests: Iterable[bytes]) -> Record | None:
+        key = (method, get_fingerprint(method, requests))
+        entries = self._index.get(key)
+        if entries is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        position = self._positions.get(key, 0)
+        self._positions[key] = (position + 1) % len(entries)
+        offset, size = entries[position]
+        with memoryview(self._data) as data:
+            return Record.from_bytes(data[offset:offset + size])
+
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            logger.info(
+                f"Records replay from '{self._filepath}': {self._hits} "
+                f"hits, {self._misses} misses"
+            )
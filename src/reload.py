@@ -0,0 +1,193 @@
+import asyncio
+import os
+from logging import getLogger
+from typing import Awaitable, Callable
+
+from grpc.aio import Server
+
+from config.model import Config, ReloadConfig, ServerConfig
+from server import ServersConfigurers
+from server.configurers import GRPCServerConfigurer, get_mocked_services
+from utils import get_exception_error
+
+logger = getLogger(__name__)
+
+ServerData = tuple[Server, GRPCServerConfigurer]
+
+SERVER_RELOAD_EXCLUDED_FIELDS = {"mocks"}
+CONFIG_RELOAD_EXCLUDED_FIELDS = {"servers", "reload"}
+
+
+def is_rebuild_required(
+    server_config: ServerConfig, new_server_config: ServerConfig,
+) -> bool:
+    if new_server_config.mocked_services_only and get_mocked_services(
+        server_config
+    ) != get_mocked_services(new_server_config):
+        return True
+    return server_config.model_dump(
+        exclude=SERVER_RELOAD_EXCLUDED_FIELDS
+    ) != new_server_config.model_dump(exclude=SERVER_RELOAD_EXCLUDED_FIELDS)
+
+
+def get_file_mtime(filepath: str) -> int | None:
+    try:
+        return os.stat(filepath).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ConfigReloader:
+    def __init__(
+        self,
+        config_path: str,
+        config: Config,
+        servers: list[ServerData],
+        load_config: Callable[[], Config],
+        prepare_servers: Callable[[list[ServerConfig]], ServersConfigurers],
+        build_servers: Callable[[ServersConfigurers], list[ServerData]],
+        start_server: Callable[[ServerData], Awaitable],
+        stop_server: Callable[[ServerData, float | None], Awaitable],
+    ):
+        self._config_path = config_path
+        self._config = config
+        self._servers = servers
+        self._load_config = load_config
+        self._prepare_servers = prepare_servers
+        self._build_servers = build_servers
+        self._start_server = start_server
+        self._stop_server = stop_server
+        self._lock = asyncio.Lock()
+        self._watch_task: asyncio.Task | None = None
+        self._stopped = False
+
+    @property
+    def reload_config(self) -> ReloadConfig:
+        return self._config.reload or ReloadConfig()
+
+    def start(self):
+        if self.reload_config.watch:
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def _watch(self):
+        mtime = get_file_mtime(self._config_path)
+        while True:
+            await asyncio.sleep(self.reload_config.seconds_interval)
+            new_mtime = get_file_mtime(self._config_path)
+            if new_mtime is not None and new_mtime != mtime:
+                mtime = new_mtime
+                logger.info(f"Config file '{self._config_path}' changed")
+                await self.reload()
+
+    async def reload(self):
+        async with self._lock:
+            if self._stopped:
+                return
+            try:
+                config = await asyncio.to_thread(self._load_config)
+            except Exception as e:
+                logger.error(
+                    f"Config reloading error, running config is kept. "
+                    f"{get_exception_error(e)}"
+                )
+                return
+            await self._apply(config)
+
+    async def _try_build_servers(
+        self, server_configs: list[ServerConfig],
+    ) -> list[ServerData] | None:
+        if not server_configs:
+            return []
+        try:
+            servers_configurers = await asyncio.to_thread(
+                self._prepare_servers, server_configs,
+            )
+            return self._build_servers(servers_configurers)
+        except Exception as e:
+            logger.error(
+                f"Servers building error on config reloading. "
+                f"{get_exception_error(e)}"
+            )
+            return None
+
+    async def _stop_servers(
+        self, servers: list[ServerData], seconds_grace: float,
+    ):
+        for server_data in servers:
+            if server_data in self._servers:
+                self._servers.remove(server_data)
+        await asyncio.gather(*[
+            self._stop_server(server_data, seconds_grace)
+            for server_data in servers
+        ])
+        await asyncio.gather(*[
+            server_data[1].response_processor.clean_resources()
+            for server_data in servers
+        ])
+
+    async def _apply(self, config: Config):
+        if config.model_dump(
+            exclude=CONFIG_RELOAD_EXCLUDED_FIELDS
+        ) != self._config.model_dump(exclude=CONFIG_RELOAD_EXCLUDED_FIELDS):
+            logger.warning(
+                "Only servers configuration changes are applied on config "
+                "reloading, other changes require restart"
+            )
+
+        running = {
+            server_data[1].server_config.alias: server_data
+            for server_data in self._servers
+        }
+        replaced = []
+        built_configs = []
+        reloaded_methods = 0
+        for server_config in config.servers:
+            server_data = running.pop(server_config.alias, None)
+            if server_data is None:
+                built_configs.append(server_config)
+                continue
+            current_config = server_data[1].server_config
+            if is_rebuild_required(current_config, server_config):
+                replaced.append(server_data)
+                built_configs.append(server_config)
+            elif current_config != server_config:
+                reloaded_methods += server_data[1].reload_handlers(
+                    server_config
+                )
+                await server_data[1].response_processor.prepare_resources()
+        removed = list(running.values())
+        seconds_grace = (config.reload or ReloadConfig()).seconds_grace
+
+        stopped = replaced + removed
+        pending = stopped
+        built = await self._try_build_servers(built_configs)
+        if built is None and replaced:
+            logger.warning(
+                "Replaced servers are stopped before building new ones"
+            )
+            await self._stop_servers(stopped, seconds_grace)
+            pending = []
+            built = await self._try_build_servers(built_configs)
+        if built is None:
+            built = []
+
+        for server_data in built:
+            await self._start_server(server_data)
+            self._servers.append(server_data)
+        await self._stop_servers(pending, seconds_grace)
+
+        self._config = config
+        logger.info(
+            f"Config reloaded: {reloaded_methods} method/s reloaded, "
+            f"{len(built)} server/s started, {len(stopped)} server/s stopped"
+        )
+
+    async def stop(self):
+        async with self._lock:
+            self._stopped = True
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
@@ -1,51 +1,209 @@
 import logging
+import os
 from asyncio import AbstractEventLoop
+from concurrent.futures import ThreadPoolExecutor
 
+from google.protobuf.descriptor_pool import DescriptorPool
 from grpc.aio import Server
 
 from logs import LoggerConfig
 from config.model import ServerConfig
+from metrics import MetricsRegistry
 from protobuf import get_proto_files_paths
-from protobuf.compilers import StructureParser, generate_descriptor_pool
+from protobuf.cache import DescriptorsCache
+from protobuf.compilers import StructureParser
+from recordings import RecordsReplayer, RecordsWriter
+from protobuf.definitions import ProtoFilesPaths
 from server.configurers import GRPCServerConfigurer
 from server.helpers import ProtoObjectResolver
 from server.processors import (
     APILogProcessor, ResponseProcessor, TemplateProcessor
 )
+from server.processors.metrics import MetricsProcessor
 from server.processors.proxy import ProxyProcessor
-from templates import create_base_environment
+from shell_workers import ShellWorkers
+from state import ServerState, StateStore
+from templates import FilesCache, create_base_environment
+from utils import PhasesTimer
 
 logger = logging.getLogger(__name__)
 
 
-def create_server(
+def create_configurer(
     server_config: ServerConfig,
     config_file_dir: str,
-    loop: AbstractEventLoop,
     api_loggers_config: LoggerConfig,
-) -> tuple[Server, GRPCServerConfigurer]:
-    proto_paths = get_proto_files_paths(server_config, config_file_dir)
-
-    pool = generate_descriptor_pool(proto_paths)
-    structures = StructureParser(pool, proto_paths).get_structures()
+    proto_paths: ProtoFilesPaths,
+    pool: DescriptorPool,
+    timer: PhasesTimer,
+    state: ServerState | None = None,
+    state_store: StateStore | None = None,
+    metrics_registry: MetricsRegistry | None = None,
+    shell_workers: ShellWorkers | None = None,
+    files_cache: FilesCache | None = None,
+    records_writer: RecordsWriter | None = None,
+    records_replayer: RecordsReplayer | None = None,
+    reloadable: bool = False,
+) -> GRPCServerConfigurer:
+    with timer.measure("structures"):
+        structures = StructureParser(pool, proto_paths).get_structures(
+            lazy=True,
+        )
 
     logger.debug("Proto files parsing successful")
 
-    object_resolver = ProtoObjectResolver(structures, pool)
+    with timer.measure("resolver"):
+        object_resolver = ProtoObjectResolver(structures, pool)
 
-    configurer = GRPCServerConfigurer(
-        object_resolver,
-        ResponseProcessor(
+    with timer.measure("handlers"):
+        configurer = GRPCServerConfigurer(
             object_resolver,
+            ResponseProcessor(
+                object_resolver,
+                server_config,
+                TemplateProcessor(
+                    create_base_environment(
+                        config_file_dir, shell_workers, files_cache,
+                    ),
+                    state,
+                    state_store,
+                ),
+                APILogProcessor(api_loggers_config),
+                ProxyProcessor(
+                    config_file_dir, records_writer, records_replayer,
+                ),
+                MetricsProcessor(metrics_registry, server_config.alias),
+            ),
             server_config,
-            TemplateProcessor(create_base_environment(config_file_dir)),
-            APILogProcessor(api_loggers_config),
-            ProxyProcessor(),
-        ),
-        server_config,
-    )
-    server = configurer.build_server(config_file_dir, loop)
+            reloadable,
+        )
+        configurer.prepare_handlers()
+    return configurer
 
-    logger.debug("Servers build successful")
 
+def build_server(
+    configurer: GRPCServerConfigurer,
+    config_file_dir: str,
+    loop: AbstractEventLoop,
+    timer: PhasesTimer,
+    reuse_port: bool = False,
+) -> tuple[Server, GRPCServerConfigurer]:
+    with timer.measure("server"):
+        server = configurer.build_server(config_file_dir, loop, reuse_port)
+
+    logger.info(
+        f"Server '{configurer.server_config.alias}' built in "
+        f"{timer.total * 1000:.1f} ms: {timer.get_report()}"
+    )
     return server, configurer
+
+
+class ServersConfigurers:
+    __slots__ = ("configurers", "timers", "timer")
+
+    def __init__(
+        self,
+        configurers: list[GRPCServerConfigurer],
+        timers: list[PhasesTimer],
+        timer: PhasesTimer,
+    ):
+        self.configurers = configurers
+        self.timers = timers
+        self.timer = timer
+
+
+def create_configurers(
+    server_configs: list[ServerConfig],
+    config_file_dir: str,
+    api_loggers_config: LoggerConfig,
+    descriptors_cache: DescriptorsCache,
+    state_store: StateStore | None = None,
+    metrics_registry: MetricsRegistry | None = None,
+    shell_workers: ShellWorkers | None = None,
+    files_cache: FilesCache | None = None,
+    records_writer: RecordsWriter | None = None,
+    records_replayer: RecordsReplayer | None = None,
+    reloadable: bool = False,
+) -> ServersConfigurers:
+    timer = PhasesTimer()
+    with timer.measure("descriptors"):
+        proto_paths_list = [
+            get_proto_files_paths(server_config, config_file_dir)
+            for server_config in server_configs
+        ]
+        pools = descriptors_cache.get_pools(proto_paths_list)
+
+    servers_timers = [PhasesTimer() for _ in server_configs]
+    states = [None] * len(server_configs)
+    if state_store is not None:
+        states = [
+            ServerState(state_store.storage, server_config.alias)
+            for server_config in server_configs
+        ]
+    pool_groups: dict[str, list[int]] = {}
+    for index, (key, _) in enumerate(pools):
+        pool_groups.setdefault(key, []).append(index)
+
+    def create_group_configurers(
+        indexes: list[int],
+    ) -> list[tuple[int, GRPCServerConfigurer]]:
+        return [
+            (index, create_configurer(
+                server_configs[index],
+                config_file_dir,
+                api_loggers_config,
+                proto_paths_list[index],
+                pools[index][1],
+                servers_timers[index],
+                states[index],
+                state_store,
+                metrics_registry,
+                shell_workers,
+                files_cache,
+                records_writer,
+                records_replayer,
+                reloadable,
+            ))
+            for index in indexes
+        ]
+
+    configurers = [None] * len(server_configs)
+    with timer.measure("configurers"):
+        with ThreadPoolExecutor(
+            min(len(pool_groups), os.cpu_count() or 1) or 1
+        ) as executor:
+            for group in executor.map(
+                create_group_configurers, pool_groups.values()
+            ):
+                for index, configurer in group:
+                    configurers[index] = configurer
+    return ServersConfigurers(configurers, servers_timers, timer)
+
+
+def build_servers(
+    servers_configurers: ServersConfigurers,
+    config_file_dir: str,
+    loop: AbstractEventLoop,
+    reuse_port: bool = False,
+) -> list[tuple[Server, GRPCServerConfigurer]]:
+    timer = servers_configurers.timer
+    with timer.measure("servers"):
+        servers = [
+            build_server(
+                configurer,
+                config_file_dir,
+                loop,
+                servers_configurers.timers[index],
+                reuse_port,
+            )
+            for index, configurer in enumerate(
+                servers_configurers.configurers
+            )
+        ]
+
+    logger.info(
+        f"{len(servers)} server/s built in {timer.total * 1000:.1f} ms: "
+        f"{timer.get_report()}"
+    )
+    return servers
+
@@ -0,0 +1,250 @@
+import logging
+from array import array
+from typing import Any, Callable, Type
+
+from google.protobuf.internal.enum_type_wrapper import EnumTypeWrapper
+from google.protobuf.message import Message
+
+from protobuf.definitions import (
+    MessageField, PropertyLabel, ProtoFileStructure
+)
+from protobuf.types import ProtoType, GRPC_PYTHON_TYPES, SimpleProtoType
+
+logger = logging.getLogger(__name__)
+
+FieldBuilder = Callable[[Any], tuple[Any, Any]]
+
+EMPTY_MOCK = {}
+
+
+class EnumValues:
+    __slots__ = ("numbers", "names", "default")
+
+    def __init__(self, enum_type: EnumTypeWrapper):
+        self.numbers: dict[str, int] = {}
+        self.names: dict[int, str] = {}
+        for name, number in enum_type.items():
+            self.numbers[name] = number
+            self.names.setdefault(number, name)
+        default_name = enum_type.keys()[0]
+        self.default = (default_name, self.numbers[default_name])
+
+    def resolve(self, value: Any) -> tuple[str, int] | None:
+        if isinstance(value, str):
+            number = self.numbers.get(value)
+            if number is not None:
+                return value, number
+            if not value.lstrip("-").isdigit():
+                return None
+            value = int(value)
+        elif not isinstance(value, int) or isinstance(value, bool):
+            return None
+        name = self.names.get(value)
+        if name is None:
+            return None
+        return name, value
+
+
+class MessageBuilder:
+    __slots__ = ("full_name", "message_type", "fields")
+
+    def __init__(self, full_name: str, message_type: Type[Message]):
+        self.full_name = full_name
+        self.message_type = message_type
+        self.fields: list[tuple[str, FieldBuilder]] = []
+
+    def build(self, mock_value: Any) -> tuple[dict, Message]:
+        if not isinstance(mock_value, dict):
+            mock_value = EMPTY_MOCK
+
+        raw_dict = {}
+        objects_dict = {}
+        for name, build_field in self.fields:
+            raw_value, object_value = build_field(mock_value.get(name))
+            if object_value is not None:
+                raw_dict[name] = raw_value
+                objects_dict[name] = object_value
+        return raw_dict, self.message_type(**objects_dict)
+
+
+def create_simple_builder(field_data: MessageField) -> FieldBuilder:
+    type_data = GRPC_PYTHON_TYPES[field_data.simple_type]
+    converter = type_data.converter
+    default = type_data.default_value
+    if field_data.default is not None:
+        default = field_data.default
+    is_optional = field_data.label == PropertyLabel.OPTIONAL
+    field_name = field_data.name
+    type_name = field_data.simple_type.value
+    python_type_name = type_data.python_type.__name__
+
+    def build_simple(value: Any) -> tuple[Any, Any]:
+        if value is None:
+            if is_optional:
+                return None, None
+            return default, default
+        if not isinstance(value, SimpleProtoType):
+            return default, default
+        try:
+            result = converter(value)
+        except Exception:
+            logger.warning(
+                f"Error converting field '{field_name}' to "
+                f"type '{python_type_name}'"
+            )
+            return default, default
+        if result != value and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"Field '{field_name}' converted to "
+                f"corresponding prototype '{type_name}'"
+            )
+        return result, result
+
+    return build_simple
+
+
+def create_enum_builder(
+    field_data: MessageField, enum_values: EnumValues,
+) -> FieldBuilder:
+    resolve = enum_values.resolve
+    default_value = enum_values.default
+    if field_data.default is not None:
+        default_value = resolve(field_data.default) or default_value
+    is_optional = field_data.label == PropertyLabel.OPTIONAL
+
+    def build_enum(value: Any) -> tuple[str | None, int | None]:
+        if value is None:
+            if is_optional:
+                return None, None
+            return default_value
+        return resolve(value) or default_value
+
+    return build_enum
+
+
+def create_message_field_builder(
+    field_data: MessageField, message_builder: MessageBuilder,
+) -> FieldBuilder:
+    is_optional = field_data.label == PropertyLabel.OPTIONAL
+    build_message = message_builder.build
+
+    def build_message_field(value: Any) -> tuple[dict | None, Any]:
+        if value is None and is_optional:
+            return None, None
+        return build_message(value)
+
+    return build_message_field
+
+
+def create_repeated_builder(build_item: FieldBuilder) -> FieldBuilder:
+    def build_repeated(value: Any) -> tuple[list, list]:
+        if value is None:
+            return [], []
+        if not isinstance(value, list):
+            value = [value]
+        raw_values = []
+        object_values = []
+        for item in value:
+            raw_value, object_value = build_item(item)
+            raw_values.append(raw_value)
+            object_values.append(object_value)
+        return raw_values, object_values
+
+    return build_repeated
+
+
+def create_numbers_repeated_builder(
+    field_data: MessageField, build_item: FieldBuilder,
+) -> FieldBuilder:
+    typecode = GRPC_PYTHON_TYPES[field_data.simple_type].array_typecode
+    build_items = create_repeated_builder(build_item)
+
+    def build_numbers(value: Any) -> tuple[list, list]:
+        if not isinstance(value, list):
+            return build_items(value)
+        try:
+            result = array(typecode, value).tolist()
+        except (TypeError, OverflowError):
+            return build_items(value)
+        return result, result
+
+    return build_numbers
+
+
+def create_map_builder(
+    key_builder: FieldBuilder, value_builder: FieldBuilder,
+) -> FieldBuilder:
+    def build_map(value: Any) -> tuple[dict | None, dict | None]:
+        if value is None:
+            return None, None
+        if not isinstance(value, dict):
+            return {}, {}
+        raw_dict = {}
+        objects_dict = {}
+        for property_key, property_value in value.items():
+            raw_key, object_key = key_builder(property_key)
+            raw_value, object_value = value_builder(property_value)
+            if object_value is not None:
+                raw_dict[raw_key] = raw_value
+                objects_dict[object_key] = object_value
+        return raw_dict, objects_dict
+
+    return build_map
+
+
+class MessageBuildersCompiler:
+    def __init__(
+        self,
+        structure: ProtoFileStructure,
+        get_message_type: Callable[[str], Type[Message]],
+        get_enum_values: Callable[[str], EnumValues],
+    ):
+        self._structure = structure
+        self._get_message_type = get_message_type
+        self._get_enum_values = get_enum_values
+        self._builders: dict[str, MessageBuilder] = {}
+
+    def _create_value_builder(self, field_data: MessageField) -> FieldBuilder:
+        simple_type = field_data.simple_type
+        if simple_type == ProtoType.MESSAGE or simple_type == ProtoType.GROUP:
+            return create_message_field_builder(
+                field_data, self.get_builder(field_data.message_type),
+            )
+        elif simple_type == ProtoType.ENUM:
+            return create_enum_builder(
+                field_data, self._get_enum_values(field_data.enum_type),
+            )
+        else:
+            return create_simple_builder(field_data)
+
+    def _create_field_builder(self, field_data: MessageField) -> FieldBuilder:
+        if field_data.simple_type == ProtoType.MESSAGE and field_data.is_map:
+            entry_data = self._structure.messages[field_data.message_type]
+            return create_map_builder(
+                self._create_field_builder(entry_data.fields[0]),
+                self._create_field_builder(entry_data.fields[1]),
+            )
+
+        builder = self._create_value_builder(field_data)
+        if (
+            field_data.label != PropertyLabel.REPEATED or
+            field_data.simple_type == ProtoType.GROUP
+        ):
+            return builder
+        type_data = GRPC_PYTHON_TYPES.get(field_data.simple_type)
+        if type_data is not None and type_data.array_typecode is not None:
+            return create_numbers_repeated_builder(field_data, builder)
+        return create_repeated_builder(builder)
+
+    def get_builder(self, full_name: str) -> MessageBuilder:
+        builder = self._builders.get(full_name)
+        if builder is not None:
+            return builder
+        message_data = self._structure.messages[full_name]
+        builder = MessageBuilder(full_name, self._get_message_type(full_name))
+        self._builders[full_name] = builder
+        builder.fields = [
+            (field_data.name, self._create_field_builder(field_data))
+            for field_data in message_data.fields
+        ]
+        return builder
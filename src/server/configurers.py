@@ -1,20 +1,27 @@
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
+from typing import Callable
 
 import grpc
 from google.protobuf import descriptor_pool
 from google.protobuf.descriptor import FieldDescriptor
 from google.protobuf.message_factory import MessageFactory
 from grpc import RpcMethodHandler
-from grpc.aio import Server
+from grpc.aio import Server, ServicerContext
 from grpc_reflection.v1alpha import reflection
 
 from protobuf.types import ProtoType
 from server.helpers import ProtoObjectResolver
-from config.model import ServerConfig
+from config.model import (
+    ResponseMockConfig, ServerConfig, ServerOptionsConfig
+)
 from server.processors import ResponseProcessor
-from protobuf.definitions import ServiceData, ProtoFileStructure
-from utils import read_file, get_relative_abs_path
+from server.processors.mock import (
+    get_serialized_response, serialize_response
+)
+from protobuf.definitions import MethodData, ServiceData, ProtoFileStructure
+from utils import read_file_bytes, get_relative_abs_path
 
 
 logger = getLogger(__name__)
@@ -78,18 +85,146 @@ def check_methods(
         )
 
 
+def create_server_options(
+    options_config: ServerOptionsConfig, reuse_port: bool,
+) -> list[tuple[str, int]]:
+    options = []
+    if reuse_port:
+        options.append(("grpc.so_reuseport", 1))
+    if options_config.max_send_message_size is not None:
+        options.append((
+            "grpc.max_send_message_length",
+            options_config.max_send_message_size,
+        ))
+    if options_config.max_receive_message_size is not None:
+        options.append((
+            "grpc.max_receive_message_length",
+            options_config.max_receive_message_size,
+        ))
+    if options_config.keepalive_seconds is not None:
+        options.append((
+            "grpc.keepalive_time_ms",
+            int(options_config.keepalive_seconds * 1000),
+        ))
+    if options_config.keepalive_timeout_seconds is not None:
+        options.append((
+            "grpc.keepalive_timeout_ms",
+            int(options_config.keepalive_timeout_seconds * 1000),
+        ))
+    if options_config.keepalive_without_calls is not None:
+        options.append((
+            "grpc.keepalive_permit_without_calls",
+            int(options_config.keepalive_without_calls),
+        ))
+    if options_config.keepalive_min_ping_seconds is not None:
+        options.append((
+            "grpc.http2.min_ping_interval_without_data_ms",
+            int(options_config.keepalive_min_ping_seconds * 1000),
+        ))
+    if options_config.flow_control_window is not None:
+        options.append((
+            "grpc.http2.lookahead_bytes",
+            options_config.flow_control_window,
+        ))
+    if options_config.bdp_probe is not None:
+        options.append((
+            "grpc.http2.bdp_probe", int(options_config.bdp_probe),
+        ))
+    if options_config.max_frame_size is not None:
+        options.append((
+            "grpc.http2.max_frame_size", options_config.max_frame_size,
+        ))
+    return options
+
+
+def get_method_mock_config(
+    server_config: ServerConfig, service_name: str, method_name: str,
+) -> ResponseMockConfig | str | None:
+    if server_config.mocks is None:
+        return None
+    return server_config.mocks.root.get(service_name, {}).get(method_name)
+
+
+def get_mocked_services(server_config: ServerConfig) -> set[str]:
+    if server_config.mocks is None:
+        return set()
+    return set(server_config.mocks.root)
+
+
+class LazyServicesHandler(grpc.GenericRpcHandler):
+    def __init__(
+        self,
+        services: dict[str, ServiceData],
+        create_handler: Callable[[ServiceData, MethodData], RpcMethodHandler],
+    ):
+        self._services = services
+        self._create_handler = create_handler
+        self._handlers: dict[str, RpcMethodHandler] = {}
+
+    def service(
+        self, handler_call_details: grpc.HandlerCallDetails,
+    ) -> RpcMethodHandler | None:
+        method_path = handler_call_details.method
+        handler = self._handlers.get(method_path)
+        if handler is not None:
+            return handler
+
+        service_name, _, method_name = method_path[1:].partition("/")
+        service_data = self._services.get(service_name)
+        if service_data is None:
+            return None
+        method_data = service_data.methods.get(method_name)
+        if method_data is None:
+            return None
+        handler = self._create_handler(service_data, method_data)
+        self._handlers[method_path] = handler
+        logger.debug(
+            f"Handler of method '{method_name}' in service '{service_name}' "
+            f"created on first call"
+        )
+        return handler
+
+
+class MethodSlot:
+    __slots__ = ("function",)
+
+    def __init__(self, function: Callable):
+        self.function = function
+
+
+def create_slot_handler(slot: MethodSlot, streaming: bool) -> Callable:
+    if streaming:
+        async def process_stream(request: object, context: ServicerContext):
+            async for response in slot.function(request, context):
+                yield response
+
+        return process_stream
+
+    async def process_unary(request: object, context: ServicerContext):
+        return await slot.function(request, context)
+
+    return process_unary
+
+
 class GRPCServerConfigurer:
     def __init__(
         self,
         object_resolver: ProtoObjectResolver,
         response_processor: ResponseProcessor,
         server_config: ServerConfig,
+        reloadable: bool = False,
     ):
         self._obj_resolver = object_resolver
         self._response_processor = response_processor
         self._server_config = server_config
+        self._reloadable = reloadable
         self._pool = descriptor_pool.Default()
         self._factory = MessageFactory(self._pool)
+        self._services_handlers: dict[
+            str, dict[str, RpcMethodHandler]
+        ] | None = None
+        self._lazy_services: dict[str, ServiceData] = {}
+        self._method_slots: dict[tuple[str, str], MethodSlot] = {}
 
     @property
     def object_resolver(self) -> ProtoObjectResolver:
@@ -115,76 +250,156 @@ class GRPCServerConfigurer:
     def response_processor(self, mock_processor: ResponseProcessor):
         self._response_processor = mock_processor
 
+    def _generate_method_processor(
+        self, service_data: ServiceData, method_data: MethodData,
+    ) -> Callable | None:
+        method_func = self._response_processor.generate_method_processor(
+            service_data,
+            method_data,
+        )
+        if method_func is None:
+            logger.warning(
+                f"Error creating method '{method_data.name}' in service "
+                f"'{service_data.full_name}'"
+            )
+        return method_func
+
+    def _create_rpc_method_handler(
+        self, service_data: ServiceData, method_data: MethodData,
+    ) -> RpcMethodHandler:
+        method_func = self._generate_method_processor(
+            service_data, method_data,
+        )
+
+        in_data = self.object_resolver.summarized_structure.messages[
+            method_data.input_message.name
+        ]
+        out_data = self.object_resolver.summarized_structure.messages[
+            method_data.output_message.name
+        ]
+        in_type = self.object_resolver.get_message_type(in_data)
+        out_type = self.object_resolver.get_message_type(out_data)
+        if method_data.input_message.streaming:
+            if method_data.output_message.streaming:
+                handler_creator = grpc.stream_stream_rpc_method_handler
+            else:
+                handler_creator = grpc.stream_unary_rpc_method_handler
+        else:
+            if method_data.output_message.streaming:
+                handler_creator = grpc.unary_stream_rpc_method_handler
+            else:
+                handler_creator = grpc.unary_unary_rpc_method_handler
+
+        response_serializer = out_type.SerializeToString
+        if self._reloadable:
+            slot = MethodSlot(method_func)
+            self._method_slots[
+                (service_data.full_name, method_data.name)
+            ] = slot
+            method_func = create_slot_handler(
+                slot, method_data.output_message.streaming,
+            )
+            response_serializer = serialize_response
+        elif self._response_processor.is_static_method(
+            service_data, method_data,
+        ):
+            response_serializer = get_serialized_response
+
+        return handler_creator(
+            method_func,
+            request_deserializer=in_type.FromString,
+            response_serializer=response_serializer,
+        )
+
     def _create_rpc_method_handlers(
         self, service_data: ServiceData,
     ) -> dict[str, RpcMethodHandler]:
-        rpc_method_handlers = {}
-        for method_data in service_data.methods.values():
-            method_func = self._response_processor.generate_method_processor(
-                service_data,
-                method_data,
+        return {
+            method_data.name: self._create_rpc_method_handler(
+                service_data, method_data,
             )
-            if method_func is None:
-                logger.warning(
-                    f"Error creating method '{method_data.name}' in service "
-                    f"'{service_data.full_name}'"
+            for method_data in service_data.methods.values()
+        }
+
+    def reload_handlers(self, server_config: ServerConfig) -> int:
+        previous_config = self._server_config
+        self._server_config = server_config
+        self._response_processor.server_config = server_config
+        check_methods(self._obj_resolver.summarized_structure, server_config)
+
+        reloaded = 0
+        services = self._obj_resolver.summarized_structure.services
+        for service_data in services.values():
+            for method_data in service_data.methods.values():
+                key = (service_data.full_name, method_data.name)
+                slot = self._method_slots.get(key)
+                if slot is None or get_method_mock_config(
+                    previous_config, *key
+                ) == get_method_mock_config(server_config, *key):
+                    continue
+                slot.function = self._generate_method_processor(
+                    service_data, method_data,
                 )
+                reloaded += 1
+        return reloaded
 
-            in_data = self.object_resolver.summarized_structure.messages[
-                method_data.input_message.name
-            ]
-            out_data = self.object_resolver.summarized_structure.messages[
-                method_data.output_message.name
-            ]
-            in_type = self.object_resolver.get_message_type(in_data)
-            out_type = self.object_resolver.get_message_type(out_data)
-            if method_data.input_message.streaming:
-                if method_data.output_message.streaming:
-                    handler_creator = grpc.stream_stream_rpc_method_handler
-                else:
-                    handler_creator = grpc.stream_unary_rpc_method_handler
-            else:
-                if method_data.output_message.streaming:
-                    handler_creator = grpc.unary_stream_rpc_method_handler
-                else:
-                    handler_creator = grpc.unary_unary_rpc_method_handler
-
-            rpc_method_handlers[
-                method_data.name
-            ] = handler_creator(
-                method_func,
-                request_deserializer=in_type.FromString,
-                response_serializer=out_type.SerializeToString,
-            )
-        return rpc_method_handlers
+    def prepare_handlers(self):
+        services = self._obj_resolver.summarized_structure.services
+        mocked_services = get_mocked_services(self._server_config)
+        self._services_handlers = {}
+        self._lazy_services = {}
+        for service_name, service_data in services.items():
+            if service_name in mocked_services:
+                self._services_handlers[
+                    service_name
+                ] = self._create_rpc_method_handlers(service_data)
+            elif not self._server_config.mocked_services_only:
+                self._lazy_services[service_name] = service_data
+        logger.debug(
+            f"Handlers of {len(self._services_handlers)} mocked service/s "
+            f"prepared for server '{self._server_config.alias}', "
+            f"{len(self._lazy_services)} service/s are handled on first call"
+        )
 
     def build_server(
         self,
         config_file_dir: str,
         loop: asyncio.AbstractEventLoop | None = None,
+        reuse_port: bool = False,
     ) -> Server:
         check_methods(
             self.object_resolver.summarized_structure,
             self.server_config,
         )
 
-        resolver = self._obj_resolver
-        server = grpc.aio.server()
+        options_config = self.server_config.options
+        thread_pool = None
+        if options_config.thread_pool_size is not None:
+            thread_pool = ThreadPoolExecutor(options_config.thread_pool_size)
+        compression = None
+        if options_config.compression is not None:
+            compression = options_config.compression.to_grpc_value()
+        server = grpc.aio.server(
+            migration_thread_pool=thread_pool,
+            options=create_server_options(options_config, reuse_port),
+            maximum_concurrent_rpcs=options_config.max_concurrent_rpcs,
+            compression=compression,
+        )
 
         for socket_data in self.server_config.sockets:
             if socket_data.certificates is None:
                 server.add_insecure_port(socket_data.socket)
             else:
                 cert_config = socket_data.certificates
-                cert_data = read_file(get_relative_abs_path(
+                cert_data = read_file_bytes(get_relative_abs_path(
                     config_file_dir, cert_config.certificate,
                 ))
-                key_data = read_file(get_relative_abs_path(
-                    config_file_dir, cert_config.certificate,
+                key_data = read_file_bytes(get_relative_abs_path(
+                    config_file_dir, cert_config.key_file,
                 ))
                 root_cert_data = None
                 if cert_config.root_certificate is not None:
-                    root_cert_data = read_file(get_relative_abs_path(
+                    root_cert_data = read_file_bytes(get_relative_abs_path(
                         config_file_dir, cert_config.root_certificate,
                     ))
                 credentials = grpc.ssl_server_credentials(
@@ -194,19 +409,25 @@ class GRPCServerConfigurer:
                 )
                 server.add_secure_port(socket_data.socket, credentials)
 
-        for service_data in resolver.summarized_structure.services.values():
-            method_handlers = self._create_rpc_method_handlers(service_data)
+        if self._services_handlers is None:
+            self.prepare_handlers()
+        for service_name, method_handlers in self._services_handlers.items():
             services_handler = grpc.method_handlers_generic_handler(
-                service_data.full_name, method_handlers)
+                service_name, method_handlers)
             server.add_generic_rpc_handlers((services_handler,))
             server.add_registered_method_handlers(
-                service_data.full_name, method_handlers
+                service_name, method_handlers
             )
+        if self._lazy_services:
+            server.add_generic_rpc_handlers((LazyServicesHandler(
+                self._lazy_services, self._create_rpc_method_handler,
+            ),))
 
         if self.server_config.reflection_enabled:
             reflection_services = [
                 reflection.SERVICE_NAME,
-                *resolver.summarized_structure.services.keys(),
+                *self._services_handlers.keys(),
+                *self._lazy_services.keys(),
             ]
             reflection.enable_server_reflection(
                 reflection_services,
@@ -11,11 +11,15 @@ from grpc import StatusCode
 
 from config.model import GRPCErrorCode
 from protobuf.definitions import (
+    LazyDefinitions,
     ProtoFileStructure,
     MessageData,
     EnumData,
 )
 from protobuf.types import ProtoType
+from server.builders import (
+    EnumValues, MessageBuilder, MessageBuildersCompiler
+)
 
 logger = logging.getLogger(__name__)
 
@@ -59,18 +63,30 @@ class ProtoObjectResolver:
         self._summarized_structure = self._summarize_proto_structure()
 
         self._descriptor_pool = descriptor_pool
-        self._message_types = self._create_messages_types()
-        self._enum_types = self._create_enum_types()
+        self._message_types: dict[str, Type[Message]] = {}
+        self._enum_types: dict[str, EnumTypeWrapper] = {}
+        self._enum_values: dict[str, EnumValues] = {}
+        self._builders_compiler = MessageBuildersCompiler(
+            self._summarized_structure,
+            self._get_message_class,
+            self._get_enum_values,
+        )
 
     def _summarize_proto_structure(self) -> ProtoFileStructure | None:
         result = None
         for structure in self._structures.values():
             if result is None:
-                result = copy.deepcopy(structure)
+                if isinstance(structure.messages, LazyDefinitions):
+                    result = structure.model_copy(
+                        update={"services": dict(structure.services)}
+                    )
+                else:
+                    result = copy.deepcopy(structure)
             else:
                 result.services.update(structure.services)
-                result.messages.update(structure.messages)
-                result.enums.update(structure.enums)
+                if result.messages is not structure.messages:
+                    result.messages.update(structure.messages)
+                    result.enums.update(structure.enums)
         return result
 
     @property
@@ -85,30 +101,50 @@ class ProtoObjectResolver:
     def structures(self) -> dict[str, ProtoFileStructure]:
         return self._structures
 
-    def _create_messages_types(self) -> dict[str, Type[Message]]:
-        result = {}
-        for message_data in self.summarized_structure.messages.values():
-            key = message_data.full_name
-            result[key] = GetMessageClass(
-                self._descriptor_pool.FindMessageTypeByName(key)
+    def _get_message_class(self, full_name: str) -> Type[Message]:
+        message_type = self._message_types.get(full_name)
+        if message_type is None:
+            message_type = GetMessageClass(
+                self._descriptor_pool.FindMessageTypeByName(full_name)
             )
-        return result
+            self._message_types[full_name] = message_type
+        return message_type
 
-    def _create_enum_types(self) -> dict[str, EnumTypeWrapper]:
-        result = {}
-        for enum_data in self.summarized_structure.enums.values():
-            key = enum_data.full_name
-            result[key] = EnumTypeWrapper(
-                self._descriptor_pool.FindEnumTypeByName(key)
+    def _get_enum_type(self, full_name: str) -> EnumTypeWrapper:
+        enum_type = self._enum_types.get(full_name)
+        if enum_type is None:
+            enum_type = EnumTypeWrapper(
+                self._descriptor_pool.FindEnumTypeByName(full_name)
             )
-        return result
+            self._enum_types[full_name] = enum_type
+        return enum_type
+
+    def _get_enum_values(self, full_name: str) -> EnumValues:
+        enum_values = self._enum_values.get(full_name)
+        if enum_values is None:
+            enum_values = EnumValues(self._get_enum_type(full_name))
+            self._enum_values[full_name] = enum_values
+        return enum_values
 
     def get_descriptor_pool(self) -> DescriptorPool:
         return self._descriptor_pool
 
     def get_enum_type(self, enum_data: EnumData) -> EnumTypeWrapper:
-        enum_type = self._enum_types.get(enum_data.full_name)
-        if enum_type is None:
+        try:
+            return self._get_enum_type(enum_data.full_name)
+        except KeyError:
+            message = (
+                f"Error processing enum type '{enum_data.full_name}': "
+                f"object descriptor not found"
+            )
+
+            logger.error(message)
+            raise KeyError(message)
+
+    def get_enum_values(self, enum_data: EnumData) -> EnumValues:
+        try:
+            return self._get_enum_values(enum_data.full_name)
+        except KeyError:
             message = (
                 f"Error processing enum type '{enum_data.full_name}': "
                 f"object descriptor not found"
@@ -116,11 +152,11 @@ class ProtoObjectResolver:
 
             logger.error(message)
             raise KeyError(message)
-        return enum_type
 
     def get_message_type(self, message_data: MessageData) -> Type[Message]:
-        descriptor = self._message_types.get(message_data.full_name)
-        if descriptor is None:
+        try:
+            return self._get_message_class(message_data.full_name)
+        except KeyError:
             message = (
                 f"Error processing message type '{message_data.full_name}': "
                 f"object descriptor not found"
@@ -128,4 +164,15 @@ class ProtoObjectResolver:
 
             logger.error(message)
             raise KeyError(message)
-        return descriptor
+
+    def get_message_builder(self, message_name: str) -> MessageBuilder:
+        try:
+            return self._builders_compiler.get_builder(message_name)
+        except KeyError:
+            message = (
+                f"Error processing message type '{message_name}': "
+                f"message builder not found"
+            )
+
+            logger.error(message)
+            raise KeyError(message)
@@ -1,17 +1,17 @@
 import logging
 from asyncio import sleep
-from typing import Callable, AsyncIterator
+from typing import Callable, AsyncIterator, Iterator
 
-from google.protobuf.json_format import MessageToDict
 from grpc import StatusCode
 from grpc._cython.cygrpc import AbortError
 from grpc.aio import ServicerContext
 
-from config.model import ServerConfig, ResponseMockConfig
+from config.model import ServerConfig, ResponseMockConfig, ProxyConfig
 from protobuf.definitions import ServiceData, MethodData
 from server.helpers import ProtoObjectResolver
 from server.processors.base import ProcessingMeta
 from server.processors.logs import APILogProcessor
+from server.processors.metrics import MetricsProcessor
 from server.processors.proxy import ProxyProcessor
 from server.processors.templates import TemplateProcessor
 from utils import get_exception_error
@@ -28,12 +28,53 @@ class ResponseProcessor:
         template_processor: TemplateProcessor,
         log_processor: APILogProcessor,
         proxy_processor: ProxyProcessor,
+        metrics_processor: MetricsProcessor,
     ):
         self._object_resolver = object_resolver
         self._server_config = server_config
         self._log_processor = log_processor
         self._proxy_processor = proxy_processor
         self._template_processor = template_processor
+        self._metrics_processor = metrics_processor
+        self._static_methods: set[tuple[str, str]] = set()
+
+    @property
+    def server_config(self) -> ServerConfig:
+        return self._server_config
+
+    @server_config.setter
+    def server_config(self, server_config: ServerConfig):
+        self._server_config = server_config
+
+    def is_static_method(
+        self, service_data: ServiceData, method_data: MethodData,
+    ) -> bool:
+        return (
+            service_data.full_name, method_data.name
+        ) in self._static_methods
+
+    def _create_static_responses(
+        self, meta: ProcessingMeta,
+    ) -> list[tuple[dict, bytes]]:
+        messages = meta.mock_data.messages.root
+        if meta.method_data.output_message.streaming:
+            if not isinstance(messages, list):
+                messages = [messages]
+        elif isinstance(messages, list):
+            if len(messages) > 0:
+                messages = [messages[0]]
+            else:
+                messages = [messages]
+        else:
+            messages = [messages]
+
+        result = []
+        for message in messages:
+            response_dict, response = mocks.get_service_message(
+                meta, meta.method_data.output_message.name, message,
+            )
+            result.append((response_dict, response.SerializeToString()))
+        return result
 
     def generate_method_processor(
         self,
@@ -45,6 +86,7 @@ class ResponseProcessor:
         else:
             mock_config = ResponseMockConfig(messages={})
         service_key = service_data.full_name
+        self._static_methods.discard((service_key, method_data.name))
 
         if self._server_config.mocks is not None:
             retrieved = self._server_config.mocks.root.get(
@@ -53,8 +95,11 @@ class ResponseProcessor:
             if retrieved is not None:
                 mock_config = retrieved
 
+        self._template_processor.compile_mock_config(mock_config)
+
         mock_data_func = self._template_processor.create_mock_data
         message_func = mocks.get_service_message
+        message_dict_func = mocks.get_message_dict
         metadata_func = mocks.set_trailing_metadata
         error_function = mocks.set_error_data
         log_in_message_func = self._log_processor.log_req_message
@@ -63,8 +108,19 @@ class ResponseProcessor:
         log_trailers_func = self._log_processor.log_res_trailing_meta
         log_error_func = self._log_processor.log_res_error
         get_proxy = self._proxy_processor.get_proxy_function
+        delay_func = sleep
+        method_metrics = self._metrics_processor.get_method_metrics(
+            service_data, method_data,
+        )
+        if method_metrics is not None:
+            mock_data_func = method_metrics.measure_rendering(mock_data_func)
+            message_func = method_metrics.measure_building(message_func)
+            delay_func = method_metrics.measure_delay(delay_func)
+            get_proxy = method_metrics.measure_proxying(
+                get_proxy, method_data.output_message.streaming,
+            )
 
-        meta = ProcessingMeta(
+        method_meta = ProcessingMeta(
             object_resolver=self._object_resolver,
             server_config=self._server_config,
             service_data=service_data,
@@ -72,59 +128,164 @@ class ResponseProcessor:
             mock_config=mock_config,
         )
 
+        proxy_config = None
+        static_socket = False
+        if isinstance(mock_config, ResponseMockConfig) and isinstance(
+            mock_config.proxy, ProxyConfig
+        ):
+            proxy_config = mock_config.proxy
+            static_socket = self._template_processor.templates.is_static(
+                proxy_config.socket
+            )
+        self._proxy_processor.register_channels(
+            service_key, method_data.name, proxy_config, static_socket,
+        )
+
+        static_responses = None
+        static_mock = self._template_processor.create_static_mock_data(
+            mock_config
+        )
+        if static_mock is not None:
+            method_meta.mock_data = static_mock
+            static_responses = self._create_static_responses(method_meta)
+            self._static_methods.add((service_key, method_data.name))
+            logger.debug(
+                f"Static responses prepared for method '{method_data.name}' "
+                f"in service '{service_key}'"
+            )
+
+        log_enabled = self._log_processor.is_enabled(
+            service_data, method_data,
+        )
+        request_dicts_required = log_enabled or (
+            static_responses is None and
+            self._template_processor.is_requests_used(mock_config)
+        )
+        in_name = method_data.input_message.name
+        out_name = method_data.output_message.name
+
+        requests_streaming = False
+        requests_forwarding = False
+        if isinstance(mock_config, ResponseMockConfig):
+            requests_streaming = (
+                mock_config.requests_streaming and
+                method_data.input_message.streaming
+            )
+            requests_forwarding = (
+                requests_streaming and mock_config.proxy is not None
+            )
+
+        async def iterate_requests(
+            input_data: AsyncIterator,
+        ) -> AsyncIterator[tuple[object, dict | None]]:
+            async for request in input_data:
+                request_dict = None
+                if request_dicts_required:
+                    request_dict = message_dict_func(
+                        method_meta, in_name, request
+                    )
+                    log_in_message_func(request_dict, method_meta)
+                yield request, request_dict
+
+        async def forward_requests(
+            input_data: AsyncIterator,
+        ) -> AsyncIterator[object]:
+            async for request, _ in iterate_requests(input_data):
+                yield request
+
+        async def create_request_meta(
+            request_dicts: list[dict], context: ServicerContext
+        ) -> ProcessingMeta:
+            meta = method_meta
+            if static_responses is None:
+                meta = meta.with_mock_data(await mock_data_func(
+                    request_dicts, context, meta
+                ))
+            seconds_delay = meta.mock_data.seconds_delay
+            if seconds_delay is not None:
+                logger.debug(f"'{seconds_delay}' seconds delay for request")
+                await delay_func(seconds_delay)
+            return meta
+
+        def create_mock_responses(
+            meta: ProcessingMeta,
+        ) -> Iterator[tuple[dict, object]]:
+            if static_responses is not None:
+                yield from static_responses
+            elif isinstance(meta.mock_data.messages.root, list):
+                for response_dict in meta.mock_data.messages.root:
+                    yield message_func(meta, out_name, response_dict)
+            else:
+                yield message_func(
+                    meta, out_name, meta.mock_data.messages.root
+                )
+
         async def process_request(
             input_data: object, context: ServicerContext
-        ) -> tuple[list[dict], list[object]]:
+        ) -> tuple[
+            list[dict], list[object] | AsyncIterator[object], ProcessingMeta
+        ]:
             request_dicts, requests = [], []
-            log_initial_meta_func(context, meta)
-            if isinstance(input_data, AsyncIterator):
-                async for request in input_data:
-                    request_dict = message_func(
-                        meta,
-                        meta.method_data.input_message.name,
-                        MessageToDict(request),
-                    )[0]
-                    log_in_message_func(request_dict, meta)
+            log_initial_meta_func(context, method_meta)
+            if requests_forwarding:
+                requests = forward_requests(input_data)
+            elif isinstance(input_data, AsyncIterator):
+                async for request, request_dict in iterate_requests(
+                    input_data
+                ):
+                    if requests_streaming:
+                        requests.clear()
+                        request_dicts.clear()
                     requests.append(request)
-                    request_dicts.append(request_dict)
+                    if request_dict is not None:
+                        request_dicts.append(request_dict)
             else:
-                request_dict = message_func(
-                    meta,
-                    meta.method_data.input_message.name,
-                    MessageToDict(input_data),
-                )[0]
-                log_in_message_func(request_dict, meta)
+                if request_dicts_required:
+                    request_dict = message_dict_func(
+                        method_meta, in_name, input_data
+                    )
+                    log_in_message_func(request_dict, method_meta)
+                    request_dicts.append(request_dict)
                 requests.append(input_data)
-                request_dicts.append(request_dict)
-
-            await mock_data_func(request_dicts, context, meta)
-            seconds_delay = meta.mock_data.seconds_delay
-            if seconds_delay is not None:
-                logger.debug(f"'{seconds_delay}' seconds delay for request")
-                await sleep(seconds_delay)
 
-            return request_dicts, requests
+            meta = await create_request_meta(request_dicts, context)
+            return request_dicts, requests, meta
 
         async def process_unary_response(
             input: object, context: ServicerContext
         ) -> object:
+            meta = method_meta
+            started = None
+            if method_metrics is not None:
+                started = method_metrics.start()
             try:
-                request_dicts, requests = await process_request(input, context)
-                proxy_func = get_proxy(meta)
-                if proxy_func:
-                    response_dict = await proxy_func(requests, context, meta)
-                else:
-                    response_dict = meta.mock_data.messages.root
-                    if isinstance(meta.mock_data.messages.root, list):
-                        if len(meta.mock_data.messages.root) > 0:
-                            response_dict = meta.mock_data.messages.root[0]
-                metadata_func(context, meta)
-                await error_function(context, meta)
-                response_dict, response = message_func(
-                    meta,
-                    meta.method_data.output_message.name,
-                    response_dict,
+                request_dicts, requests, meta = await process_request(
+                    input, context
                 )
+                if static_responses is not None:
+                    metadata_func(context, meta)
+                    response_dict, response = static_responses[0]
+                else:
+                    proxy_func = get_proxy(meta)
+                    response = None
+                    if proxy_func:
+                        response_dict = None
+                        response = await proxy_func(requests, context, meta)
+                    else:
+                        response_dict = meta.mock_data.messages.root
+                        if isinstance(response_dict, list):
+                            if len(response_dict) > 0:
+                                response_dict = response_dict[0]
+                    metadata_func(context, meta)
+                    await error_function(context, meta)
+                    if response is None:
+                        response_dict, response = message_func(
+                            meta, out_name, response_dict,
+                        )
+                    elif log_enabled:
+                        response_dict = message_dict_func(
+                            meta, out_name, response
+                        )
                 log_trailers_func(context, meta)
                 log_out_message_func(response_dict, context, meta)
                 return response
@@ -142,41 +303,38 @@ class ResponseProcessor:
                 finally:
                     log_trailers_func(context, meta)
                     log_error_func(context, meta)
+            finally:
+                if started is not None:
+                    method_metrics.finish(context, started)
 
         async def process_stream_response(
             input: object, context: ServicerContext
         ) -> object:
+            meta = method_meta
+            started = None
+            if method_metrics is not None:
+                started = method_metrics.start()
             try:
-                request_dicts, requests = await process_request(input, context)
+                request_dicts, requests, meta = await process_request(
+                    input, context
+                )
                 proxy_func = get_proxy(meta)
                 await error_function(context, meta)
                 if proxy_func:
-                    async for response_dict in proxy_func(
+                    async for response in proxy_func(
                         requests, context, meta
                     ):
-                        response_dict, response = message_func(
-                            meta,
-                            meta.method_data.output_message.name,
-                            response_dict,
-                        )
+                        response_dict = None
+                        if log_enabled:
+                            response_dict = message_dict_func(
+                                meta, out_name, response
+                            )
                         log_out_message_func(response_dict, context, meta)
                         yield response
                 else:
-                    if isinstance(meta.mock_data.messages.root, list):
-                        for response_dict in meta.mock_data.messages.root:
-                            response_dict, response = message_func(
-                                meta,
-                                meta.method_data.output_message.name,
-                                response_dict,
-                            )
-                            log_out_message_func(response_dict, context, meta)
-                            yield response
-                    else:
-                        response_dict, response = message_func(
-                            meta,
-                            meta.method_data.output_message.name,
-                            meta.mock_data.messages.root,
-                        )
+                    for response_dict, response in create_mock_responses(
+                        meta
+                    ):
                         log_out_message_func(response_dict, context, meta)
                         yield response
                 await error_function(context, meta)
@@ -194,13 +352,67 @@ class ResponseProcessor:
                 finally:
                     log_trailers_func(context, meta)
                     log_error_func(context, meta)
+            finally:
+                if started is not None:
+                    method_metrics.finish(context, started)
+
+            log_trailers_func(context, meta)
+
+        async def process_interleaved_response(
+            input: object, context: ServicerContext
+        ) -> object:
+            meta = method_meta
+            started = None
+            if method_metrics is not None:
+                started = method_metrics.start()
+            try:
+                log_initial_meta_func(context, meta)
+                async for request, request_dict in iterate_requests(input):
+                    request_dicts = []
+                    if request_dict is not None:
+                        request_dicts.append(request_dict)
+                    meta = await create_request_meta(request_dicts, context)
+                    await error_function(context, meta)
+                    for response_dict, response in create_mock_responses(
+                        meta
+                    ):
+                        log_out_message_func(response_dict, context, meta)
+                        yield response
+                metadata_func(context, meta)
+            except AbortError:
+                log_trailers_func(context, meta)
+                log_error_func(context, meta)
+                raise
+            except Exception as e:
+                code = StatusCode.UNKNOWN
+                message = "Mock API server internal error"
+                logger.error(get_exception_error(e))
+                try:
+                    await context.abort(code, message)
+                finally:
+                    log_trailers_func(context, meta)
+                    log_error_func(context, meta)
+            finally:
+                if started is not None:
+                    method_metrics.finish(context, started)
 
             log_trailers_func(context, meta)
 
         if method_data.output_message.streaming:
+            if requests_streaming and not requests_forwarding:
+                return process_interleaved_response
             return process_stream_response
         else:
             return process_unary_response
 
+    async def prepare_resources(self):
+        await self._proxy_processor.warm_up_channels()
+
     async def clean_resources(self):
+        templates = self._template_processor.templates
+        logger.debug(
+            f"Templates cache for server '{self._server_config.alias}': "
+            f"{len(templates)} templates, {templates.hits} hits, "
+            f"{templates.misses} misses"
+        )
         await self._proxy_processor.close_channels()
@@ -1,79 +1,163 @@
-from typing import Any
+from typing import Annotated, Any, TypedDict
 
 from grpc import StatusCode, ServicerContext
-from pydantic import BaseModel, ConfigDict, Field, RootModel
+from pydantic import Field, TypeAdapter
 
 from config.model import (
-    ServerConfig, ResponseMockConfig, MetadataKey, MetadataValue, GRPCErrorCode
+    ServerConfig,
+    ResponseMockConfig,
+    MetadataKey,
+    MetadataValue,
+    GRPCErrorCode,
+    PositiveFloat,
+    PositiveInt,
 )
 from protobuf.definitions import ServiceData, MethodData
 from server.helpers import ProtoObjectResolver
+import constants as c
 
+MessagesData = dict[str, Any] | list[dict[str, Any]]
+MetadataData = dict[MetadataKey, MetadataValue]
 
-class MessageMock(RootModel):
-    root: dict[str, Any] | list[dict[str, Any]] = {}
 
+class ErrorData(TypedDict, total=False):
+    code: GRPCErrorCode | str
+    details: str
 
-class MetadataMock(RootModel):
-    root: dict[MetadataKey, MetadataValue] = {}
 
+class ProxyData(TypedDict, total=False):
+    socket: str
+    seconds_timeout: Annotated[float, Field(ge=0)] | None
+    queue_size: PositiveInt
 
-class ErrorMock(BaseModel):
-    code: GRPCErrorCode | str = Field(
-        StatusCode.UNKNOWN.value[0],
-        description="Error response status code"
-    )
-    details: str = Field(
-        "",
-        description="Error response message"
-    )
 
+class ResponseData(TypedDict, total=False):
+    messages: MessagesData
+    trailing_meta: MetadataData
+    error: ErrorData | None
+    seconds_delay: PositiveFloat | None
+    proxy: ProxyData | None
 
-class ProxyMock(BaseModel):
-    socket: str = Field(
-        None,
-        description="gRPC server socket for proxying requests"
-    )
-    seconds_timeout: float | None = Field(
-        None,
-        description="gRPC server proxying timeout",
-        ge=0,
-    )
 
+MESSAGES_VALIDATOR = TypeAdapter(MessagesData)
+METADATA_VALIDATOR = TypeAdapter(MetadataData)
+RESPONSE_VALIDATOR = TypeAdapter(ResponseData)
+
+
+class MessageMock:
+    __slots__ = ("root",)
+
+    def __init__(self, root: MessagesData | None = None):
+        if root is None:
+            root = {}
+        self.root = root
 
-class ResponseMock(BaseModel):
-    messages: MessageMock = Field(
-        MessageMock(),
-        description="Response message value",
-    )
-    trailing_meta: MetadataMock = Field(
-        MetadataMock(),
-        description="Initial response metadata values",
-    )
-    error: ErrorMock | None = Field(
-        None,
-        description="Error data for mocking errors",
-    )
-    seconds_delay: float | None = Field(
-        None,
-        description="Seconds delay for request processing",
-        gt=0,
-    )
-    proxy: ProxyMock | None = Field(
-        None,
-        description="Requests proxying configuration",
-    )
 
+class MetadataMock:
+    __slots__ = ("root",)
 
-class ProcessingMeta(BaseModel):
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+    def __init__(self, root: MetadataData | None = None):
+        if root is None:
+            root = {}
+        self.root = root
+
+
+class ErrorMock:
+    __slots__ = ("code", "details")
+
+    def __init__(
+        self,
+        code: int | str = StatusCode.UNKNOWN.value[0],
+        details: str = "",
+    ):
+        self.code = code
+        self.details = details
+
+
+class ProxyMock:
+    __slots__ = ("socket", "seconds_timeout", "queue_size")
+
+    def __init__(
+        self,
+        socket: str | None = None,
+        seconds_timeout: float | None = None,
+        queue_size: int = c.PROXY_DEFAULT_QUEUE_SIZE,
+    ):
+        self.socket = socket
+        self.seconds_timeout = seconds_timeout
+        self.queue_size = queue_size
+
+
+class ResponseMock:
+    __slots__ = (
+        "messages", "trailing_meta", "error", "seconds_delay", "proxy",
+    )
+
+    def __init__(
+        self,
+        messages: MessageMock | None = None,
+        trailing_meta: MetadataMock | None = None,
+        error: ErrorMock | None = None,
+        seconds_delay: float | None = None,
+        proxy: ProxyMock | None = None,
+    ):
+        if messages is None:
+            messages = MessageMock()
+        if trailing_meta is None:
+            trailing_meta = MetadataMock()
+        self.messages = messages
+        self.trailing_meta = trailing_meta
+        self.error = error
+        self.seconds_delay = seconds_delay
+        self.proxy = proxy
+
+    @classmethod
+    def from_data(cls, data: ResponseData) -> "ResponseMock":
+        error = data.get("error")
+        proxy = data.get("proxy")
+        return cls(
+            MessageMock(data.get("messages")),
+            MetadataMock(data.get("trailing_meta")),
+            None if error is None else ErrorMock(**error),
+            data.get("seconds_delay"),
+            None if proxy is None else ProxyMock(**proxy),
+        )
+
+
+EMPTY_RESPONSE_MOCK = ResponseMock()
+
+
+class ProcessingMeta:
+    __slots__ = (
+        "object_resolver", "server_config", "service_data", "method_data",
+        "mock_config", "mock_data",
+    )
 
-    object_resolver: ProtoObjectResolver
-    server_config: ServerConfig
-    service_data: ServiceData
-    method_data: MethodData
-    mock_config: ResponseMockConfig | str
-    mock_data: ResponseMock = ResponseMock()
+    def __init__(
+        self,
+        object_resolver: ProtoObjectResolver,
+        server_config: ServerConfig,
+        service_data: ServiceData,
+        method_data: MethodData,
+        mock_config: ResponseMockConfig | str,
+        mock_data: ResponseMock = EMPTY_RESPONSE_MOCK,
+    ):
+        self.object_resolver = object_resolver
+        self.server_config = server_config
+        self.service_data = service_data
+        self.method_data = method_data
+        self.mock_config = mock_config
+        self.mock_data = mock_data
+
+    def with_mock_data(self, mock_data: ResponseMock) -> "ProcessingMeta":
+        return ProcessingMeta(
+            self.object_resolver,
+            self.server_config,
+            self.service_data,
+            self.method_data,
+            self.mock_config,
+            mock_data,
+        )
 
 
 def extract_invocation_metadata(context: ServicerContext) -> dict:
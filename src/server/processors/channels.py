@@ -0,0 +1,164 @@
+import asyncio
+import logging
+from itertools import cycle
+from typing import Any
+
+import grpc
+from grpc import ChannelCredentials
+from grpc.aio import Channel
+
+from config.model import ChannelsBalancing, ProxyConfig
+from utils import get_exception_error, get_relative_abs_path, read_file_bytes
+
+logger = logging.getLogger(__name__)
+
+
+class ProxyChannel:
+    __slots__ = ("channel", "in_flight", "methods")
+
+    def __init__(self, channel: Channel):
+        self.channel = channel
+        self.in_flight = 0
+        self.methods: dict[str, Any] = {}
+
+    def release(self):
+        self.in_flight -= 1
+
+
+class ChannelsPool:
+    def __init__(
+        self,
+        socket: str,
+        channels: list[Channel],
+        balancing: ChannelsBalancing,
+    ):
+        self._socket = socket
+        self._channels = [ProxyChannel(channel) for channel in channels]
+        self._balancing = balancing
+        self._channels_cycle = cycle(self._channels)
+
+    @property
+    def socket(self) -> str:
+        return self._socket
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def acquire(self) -> ProxyChannel:
+        if len(self._channels) == 1:
+            channel = self._channels[0]
+        elif self._balancing == ChannelsBalancing.LEAST_IN_FLIGHT:
+            channel = min(self._channels, key=lambda item: item.in_flight)
+        else:
+            channel = next(self._channels_cycle)
+        channel.in_flight += 1
+        return channel
+
+    async def wait_ready(self, seconds_timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*[
+                    item.channel.channel_ready() for item in self._channels
+                ]),
+                seconds_timeout,
+            )
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self, seconds_grace: float | None = None):
+        await asyncio.gather(
+            *[item.channel.close(seconds_grace) for item in self._channels]
+        )
+
+
+def create_channel_options(proxy_config: ProxyConfig) -> list[tuple]:
+    options = []
+    if proxy_config.keepalive_seconds is not None:
+        options.append((
+            "grpc.keepalive_time_ms",
+            int(proxy_config.keepalive_seconds * 1000),
+        ))
+        options.append(("grpc.keepalive_permit_without_calls", 1))
+    if proxy_config.keepalive_timeout_seconds is not None:
+        options.append((
+            "grpc.keepalive_timeout_ms",
+            int(proxy_config.keepalive_timeout_seconds * 1000),
+        ))
+    if proxy_config.max_message_size is not None:
+        options.append((
+            "grpc.max_send_message_length", proxy_config.max_message_size
+        ))
+        options.append((
+            "grpc.max_receive_message_length", proxy_config.max_message_size
+        ))
+    if proxy_config.channels > 1:
+        options.append(("grpc.use_local_subchannel_pool", 1))
+    return options
+
+
+def create_channel_credentials(
+    proxy_config: ProxyConfig, config_file_dir: str,
+) -> ChannelCredentials | None:
+    cert_config = proxy_config.certificates
+    if cert_config is None:
+        return None
+
+    root_cert_data = None
+    if cert_config.root_certificate is not None:
+        root_cert_data = read_file_bytes(get_relative_abs_path(
+            config_file_dir, cert_config.root_certificate,
+        ))
+    cert_data = None
+    key_data = None
+    if cert_config.certificate is not None:
+        cert_data = read_file_bytes(get_relative_abs_path(
+            config_file_dir, cert_config.certificate,
+        ))
+        key_data = read_file_bytes(get_relative_abs_path(
+            config_file_dir, cert_config.key_file,
+        ))
+    return grpc.ssl_channel_credentials(root_cert_data, key_data, cert_data)
+
+
+def create_channels_pool(
+    socket: str, proxy_config: ProxyConfig, config_file_dir: str,
+) -> ChannelsPool:
+    options = create_channel_options(proxy_config)
+    credentials = create_channel_credentials(proxy_config, config_file_dir)
+    compression = None
+    if proxy_config.compression is not None:
+        compression = proxy_config.compression.to_grpc_value()
+
+    channels = []
+    for _ in range(proxy_config.channels):
+        if credentials is None:
+            channel = grpc.aio.insecure_channel(
+                socket, options=options, compression=compression,
+            )
+        else:
+            channel = grpc.aio.secure_channel(
+                socket, credentials, options=options, compression=compression,
+            )
+        channels.append(channel)
+
+    logger.debug(
+        f"Created {len(channels)} proxy channel/s for socket '{socket}'"
+    )
+    return ChannelsPool(socket, channels, proxy_config.balancing)
+
+
+async def warm_up_pool(pool: ChannelsPool, seconds_timeout: float):
+    try:
+        if await pool.wait_ready(seconds_timeout):
+            logger.debug(f"Proxy channels for '{pool.socket}' are ready")
+        else:
+            logger.warning(
+                f"Proxy channels for '{pool.socket}' were not connected in "
+                f"{seconds_timeout} seconds"
+            )
+    except Exception as e:
+        logger.warning(
+            f"Proxy channels for '{pool.socket}' warming up error. "
+            f"{get_exception_error(e)}"
+        )
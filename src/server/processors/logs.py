@@ -1,5 +1,4 @@
-import json
-from logging import Logger, getLogger
+from logging import INFO, Logger, getLogger
 
 from grpc import StatusCode
 from grpc.aio import ServicerContext
@@ -7,6 +6,7 @@ from grpc.aio import ServicerContext
 from logs import (
     get_logger_name, REQUESTS_MOCK_LOG_PREFIX, configure_logger, LoggerConfig
 )
+from logs.formatters import JsonMessage
 from protobuf.definitions import ServiceData, MethodData
 from server.processors.base import ProcessingMeta, extract_invocation_metadata
 
@@ -31,6 +31,15 @@ class APILogProcessor:
             self._loggers[logger_name] = logger_obj
         return logger_obj
 
+    def is_enabled(
+        self,
+        service_data: ServiceData,
+        method_data: MethodData,
+    ) -> bool:
+        return self.get_requests_logger(
+            service_data, method_data
+        ).isEnabledFor(INFO)
+
     def log_req_message(
         self,
         request_dict: dict,
@@ -39,11 +48,13 @@ class APILogProcessor:
         api_logger = self.get_requests_logger(
             meta.service_data, meta.method_data
         )
+        if not api_logger.isEnabledFor(INFO):
+            return
 
         extra = {
             "service": meta.service_data.full_name,
             "method": meta.method_data.name,
-            "request_message": json.dumps(request_dict),
+            "request_message": JsonMessage(request_dict),
             "alias": meta.server_config.alias,
         }
 
@@ -57,6 +68,8 @@ class APILogProcessor:
         api_logger = self.get_requests_logger(
             meta.service_data, meta.method_data
         )
+        if not api_logger.isEnabledFor(INFO):
+            return
 
         metadata_dict = extract_invocation_metadata(context)
         if metadata_dict:
@@ -80,6 +93,8 @@ class APILogProcessor:
         api_logger = self.get_requests_logger(
             meta.service_data, meta.method_data
         )
+        if not api_logger.isEnabledFor(INFO):
+            return
 
         extra = {
             "service": meta.service_data.full_name,
@@ -88,7 +103,7 @@ class APILogProcessor:
         }
 
         if response_dict is not None:
-            extra["response_message"] = json.dumps(response_dict)
+            extra["response_message"] = JsonMessage(response_dict)
         error_details = context.details()
         if error_details:
             extra["error_details"] = error_details
@@ -122,6 +137,8 @@ class APILogProcessor:
         api_logger = self.get_requests_logger(
             meta.service_data, meta.method_data,
         )
+        if not api_logger.isEnabledFor(INFO):
+            return
 
         extra = {
             "service": meta.service_data.full_name,
@@ -147,6 +164,8 @@ class APILogProcessor:
         api_logger = self.get_requests_logger(
             meta.service_data, meta.method_data
         )
+        if not api_logger.isEnabledFor(INFO):
+            return
 
         metadata_dict = {}
         metadata = context.trailing_metadata()
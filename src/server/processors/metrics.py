@@ -0,0 +1,174 @@
+from asyncio import CancelledError
+import sys
+from time import perf_counter
+from typing import AsyncIterator, Callable
+
+from grpc import StatusCode
+from grpc.aio import ServicerContext
+
+from metrics import MetricsRegistry
+from protobuf.definitions import ServiceData, MethodData
+import constants as c
+
+METHOD_LABELS = ("server", "service", "method")
+
+
+class MethodMetrics:
+    __slots__ = (
+        "_labels", "_errors", "_requests", "_in_flight", "_proxied",
+        "_duration", "_rendering", "_building", "_delay", "_upstream",
+    )
+
+    def __init__(self, registry: MetricsRegistry, labels: tuple[str, ...]):
+        prefix = c.METRICS_PREFIX
+        self._labels = labels
+        self._errors = registry.counter(
+            f"{prefix}_errors_total",
+            "Requests finished with error status codes",
+            METHOD_LABELS + ("code",),
+        )
+        self._requests = registry.counter(
+            f"{prefix}_requests_total", "Received requests", METHOD_LABELS,
+        ).labels(*labels)
+        self._in_flight = registry.gauge(
+            f"{prefix}_requests_in_flight",
+            "Requests in processing",
+            METHOD_LABELS,
+        ).labels(*labels)
+        self._proxied = registry.counter(
+            f"{prefix}_proxied_requests_total",
+            "Requests proxied to upstream servers",
+            METHOD_LABELS,
+        ).labels(*labels)
+        self._duration = registry.histogram(
+            f"{prefix}_request_duration_seconds",
+            "Requests processing time",
+            METHOD_LABELS,
+        ).labels(*labels)
+        self._rendering = registry.histogram(
+            f"{prefix}_template_rendering_seconds",
+            "Mock templates rendering time",
+            METHOD_LABELS,
+        ).labels(*labels)
+        self._building = registry.histogram(
+            f"{prefix}_message_building_seconds",
+            "Response messages building time",
+            METHOD_LABELS,
+        ).labels(*labels)
+        self._delay = registry.histogram(
+            f"{prefix}_delay_seconds",
+            "Configured response delays time",
+            METHOD_LABELS,
+        ).labels(*labels)
+        self._upstream = registry.histogram(
+            f"{prefix}_proxy_upstream_seconds",
+            "Proxied requests upstream time",
+            METHOD_LABELS,
+        ).labels(*labels)
+
+    def start(self) -> float:
+        self._requests.inc()
+        self._in_flight.inc()
+        return perf_counter()
+
+    def finish(self, context: ServicerContext, started: float):
+        self._duration.observe(perf_counter() - started)
+        self._in_flight.dec()
+
+        code = context.code()
+        if code is None and isinstance(
+            sys.exception(), (CancelledError, GeneratorExit)
+        ):
+            code = StatusCode.CANCELLED
+        if code is not None and code is not StatusCode.OK:
+            self._errors.labels(*self._labels, code.name).inc()
+
+    def measure_rendering(self, function: Callable) -> Callable:
+        histogram = self._rendering
+
+        async def measured(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                histogram.observe(perf_counter() - started)
+
+        return measured
+
+    def measure_delay(self, function: Callable) -> Callable:
+        histogram = self._delay
+
+        async def measured(seconds: float):
+            started = perf_counter()
+            try:
+                await function(seconds)
+            finally:
+                histogram.observe(perf_counter() - started)
+
+        return measured
+
+    def measure_building(self, function: Callable) -> Callable:
+        histogram = self._building
+
+        def measured(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(perf_counter() - started)
+
+        return measured
+
+    def measure_proxying(
+        self, get_proxy: Callable, streaming: bool,
+    ) -> Callable:
+        histogram = self._upstream
+        proxied = self._proxied
+
+        async def measured_unary(proxy_func: Callable, *args):
+            proxied.inc()
+            started = perf_counter()
+            try:
+                return await proxy_func(*args)
+            finally:
+                histogram.observe(perf_counter() - started)
+
+        async def measured_stream(
+            proxy_func: Callable, *args
+        ) -> AsyncIterator:
+            proxied.inc()
+            started = perf_counter()
+            try:
+                async for response in proxy_func(*args):
+                    yield response
+            finally:
+                histogram.observe(perf_counter() - started)
+
+        measured = measured_stream if streaming else measured_unary
+
+        def get_measured_proxy(meta) -> Callable | None:
+            proxy_func = get_proxy(meta)
+            if proxy_func is None:
+                return None
+            return lambda *args: measured(proxy_func, *args)
+
+        return get_measured_proxy
+
+
+class MetricsProcessor:
+    def __init__(self, registry: MetricsRegistry | None, alias: str):
+        self._registry = registry
+        self._alias = alias
+
+    @property
+    def enabled(self) -> bool:
+        return self._registry is not None
+
+    def get_method_metrics(
+        self, service_data: ServiceData, method_data: MethodData,
+    ) -> MethodMetrics | None:
+        if self._registry is None:
+            return None
+        return MethodMetrics(self._registry, (
+            self._alias, service_data.full_name, method_data.name,
+        ))
@@ -1,91 +1,284 @@
 import asyncio
 import logging
-from typing import Callable
+from collections import OrderedDict
+from time import perf_counter
+from typing import AsyncIterator, Callable
 
-from google.protobuf.json_format import MessageToDict
-from grpc import ServicerContext
-from grpc.aio import AioRpcError, insecure_channel
+from google.protobuf.message import Message
+from grpc import ServicerContext, StatusCode
+from grpc.aio import AioRpcError, EOF, StreamStreamCall
 
+from config.model import ProxyConfig, ResponseMockConfig
+from recordings import CallRecording, Record, RecordsReplayer, RecordsWriter
 from server.processors import ProcessingMeta
+from server.processors.channels import (
+    ChannelsPool, ProxyChannel, create_channels_pool, warm_up_pool
+)
 from utils import get_exception_error
+import constants as c
 
 logger = logging.getLogger(__name__)
 
+QUEUE_END = object()
+
+
+async def read_requests(
+    call: StreamStreamCall, requests: AsyncIterator, queue: asyncio.Queue,
+):
+    try:
+        async for request in requests:
+            await queue.put(request)
+        await queue.put(QUEUE_END)
+    except BaseException:
+        call.cancel()
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(QUEUE_END)
+        raise
+
+
+async def write_requests(call: StreamStreamCall, queue: asyncio.Queue):
+    try:
+        while True:
+            request = await queue.get()
+            if request is QUEUE_END:
+                break
+            await call.write(request)
+        await call.done_writing()
+    except (AioRpcError, asyncio.InvalidStateError):
+        logger.debug("Proxied call finished before all requests were sent")
+
+
+async def read_responses(call: StreamStreamCall, queue: asyncio.Queue):
+    try:
+        while True:
+            response = await call.read()
+            if response is EOF:
+                break
+            await queue.put(response)
+    except BaseException:
+        if not asyncio.current_task().cancelling():
+            await queue.put(QUEUE_END)
+        raise
+    await queue.put(QUEUE_END)
+
+
+DEFAULT_PROXY_CONFIG = ProxyConfig(socket="")
+POOL_SETTINGS_EXCLUDED_FIELDS = {"socket", "seconds_timeout", "queue_size"}
+
+
+def get_pool_settings_key(proxy_config: ProxyConfig) -> str:
+    return proxy_config.model_dump_json(
+        exclude=POOL_SETTINGS_EXCLUDED_FIELDS
+    )
+
+
+DEFAULT_POOL_SETTINGS_KEY = get_pool_settings_key(DEFAULT_PROXY_CONFIG)
+
+
+async def collect_requests(
+    requests: list[object] | AsyncIterator[object],
+) -> list[object]:
+    if isinstance(requests, list):
+        return requests
+    return [request async for request in requests]
+
+
+async def sleep_until(started: float, seconds_offset: float):
+    seconds_delay = started + seconds_offset - perf_counter()
+    if seconds_delay > 0:
+        await asyncio.sleep(seconds_delay)
+
 
 class ProxyProcessor:
-    def __init__(self):
-        self._channels_dict = {}
-        self._methods_dict = {}
+    def __init__(
+        self,
+        config_file_dir: str,
+        records_writer: RecordsWriter | None = None,
+        records_replayer: RecordsReplayer | None = None,
+    ):
+        self._config_file_dir = config_file_dir
+        self._records_writer = records_writer
+        self._records_replayer = records_replayer
+        self._pools: dict[tuple[str, str], ChannelsPool] = {}
+        self._rendered_pools: OrderedDict[
+            tuple[str, str], ChannelsPool
+        ] = OrderedDict()
+        self._methods_pools: dict[
+            tuple[str, str], tuple[str, ProxyConfig, tuple[str, str] | None]
+        ] = {}
+        self._warm_up_configs: dict[tuple[str, str], ProxyConfig] = {}
+        self._closing_tasks: set[asyncio.Task] = set()
+
+    @staticmethod
+    def _get_metadata(context: ServicerContext) -> list[tuple[str, str]]:
+        metadata_list = []
+        metadata = context.invocation_metadata()
+        if metadata is not None:
+            for k, v in metadata:
+                metadata_list.append((k, v))
+        return metadata_list
+
+    @staticmethod
+    def _is_requests_forwarding(meta: ProcessingMeta) -> bool:
+        return (
+            isinstance(meta.mock_config, ResponseMockConfig) and
+            meta.mock_config.requests_streaming and
+            meta.method_data.input_message.streaming
+        )
 
-    def _get_proxy_methods(self, meta: ProcessingMeta) -> callable:
-        proxy_config = meta.mock_config.proxy
-        service_data = meta.service_data
+    def _close_pool(self, pool: ChannelsPool):
+        task = asyncio.create_task(pool.close(c.PROXY_CLOSE_SECONDS_GRACE))
+        self._closing_tasks.add(task)
+        task.add_done_callback(self._closing_tasks.discard)
+
+    def _get_pool(
+        self, key: tuple[str, str], proxy_config: ProxyConfig,
+    ) -> ChannelsPool:
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = create_channels_pool(
+                key[0], proxy_config, self._config_file_dir,
+            )
+            self._pools[key] = pool
+        return pool
+
+    def _get_rendered_pool(
+        self, key: tuple[str, str], proxy_config: ProxyConfig,
+    ) -> ChannelsPool:
+        pool = self._rendered_pools.get(key)
+        if pool is not None:
+            self._rendered_pools.move_to_end(key)
+            return pool
+        pool = create_channels_pool(
+            key[0], proxy_config, self._config_file_dir,
+        )
+        self._rendered_pools[key] = pool
+        if len(self._rendered_pools) > c.PROXY_RENDERED_POOLS_MAX_COUNT:
+            self._close_pool(self._rendered_pools.popitem(last=False)[1])
+        return pool
+
+    def _acquire_channel(self, meta: ProcessingMeta) -> ProxyChannel:
+        settings_key, proxy_config, static_key = self._methods_pools.get(
+            (meta.service_data.full_name, meta.method_data.name),
+            (DEFAULT_POOL_SETTINGS_KEY, DEFAULT_PROXY_CONFIG, None),
+        )
+        key = (meta.mock_data.proxy.socket, settings_key)
+        if key == static_key:
+            return self._get_pool(key, proxy_config).acquire()
+        return self._get_rendered_pool(key, proxy_config).acquire()
+
+    @staticmethod
+    def _get_method_path(meta: ProcessingMeta) -> str:
+        return f"/{meta.service_data.full_name}/{meta.method_data.name}"
+
+    @staticmethod
+    def _get_message_type(meta: ProcessingMeta, name: str) -> type[Message]:
+        return meta.object_resolver.get_message_type(
+            meta.object_resolver.summarized_structure.messages[name]
+        )
+
+    def _create_recording(
+        self, meta: ProcessingMeta, metadata: list[tuple[str, str]],
+    ) -> CallRecording | None:
+        if self._records_writer is None:
+            return None
+        return CallRecording(
+            self._records_writer, self._get_method_path(meta), metadata,
+        )
+
+    def _get_proxy_method(
+        self, meta: ProcessingMeta, channel: ProxyChannel,
+    ) -> callable:
         method_data = meta.method_data
+        method_path = self._get_method_path(meta)
 
-        if proxy_config.socket not in self._channels_dict:
-            channel = insecure_channel(proxy_config.socket)
-            self._channels_dict[proxy_config.socket] = channel
-        else:
-            channel = self._channels_dict[proxy_config.socket]
-
-        if service_data.full_name not in self._methods_dict:
-            self._methods_dict[service_data.full_name] = {}
-        if method_data.name not in self._methods_dict[
-            service_data.full_name
-        ]:
-            in_type = meta.object_resolver.get_message_type(
-                meta.object_resolver.summarized_structure.messages[
-                    method_data.input_message.name
-                ]
+        method = channel.methods.get(method_path)
+        if method is None:
+            in_type = self._get_message_type(
+                meta, method_data.input_message.name
             )
-            out_type = meta.object_resolver.get_message_type(
-                meta.object_resolver.summarized_structure.messages[
-                    method_data.output_message.name
-                ]
+            out_type = self._get_message_type(
+                meta, method_data.output_message.name
             )
             if method_data.input_message.streaming:
                 if method_data.output_message.streaming:
-                    processor = channel.stream_stream
+                    processor = channel.channel.stream_stream
                 else:
-                    processor = channel.stream_unary
+                    processor = channel.channel.stream_unary
             else:
                 if method_data.output_message.streaming:
-                    processor = channel.unary_stream
+                    processor = channel.channel.unary_stream
                 else:
-                    processor = channel.unary_unary
+                    processor = channel.channel.unary_unary
 
             method = processor(
-                f"/{service_data.full_name}/{method_data.name}",
+                method_path,
                 request_serializer=in_type.SerializeToString,
                 response_deserializer=out_type.FromString,
                 _registered_method=True
             )
+            channel.methods[method_path] = method
+        return method
 
-            self._methods_dict[
-                service_data.full_name
-            ][method_data.name] = method
-        return self._methods_dict[service_data.full_name][method_data.name]
+    def register_channels(
+        self,
+        service_name: str,
+        method_name: str,
+        proxy_config: ProxyConfig | None,
+        static_socket: bool = False,
+    ):
+        method_key = (service_name, method_name)
+        if proxy_config is None:
+            self._methods_pools.pop(method_key, None)
+            return
+        settings_key = get_pool_settings_key(proxy_config)
+        static_key = None
+        if static_socket:
+            static_key = (proxy_config.socket, settings_key)
+            if static_key not in self._pools:
+                self._warm_up_configs[static_key] = proxy_config
+        self._methods_pools[method_key] = (
+            settings_key, proxy_config, static_key,
+        )
+
+    def _close_unused_pools(self):
+        static_keys = set()
+        settings_keys = {DEFAULT_POOL_SETTINGS_KEY}
+        for settings_key, _, static_key in self._methods_pools.values():
+            settings_keys.add(settings_key)
+            if static_key is not None:
+                static_keys.add(static_key)
+        for key in list(self._pools):
+            if key not in static_keys:
+                self._close_pool(self._pools.pop(key))
+        for key in list(self._rendered_pools):
+            if key[1] not in settings_keys:
+                self._close_pool(self._rendered_pools.pop(key))
 
     async def _process_unary_proxying(
         self,
-        requests: list[object],
+        requests: list[object] | AsyncIterator[object],
         context: ServicerContext,
         meta: ProcessingMeta,
-    ) -> dict | None:
+    ) -> Message | None:
+        channel = None
+        recording = None
         try:
-            method_func = self._get_proxy_methods(meta)
+            channel = self._acquire_channel(meta)
+            method_func = self._get_proxy_method(meta, channel)
 
-            metadata_list = []
-            metadata = context.invocation_metadata()
-            if metadata is not None:
-                for k, v in metadata:
-                    metadata_list.append((k, v))
+            metadata_list = self._get_metadata(context)
+            recording = self._create_recording(meta, metadata_list)
 
             if meta.method_data.input_message.streaming:
-                async def requests_generator():
-                    for item in requests:
-                        yield item
-                request_obj = requests_generator
+                if isinstance(requests, list):
+                    async def requests_generator():
+                        for item in requests:
+                            yield item
+                    request_obj = requests_generator()
+                else:
+                    request_obj = requests
             else:
                 if len(requests) == 0:
                     logger.error("Proxying request internal error")
@@ -96,11 +289,18 @@ class ProxyProcessor:
             if meta.mock_data.proxy.seconds_timeout is not None:
                 timeout = meta.mock_data.proxy.seconds_timeout
 
+            if recording is not None:
+                request_obj = recording.watch_requests(request_obj)
             response = await method_func(
                 request_obj, metadata=metadata_list, timeout=timeout,
             )
-            return MessageToDict(response)
+            if recording is not None:
+                recording.add_response(response)
+                recording.finish(StatusCode.OK)
+            return response
         except AioRpcError as e:
+            if recording is not None:
+                recording.finish(e.code(), e.details(), e.trailing_metadata())
             context.set_trailing_metadata(e.trailing_metadata())
             await context.abort(
                 e.code(),
@@ -110,21 +310,24 @@ class ProxyProcessor:
             logger.error(
                 f"Proxying request internal error. {get_exception_error(e)}"
             )
+        finally:
+            if channel is not None:
+                channel.release()
 
     async def _process_stream_proxying(
         self,
-        requests: list[object],
+        requests: list[object] | AsyncIterator[object],
         context: ServicerContext,
         meta: ProcessingMeta,
     ):
+        channel = None
+        recording = None
         try:
-            method_func = self._get_proxy_methods(meta)
+            channel = self._acquire_channel(meta)
+            method_func = self._get_proxy_method(meta, channel)
 
-            metadata_list = []
-            metadata = context.invocation_metadata()
-            if metadata is not None:
-                for k, v in metadata:
-                    metadata_list.append((k, v))
+            metadata_list = self._get_metadata(context)
+            recording = self._create_recording(meta, metadata_list)
 
             if meta.method_data.input_message.streaming:
                 request_obj = requests
@@ -137,11 +340,85 @@ class ProxyProcessor:
             if meta.mock_data.proxy.seconds_timeout is not None:
                 timeout = meta.mock_data.proxy.seconds_timeout
 
+            if recording is not None:
+                request_obj = recording.watch_requests(request_obj)
             async for response in method_func(
                 request_obj, metadata=metadata_list, timeout=timeout
             ):
-                yield MessageToDict(response)
+                if recording is not None:
+                    recording.add_response(response)
+                yield response
+            if recording is not None:
+                recording.finish(StatusCode.OK)
+        except AioRpcError as e:
+            if recording is not None:
+                recording.finish(e.code(), e.details(), e.trailing_metadata())
+            context.set_trailing_metadata(e.trailing_metadata())
+            await context.abort(
+                e.code(),
+                e.details(),
+            )
+        except Exception as e:
+            logger.error(
+                f"Proxying request internal error. {get_exception_error(e)}"
+            )
+        finally:
+            if channel is not None:
+                channel.release()
+
+    async def _process_bidi_proxying(
+        self,
+        requests: AsyncIterator[object],
+        context: ServicerContext,
+        meta: ProcessingMeta,
+    ):
+        tasks = []
+        call = None
+        channel = None
+        recording = None
+        try:
+            channel = self._acquire_channel(meta)
+            method_func = self._get_proxy_method(meta, channel)
+
+            timeout = None
+            if meta.mock_data.proxy.seconds_timeout is not None:
+                timeout = meta.mock_data.proxy.seconds_timeout
+
+            metadata_list = self._get_metadata(context)
+            recording = self._create_recording(meta, metadata_list)
+            if recording is not None:
+                requests = recording.watch_requests(requests)
+
+            call = method_func(metadata=metadata_list, timeout=timeout)
+            requests_queue = asyncio.Queue(meta.mock_data.proxy.queue_size)
+            responses_queue = asyncio.Queue(meta.mock_data.proxy.queue_size)
+            responses_task = asyncio.create_task(
+                read_responses(call, responses_queue)
+            )
+            requests_task = asyncio.create_task(
+                read_requests(call, requests, requests_queue)
+            )
+            tasks.extend((
+                requests_task,
+                asyncio.create_task(write_requests(call, requests_queue)),
+                responses_task,
+            ))
+
+            while True:
+                response = await responses_queue.get()
+                if response is QUEUE_END:
+                    break
+                if recording is not None:
+                    recording.add_response(response)
+                yield response
+            if requests_task.done() and not requests_task.cancelled():
+                requests_task.result()
+            await responses_task
+            if recording is not None:
+                recording.finish(StatusCode.OK)
         except AioRpcError as e:
+            if recording is not None:
+                recording.finish(e.code(), e.details(), e.trailing_metadata())
             context.set_trailing_metadata(e.trailing_metadata())
             await context.abort(
                 e.code(),
@@ -151,6 +428,78 @@ class ProxyProcessor:
             logger.error(
                 f"Proxying request internal error. {get_exception_error(e)}"
             )
+        finally:
+            for task in tasks:
+                task.cancel()
+            if call is not None and not call.done():
+                call.cancel()
+            if channel is not None:
+                channel.release()
+
+    async def _find_record(
+        self,
+        requests: list[object] | AsyncIterator[object],
+        context: ServicerContext,
+        meta: ProcessingMeta,
+    ) -> Record:
+        requests = await collect_requests(requests)
+        record = self._records_replayer.find(
+            self._get_method_path(meta),
+            [
+                request.SerializeToString(deterministic=True)
+                for request in requests
+            ],
+        )
+        if record is None:
+            logger.warning(
+                f"No recorded response for method '{meta.method_data.name}' "
+                f"in service '{meta.service_data.full_name}'"
+            )
+            await context.abort(StatusCode.NOT_FOUND, c.RECORDS_MISS_DETAILS)
+        return record
+
+    async def _finish_replaying(
+        self, context: ServicerContext, record: Record, started: float,
+    ):
+        if self._records_replayer.reproduce_latency:
+            await sleep_until(started, record.duration)
+        if record.code is not StatusCode.OK:
+            context.set_trailing_metadata(record.trailing_metadata)
+            await context.abort(record.code, record.details)
+
+    async def _process_unary_replaying(
+        self,
+        requests: list[object] | AsyncIterator[object],
+        context: ServicerContext,
+        meta: ProcessingMeta,
+    ) -> Message | None:
+        started = perf_counter()
+        record = await self._find_record(requests, context, meta)
+        await self._finish_replaying(context, record, started)
+        if len(record.responses) == 0:
+            logger.error("Recorded call has no response message")
+            return None
+        return self._get_message_type(
+            meta, meta.method_data.output_message.name
+        ).FromString(record.responses[0])
+
+    async def _process_stream_replaying(
+        self,
+        requests: list[object] | AsyncIterator[object],
+        context: ServicerContext,
+        meta: ProcessingMeta,
+    ):
+        started = perf_counter()
+        record = await self._find_record(requests, context, meta)
+        out_type = self._get_message_type(
+            meta, meta.method_data.output_message.name
+        )
+        reproduce_latency = self._records_replayer.reproduce_latency
+        for response, offset in zip(record.responses, record.offsets):
+            if reproduce_latency:
+                await sleep_until(started, offset)
+            yield out_type.FromString(response)
+        await self._finish_replaying(context, record, started)
 
     def get_proxy_function(
         self, meta: ProcessingMeta
@@ -158,12 +507,36 @@ class ProxyProcessor:
         if meta.mock_data.proxy is None:
             return None
 
+        if self._records_replayer is not None:
+            if meta.method_data.output_message.streaming:
+                return self._process_stream_replaying
+            return self._process_unary_replaying
+
         if meta.method_data.output_message.streaming:
+            if self._is_requests_forwarding(meta):
+                return self._process_bidi_proxying
             return self._process_stream_proxying
         else:
             return self._process_unary_proxying
 
+    async def warm_up_channels(self):
+        self._close_unused_pools()
+        configs = list(self._warm_up_configs.items())
+        self._warm_up_configs.clear()
+        if self._records_replayer is not None:
+            return
+        await asyncio.gather(*[
+            warm_up_pool(
+                self._get_pool(key, proxy_config),
+                c.PROXY_WARM_UP_SECONDS_TIMEOUT,
+            )
+            for key, proxy_config in configs
+        ])
+
     async def close_channels(self):
+        pools = [*self._pools.values(), *self._rendered_pools.values()]
+        self._pools.clear()
+        self._rendered_pools.clear()
         await asyncio.gather(
-            *[channel.close() for channel in self._channels_dict.values()]
+            *[pool.close() for pool in pools], *self._closing_tasks,
         )
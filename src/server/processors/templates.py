@@ -1,31 +1,35 @@
+import asyncio
 from logging import getLogger
-from typing import TypeVar, Type, Any
+from typing import Any, Callable, Type
 
-from grpc import StatusCode
 from grpc.aio import ServicerContext
-from jinja2 import Environment
-from pydantic import BaseModel, ValidationError, RootModel
+from jinja2 import Environment, TemplateSyntaxError
+from pydantic import TypeAdapter, ValidationError
 from yaml import YAMLError
 
 import constants as c
-from templates import AccessibleVariable
+from templates import AccessibleVariable, TemplatesCache
 from config.model import ResponseMockConfig, ErrorConfig, ProxyConfig
+from config.validators import (
+    validate_grpc_error_status_code,
+    validate_non_negative_float,
+    validate_positive_float,
+)
 from server.processors import ProcessingMeta
 import server.processors.base as base
+from state import ScopedState, ServerState, SharedScopedState, StateStore
 import utils
 
 logger = getLogger(__name__)
 
 
-ModelType = TypeVar("ModelType", bound=BaseModel)
-
-
 async def render_simple_type(
-    env: Environment,
+    templates: TemplatesCache,
+    variables: dict,
     simple_type: Type[utils.SimpleType],
     value: utils.SimpleType,
 ) -> utils.SimpleType:
-    rendered = await env.from_string(str(value)).render_async()
+    rendered = await templates.get(str(value)).render_async(**variables)
     try:
         return simple_type(rendered)
     except Exception:
@@ -33,39 +37,41 @@ async def render_simple_type(
         return value
 
 
-async def render_list(env: Environment, values: list) -> list:
+async def render_list(
+    templates: TemplatesCache, variables: dict, values: list
+) -> list:
     result = []
     for item in values:
         if isinstance(item, list):
-            result.append(await render_list(env, item))
+            result.append(await render_list(templates, variables, item))
         elif isinstance(item, dict):
-            result.append(await render_dict(env, item))
+            result.append(await render_dict(templates, variables, item))
         elif isinstance(item, str):
-            result.append(await env.from_string(item).render_async())
+            result.append(await templates.get(item).render_async(**variables))
         else:
             result.append(item)
     return result
 
 
-async def render_dict(env: Environment, values: dict) -> dict:
+async def render_dict(
+    templates: TemplatesCache, variables: dict, values: dict
+) -> dict:
     result = {}
     for key, value in values.items():
         if isinstance(value, list):
-            result[key] = await render_list(env, value)
+            result[key] = await render_list(templates, variables, value)
         elif isinstance(value, dict):
-            result[key] = await render_dict(env, value)
+            result[key] = await render_dict(templates, variables, value)
         elif isinstance(value, str):
-            result[key] = await env.from_string(value).render_async()
+            result[key] = await templates.get(value).render_async(**variables)
         else:
             result[key] = value
     return result
 
 
-def create_model(
-    entity_type: Type[ModelType], *args, **kwargs
-) -> ModelType | None:
+def validate_data(validator: TypeAdapter, value: Any) -> Any | None:
     try:
-        return entity_type(*args, **kwargs)
+        return validator.validate_python(value)
     except ValidationError as e:
         logger.error(utils.get_msg_from_parts(
             "Invalid mock data format", utils.get_validation_err_msg(e))
@@ -73,10 +79,7 @@ def create_model(
     return None
 
 
-async def render_model_from_str(
-    env: Environment, entity_type: Type[ModelType], value: str
-) -> ModelType | None:
-    rendered = await env.from_string(value).render_async()
+def parse_data_from_str(validator: TypeAdapter, rendered: str) -> Any | None:
     parsed = None
     try:
         parsed = utils.parse_from_yaml(rendered.encode())
@@ -86,170 +89,386 @@ async def render_model_from_str(
         )
     if parsed is None:
         return None
-    if issubclass(entity_type, RootModel):
-        return create_model(entity_type, root=parsed)
-    elif isinstance(parsed, dict):
-        return create_model(entity_type, **parsed)
-    else:
-        return create_model(entity_type, parsed)
+    return validate_data(validator, parsed)
 
 
-async def render_model(
-    env: Environment, entity_type: Type[ModelType], value: dict | list
-) -> ModelType | None:
-    if isinstance(value, list):
-        rendered = await render_list(env, value)
-    else:
-        rendered = await render_dict(env, value)
+async def render_data_from_str(
+    templates: TemplatesCache,
+    variables: dict,
+    validator: TypeAdapter,
+    value: str,
+) -> Any | None:
+    rendered = await templates.get(value).render_async(**variables)
+    return parse_data_from_str(validator, rendered)
+
+
+def parse_float(
+    value: Any, field_name: str, validate: Callable[[float], float],
+) -> float | None:
     try:
-        return entity_type.model_validate(rendered)
-    except YAMLError as e:
+        return validate(float(value))
+    except (TypeError, ValueError) as e:
         logger.error(utils.get_msg_from_parts(
-            "Error parsing YML of mock data", utils.get_yml_err_msg(e))
-        )
-    except ValidationError as e:
-        logger.error(utils.get_msg_from_parts(
-            "Invalid mock data format", utils.get_validation_err_msg(e))
-        )
+            "Invalid mock data format", f"{field_name}: {e}",
+        ))
     return None
 
 
-class TemplateProcessor:
-    def __init__(self, environment: Environment):
-        self._env = environment
-        self._state = c.TEMP_INITIAL_STATE
+def render_static_values(
+    templates: TemplatesCache, values: dict | list
+) -> dict | list:
+    if isinstance(values, dict):
+        items = values.items()
+    else:
+        items = enumerate(values)
+
+    result = {} if isinstance(values, dict) else [None] * len(values)
+    for key, value in items:
+        if isinstance(value, dict | list):
+            result[key] = render_static_values(templates, value)
+        elif isinstance(value, str):
+            result[key] = templates.render_static(value)
+        else:
+            result[key] = value
+    return result
 
-    async def render_error_config(self, error_config: ErrorConfig):
-        code = StatusCode.UNKNOWN.value[0]
-        if error_config.code is not None:
-            code = await render_simple_type(self._env, int, error_config.code)
 
-        details = await render_simple_type(
-            self._env, int, error_config.details
-        )
-        return create_model(ErrorConfig, code=code, details=details)
+def create_static_data(
+    templates: TemplatesCache,
+    validator: TypeAdapter,
+    value: str | dict | list,
+) -> Any | None:
+    if isinstance(value, str):
+        return parse_data_from_str(validator, templates.render_static(value))
+    return validate_data(validator, render_static_values(templates, value))
+
+
+def collect_template_sources(values: dict | list, result: list[str]):
+    items = values.values() if isinstance(values, dict) else values
+    for item in items:
+        if isinstance(item, dict | list):
+            collect_template_sources(item, result)
+        elif isinstance(item, str):
+            result.append(item)
+
+
+def get_mock_config_sources(
+    mock_config: ResponseMockConfig | str,
+) -> list[str]:
+    if isinstance(mock_config, str):
+        return [mock_config]
+
+    result = []
+    if isinstance(mock_config.messages, str):
+        result.append(mock_config.messages)
+    else:
+        collect_template_sources(mock_config.messages, result)
+
+    if isinstance(mock_config.trailing_meta, str):
+        result.append(mock_config.trailing_meta)
+    else:
+        collect_template_sources(mock_config.trailing_meta, result)
+
+    if mock_config.error is not None:
+        if mock_config.error.code is not None:
+            result.append(str(mock_config.error.code))
+        result.append(str(mock_config.error.details))
+
+    if mock_config.seconds_delay is not None:
+        result.append(str(mock_config.seconds_delay))
+
+    if mock_config.proxy is not None:
+        result.append(str(mock_config.proxy.socket))
+        if mock_config.proxy.seconds_timeout is not None:
+            result.append(str(mock_config.proxy.seconds_timeout))
+    return result
+
+
+class TemplateProcessor:
+    def __init__(
+        self,
+        environment: Environment,
+        state: ServerState | None = None,
+        state_store: StateStore | None = None,
+    ):
+        self._env = environment
+        self._templates = TemplatesCache(environment)
+        self._method_variables: dict[tuple[str, str], dict] = {}
+        self._method_scopes: dict[tuple[str, str], dict[str, tuple]] = {}
+        if state is None:
+            state = ServerState()
+        self._state = state
+        if state_store is None:
+            state_store = StateStore()
+        self._state_store = state_store
+
+        self._scoped_state_class = ScopedState
+        if state_store.shared:
+            self._scoped_state_class = SharedScopedState
+            self._env.globals[c.TEMP_SET_STATE_KEY] = self._set_shared_state
+            self._env.globals[c.TEMP_GET_STATE_KEY] = self._get_shared_state
+        else:
+            self._env.globals[c.TEMP_SET_STATE_KEY] = self._set_state
+            self._env.globals[c.TEMP_GET_STATE_KEY] = self._get_state
+
+    @property
+    def templates(self) -> TemplatesCache:
+        return self._templates
+
+    def compile_mock_config(self, mock_config: ResponseMockConfig | str):
+        for source in get_mock_config_sources(mock_config):
+            try:
+                self._templates.compile(source)
+            except TemplateSyntaxError as e:
+                logger.error(utils.get_msg_from_parts(
+                    "Mock template compilation error",
+                    f"Line {e.lineno}: {e.message}",
+                ))
+
+    async def render_error_config(
+        self, error_config: ErrorConfig, variables: dict
+    ) -> base.ErrorMock | None:
+        code = error_config.code
+        if isinstance(code, str):
+            code = await render_simple_type(
+                self._templates, variables, int, code
+            )
+            if isinstance(code, int):
+                try:
+                    validate_grpc_error_status_code(code)
+                except ValueError as e:
+                    logger.error(utils.get_msg_from_parts(
+                        "Invalid mock data format", f"error -> code: {e}",
+                    ))
+                    return None
+
+        details = await self._templates.get(
+            error_config.details
+        ).render_async(**variables)
+        return base.ErrorMock(code, details)
 
     async def render_proxy_config(
-        self, proxy_config: ProxyConfig
+        self, proxy_config: ProxyConfig, variables: dict
     ) -> base.ProxyMock:
-        socket = await render_simple_type(self._env, str, proxy_config.socket)
-
-        seconds_timeout = None
-        if isinstance(proxy_config.seconds_timeout, float):
-            seconds_timeout = proxy_config.seconds_timeout
-        elif isinstance(proxy_config.seconds_timeout, str):
-            seconds_timeout = await render_simple_type(
-                self._env, str, proxy_config.socket
+        socket = await self._templates.get(
+            proxy_config.socket
+        ).render_async(**variables)
+
+        seconds_timeout = proxy_config.seconds_timeout
+        if isinstance(seconds_timeout, str):
+            seconds_timeout = await self._templates.get(
+                seconds_timeout
+            ).render_async(**variables)
+        if seconds_timeout is not None:
+            seconds_timeout = parse_float(
+                seconds_timeout,
+                "proxy -> seconds_timeout",
+                validate_non_negative_float,
             )
-        return create_model(
-            base.ProxyMock, socket=socket, seconds_timeout=seconds_timeout
+        return base.ProxyMock(
+            socket, seconds_timeout, proxy_config.queue_size,
         )
 
     async def render_mock_config(
-        self, mock_config: ResponseMockConfig | str
+        self, mock_config: ResponseMockConfig | str, variables: dict
     ) -> base.ResponseMock:
+        templates = self._templates
         if isinstance(mock_config, str):
-            return await render_model_from_str(
-                self._env, base.ResponseMock, mock_config
-            ) or base.ResponseMock()
+            data = await render_data_from_str(
+                templates, variables, base.RESPONSE_VALIDATOR, mock_config
+            )
+            if data is None:
+                return base.ResponseMock()
+            return base.ResponseMock.from_data(data)
 
-        message = None
         if isinstance(mock_config.messages, str):
-            message = await render_model_from_str(
-                self._env, base.MessageMock, mock_config.messages
+            messages = await render_data_from_str(
+                templates,
+                variables,
+                base.MESSAGES_VALIDATOR,
+                mock_config.messages,
             )
-        elif isinstance(mock_config.messages, dict | list):
-            message = await render_model(
-                self._env, base.MessageMock, mock_config.messages
+        elif isinstance(mock_config.messages, list):
+            messages = await render_list(
+                templates, variables, mock_config.messages
             )
-        if not message:
-            message = base.MessageMock()
-
-        metadata = None
-        if isinstance(mock_config.trailing_meta, str):
-            metadata = await render_model_from_str(
-                self._env, base.MessageMock, mock_config.trailing_meta
+        else:
+            messages = await render_dict(
+                templates, variables, mock_config.messages
             )
-        elif isinstance(mock_config.trailing_meta, dict):
-            metadata = await render_model(
-                self._env, base.MetadataMock, mock_config.trailing_meta
+
+        metadata = mock_config.trailing_meta
+        if isinstance(metadata, str):
+            metadata = await render_data_from_str(
+                templates, variables, base.METADATA_VALIDATOR, metadata
             )
-        if not metadata:
-            metadata = base.MetadataMock()
 
         error = None
         if isinstance(mock_config.error, ErrorConfig):
-            error = await self.render_error_config(mock_config.error)
-        elif isinstance(mock_config.error, str):
-            error = await render_model_from_str(
-                self._env, base.ErrorMock, mock_config.error
+            error = await self.render_error_config(
+                mock_config.error, variables
             )
 
         seconds_delay = mock_config.seconds_delay
+        if isinstance(seconds_delay, str):
+            seconds_delay = await templates.get(
+                seconds_delay
+            ).render_async(**variables)
         if seconds_delay is not None:
-            seconds_delay = await render_simple_type(
-                self._env, float, mock_config.seconds_delay
+            seconds_delay = parse_float(
+                seconds_delay, "seconds_delay", validate_positive_float,
             )
 
         proxy = None
         if isinstance(mock_config.proxy, ProxyConfig):
-            proxy = await self.render_proxy_config(mock_config.proxy)
-        elif isinstance(mock_config.proxy, str):
-            proxy = await render_model_from_str(
-                self._env, base.ProxyMock, mock_config.proxy
+            proxy = await self.render_proxy_config(
+                mock_config.proxy, variables
             )
 
-        return create_model(
-            base.ResponseMock,
-            messages=message,
-            trailing_meta=metadata,
-            error=error,
-            seconds_delay=seconds_delay,
-            proxy=proxy,
-        ) or base.ResponseMock()
+        return base.ResponseMock(
+            base.MessageMock(messages),
+            base.MetadataMock(metadata),
+            error,
+            seconds_delay,
+            proxy,
+        )
+
+    def create_static_mock_data(
+        self, mock_config: ResponseMockConfig | str
+    ) -> base.ResponseMock | None:
+        templates = self._templates
+        for source in get_mock_config_sources(mock_config):
+            if not templates.is_static(source):
+                return None
+
+        if isinstance(mock_config, str):
+            data = create_static_data(
+                templates, base.RESPONSE_VALIDATOR, mock_config
+            )
+            if data is None:
+                return None
+            result = base.ResponseMock.from_data(data)
+        elif mock_config.error is None and mock_config.proxy is None:
+            messages = create_static_data(
+                templates, base.MESSAGES_VALIDATOR, mock_config.messages
+            )
+            metadata = create_static_data(
+                templates, base.METADATA_VALIDATOR, mock_config.trailing_meta
+            )
+            if messages is None or metadata is None:
+                return None
+
+            seconds_delay = mock_config.seconds_delay
+            if isinstance(seconds_delay, str):
+                seconds_delay = templates.render_static(seconds_delay)
+            if seconds_delay is not None:
+                seconds_delay = parse_float(
+                    seconds_delay, "seconds_delay", validate_positive_float,
+                )
+                if seconds_delay is None:
+                    return None
+
+            result = base.ResponseMock(
+                base.MessageMock(messages),
+                base.MetadataMock(metadata),
+                seconds_delay=seconds_delay,
+            )
+        else:
+            return None
+
+        if result.error is not None or result.proxy is not None:
+            return None
+        return result
+
+    def is_requests_used(self, mock_config: ResponseMockConfig | str) -> bool:
+        requests_keys = {c.TEMP_MESSAGE_KEY, c.TEMP_MESSAGES_KEY}
+        for source in get_mock_config_sources(mock_config):
+            if self._templates.is_static(source):
+                continue
+            variables = self._templates.get_variables(source)
+            if variables is None or not requests_keys.isdisjoint(variables):
+                return True
+        return False
 
     def _set_state(self, value: Any):
-        self._state = value
+        self._state.set(value)
 
     def _get_state(self) -> Any:
-        return self._state
-
-    def _fill_environment(
+        return self._state.get()
+
+    async def _set_shared_state(self, value: Any):
+        await asyncio.to_thread(self._state.set, value)
+
+    async def _get_shared_state(self) -> Any:
+        return await asyncio.to_thread(self._state.get)
+
+    def _get_method_variables(self, meta: ProcessingMeta) -> dict:
+        key = (meta.service_data.full_name, meta.method_data.name)
+        variables = self._method_variables.get(key)
+        if variables is None:
+            variables = {
+                c.TEMP_SOCKETS_KEY: AccessibleVariable([
+                    socket_data.socket
+                    for socket_data in meta.server_config.sockets
+                ]),
+                c.TEMP_ALIAS_KEY: meta.server_config.alias,
+                c.TEMP_SERVICE_KEY: AccessibleVariable(
+                    meta.service_data.model_dump()
+                ),
+                c.TEMP_METHOD_KEY: AccessibleVariable(
+                    meta.method_data.model_dump()
+                ),
+            }
+            self._method_variables[key] = variables
+        return variables
+
+    def _create_scoped_state(
+        self, metadata: dict, meta: ProcessingMeta,
+    ) -> ScopedState:
+        key = (meta.service_data.full_name, meta.method_data.name)
+        scopes = self._method_scopes.get(key)
+        if scopes is None:
+            alias = meta.server_config.alias
+            scopes = {
+                c.STATE_SERVER_SCOPE: (c.STATE_SERVER_SCOPE, alias),
+                c.STATE_METHOD_SCOPE: (c.STATE_METHOD_SCOPE, alias, *key),
+            }
+            self._method_scopes[key] = scopes
+        session = metadata.get(self._state_store.session_metadata, "")
+        if isinstance(session, list):
+            session = session[0]
+        return self._scoped_state_class(self._state_store, scopes | {
+            c.STATE_SESSION_SCOPE: (
+                c.STATE_SESSION_SCOPE,
+                meta.server_config.alias,
+                str(session),
+            ),
+        })
+
+    def create_variables(
         self,
         requests: list[dict],
         context: ServicerContext,
         meta: ProcessingMeta,
-    ):
-        self._env.globals[c.TEMP_SOCKETS_KEY] = AccessibleVariable([
-            socket_data.socket for socket_data in meta.server_config.sockets
-        ])
-        self._env.globals[c.TEMP_ALIAS_KEY] = meta.server_config.alias
-        self._env.globals[c.TEMP_SERVICE_KEY] = AccessibleVariable(
-            meta.service_data.model_dump()
-        )
-        self._env.globals[c.TEMP_METHOD_KEY] = AccessibleVariable(
-            meta.method_data.model_dump()
-        )
-        self._env.globals[c.TEMP_METADATA_KEY] = AccessibleVariable(
-            base.extract_invocation_metadata(context)
+    ) -> dict:
+        variables = dict(self._get_method_variables(meta))
+        metadata = base.extract_invocation_metadata(context)
+        variables[c.TEMP_METADATA_KEY] = AccessibleVariable(metadata)
+        variables[c.TEMP_STATE_KEY] = self._create_scoped_state(
+            metadata, meta,
         )
-        self._env.globals[c.TEMP_MESSAGES_KEY] = AccessibleVariable(requests)
+        variables[c.TEMP_MESSAGES_KEY] = AccessibleVariable(requests)
         if len(requests) > 0:
-            self._env.globals[c.TEMP_MESSAGE_KEY] = AccessibleVariable(
-                requests[0]
-            )
+            variables[c.TEMP_MESSAGE_KEY] = AccessibleVariable(requests[0])
         else:
-            self._env.globals[c.TEMP_MESSAGE_KEY] = None
-
-        self._env.globals[c.TEMP_SET_STATE_KEY] = self._set_state
-        self._env.globals[c.TEMP_GET_STATE_KEY] = self._get_state
+            variables[c.TEMP_MESSAGE_KEY] = None
+        return variables
 
     async def create_mock_data(
         self,
         requests: list[dict],
         context: ServicerContext,
         meta: ProcessingMeta,
-    ):
-        self._fill_environment(requests, context, meta)
-        response_mock = await self.render_mock_config(meta.mock_config)
-        meta.mock_data = response_mock
+    ) -> base.ResponseMock:
+        variables = self.create_variables(requests, context, meta)
+        return await self.render_mock_config(meta.mock_config, variables)
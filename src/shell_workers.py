@@ -0,0 +1,195 @@
+import asyncio
+import json
+from asyncio.subprocess import Process, create_subprocess_exec
+from logging import getLogger
+
+from config.model import ShellWorkerConfig
+from utils import get_exception_error
+import constants as c
+
+logger = getLogger(__name__)
+
+
+class ShellWorkerError(Exception):
+    pass
+
+
+class ShellWorker:
+    def __init__(self, name: str, command: list[str]):
+        self._name = name
+        self._command = command
+        self._process: Process | None = None
+        self._killed = False
+        self._starts = 0
+
+    @property
+    def is_alive(self) -> bool:
+        return (
+            self._process is not None and
+            self._process.returncode is None and
+            not self._killed
+        )
+
+    async def start(self):
+        if self._process is not None:
+            await self._process.wait()
+        self._killed = False
+        self._process = await create_subprocess_exec(
+            *self._command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=c.SHELL_WORKER_LINE_LIMIT,
+        )
+        self._starts += 1
+        if self._starts > 1:
+            logger.warning(
+                f"Shell worker '{self._name}' restarted with pid "
+                f"{self._process.pid}"
+            )
+        else:
+            logger.debug(
+                f"Shell worker '{self._name}' started with pid "
+                f"{self._process.pid}"
+            )
+
+    async def call(self, args: list[str], stdin: str | None) -> dict:
+        if not self.is_alive:
+            await self.start()
+
+        request = json.dumps({"args": args, "stdin": stdin})
+        self._process.stdin.write(f"{request}\n".encode())
+        await self._process.stdin.drain()
+
+        line = await self._process.stdout.readline()
+        if not line:
+            raise ShellWorkerError(
+                f"Shell worker '{self._name}' closed output stream"
+            )
+        response = json.loads(line)
+        if not isinstance(response, dict):
+            raise ShellWorkerError(
+                f"Shell worker '{self._name}' response should be JSON object"
+            )
+        return {
+            "code": response.get("code", 0),
+            "stdout": response.get("stdout", ""),
+            "stderr": response.get("stderr", ""),
+        }
+
+    def kill(self):
+        if self.is_alive:
+            self._process.kill()
+            self._killed = True
+
+    async def stop(self, seconds_timeout: float):
+        if self._process is None:
+            return
+        if not self.is_alive:
+            await self._process.wait()
+            return
+        self._process.stdin.close()
+        try:
+            await asyncio.wait_for(self._process.wait(), seconds_timeout)
+        except asyncio.TimeoutError:
+            self._process.kill()
+            await self._process.wait()
+
+
+class ShellWorkersPool:
+    def __init__(self, name: str, config: ShellWorkerConfig):
+        self._name = name
+        self._config = config
+        self._workers = [
+            ShellWorker(name, config.command)
+            for _ in range(config.processes)
+        ]
+        self._idle: asyncio.Queue[ShellWorker] = asyncio.Queue()
+        for worker in self._workers:
+            self._idle.put_nowait(worker)
+        self._calls = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    async def start(self):
+        results = await asyncio.gather(
+            *[worker.start() for worker in self._workers],
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(
+                    f"Shell worker '{self._name}' starting error. "
+                    f"{get_exception_error(result)}"
+                )
+
+    async def call(self, args: list[str], stdin: str | None) -> dict | None:
+        max_waiting = self._config.max_waiting_calls
+        if max_waiting is not None and (
+            self._calls - len(self._workers) >= max_waiting
+        ):
+            logger.error(
+                f"Shell worker '{self._name}' call rejected, "
+                f"{max_waiting} calls are already waiting"
+            )
+            return None
+
+        self._calls += 1
+        worker = None
+        finished = False
+        try:
+            async with asyncio.timeout(self._config.seconds_timeout):
+                worker = await self._idle.get()
+                result = await worker.call(args, stdin)
+            finished = True
+            return result
+        except TimeoutError:
+            logger.error(
+                f"Shell worker '{self._name}' call was not finished in "
+                f"{self._config.seconds_timeout} seconds"
+            )
+        except Exception as e:
+            logger.error(
+                f"Shell worker '{self._name}' call error. "
+                f"{get_exception_error(e)}"
+            )
+        finally:
+            self._calls -= 1
+            if worker is not None:
+                if not finished:
+                    worker.kill()
+                self._idle.put_nowait(worker)
+        return None
+
+    async def stop(self):
+        await asyncio.gather(*[
+            worker.stop(c.SHELL_WORKERS_STOP_SECONDS_TIMEOUT)
+            for worker in self._workers
+        ])
+
+
+class ShellWorkers:
+    def __init__(self, configs: dict[str, ShellWorkerConfig]):
+        self._pools = {
+            name: ShellWorkersPool(name, config)
+            for name, config in configs.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._pools)
+
+    async def start(self):
+        await asyncio.gather(*[pool.start() for pool in self._pools.values()])
+
+    async def call(
+        self, name: str, args: list[str], stdin: str | None = None,
+    ) -> dict | None:
+        pool = self._pools.get(name)
+        if pool is None:
+            logger.error(f"Shell worker '{name}' is not configured")
+            return None
+        return await pool.call(args, stdin)
+
+    async def stop(self):
+        await asyncio.gather(*[pool.stop() for pool in self._pools.values()])
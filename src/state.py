@@ -0,0 +1,305 @@
+import asyncio
+import heapq
+import json
+import os
+import threading
+import time
+from contextlib import AbstractContextManager
+from logging import getLogger
+from typing import Any, MutableMapping
+
+from templates import get_raw_value
+from utils import get_exception_error
+import constants as c
+
+logger = getLogger(__name__)
+
+
+class ServerState:
+    def __init__(self, storage: MutableMapping | None = None, key: str = ""):
+        if storage is None:
+            storage = {}
+        self._storage = storage
+        self._key = key
+
+    def get(self) -> Any:
+        return self._storage.get(self._key, c.TEMP_INITIAL_STATE)
+
+    def set(self, value: Any):
+        self._storage[self._key] = value
+
+
+class StateStore:
+    def __init__(
+        self,
+        storage: MutableMapping | None = None,
+        lock: AbstractContextManager | None = None,
+        session_metadata: str = c.STATE_DEFAULT_SESSION_METADATA,
+        shared: bool = False,
+    ):
+        if storage is None:
+            storage = {}
+        if lock is None:
+            lock = threading.Lock()
+        self._storage = storage
+        self._lock = lock
+        self._session_metadata = session_metadata
+        self._shared = shared
+        self._expirations: list[tuple[float, tuple]] = []
+        self._deadlines: dict[tuple, float] = {}
+
+    @property
+    def storage(self) -> MutableMapping:
+        return self._storage
+
+    @property
+    def session_metadata(self) -> str:
+        return self._session_metadata
+
+    @property
+    def shared(self) -> bool:
+        return self._shared
+
+    def _add_deadline(self, key: tuple, expires_at: float):
+        self._deadlines[key] = expires_at
+        heapq.heappush(self._expirations, (expires_at, key))
+        if len(self._expirations) > max(
+            c.STATE_EXPIRATIONS_COMPACT_MIN_SIZE, 2 * len(self._deadlines)
+        ):
+            self._expirations = [
+                (deadline, deadline_key)
+                for deadline_key, deadline in self._deadlines.items()
+            ]
+            heapq.heapify(self._expirations)
+
+    def _expire(self, now: float):
+        expirations = self._expirations
+        while expirations and expirations[0][0] <= now:
+            expires_at, key = heapq.heappop(expirations)
+            if self._deadlines.get(key) != expires_at:
+                continue
+            del self._deadlines[key]
+            entry = self._storage.get(key)
+            if entry is not None and entry[1] == expires_at:
+                del self._storage[key]
+
+    def _get_entry(self, key: tuple, now: float) -> tuple | None:
+        entry = self._storage.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self._storage[key]
+            return None
+        return entry
+
+    def _set_entry(
+        self, key: tuple, value: Any, seconds_ttl: float | None, now: float,
+    ):
+        value = get_raw_value(value)
+        expires_at = None
+        if seconds_ttl is not None:
+            expires_at = now + seconds_ttl
+            self._add_deadline(key, expires_at)
+        else:
+            self._deadlines.pop(key, None)
+        self._storage[key] = (value, expires_at)
+
+    def get(self, key: tuple, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._get_entry(key, time.time())
+        if entry is None:
+            return default
+        return entry[0]
+
+    def set(self, key: tuple, value: Any, seconds_ttl: float | None = None):
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            self._set_entry(key, value, seconds_ttl, now)
+
+    def compare_and_set(
+        self,
+        key: tuple,
+        expected: Any,
+        value: Any,
+        seconds_ttl: float | None = None,
+    ) -> bool:
+        expected = get_raw_value(expected)
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            entry = self._get_entry(key, now)
+            current = None if entry is None else entry[0]
+            if current != expected:
+                return False
+            self._set_entry(key, value, seconds_ttl, now)
+            return True
+
+    def increment(
+        self, key: tuple, amount: int | float = 1,
+        seconds_ttl: float | None = None,
+    ) -> int | float:
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            entry = self._get_entry(key, now)
+            if entry is None:
+                value = amount
+            else:
+                value = entry[0] + amount
+                if seconds_ttl is None and entry[1] is not None:
+                    seconds_ttl = entry[1] - now
+            self._set_entry(key, value, seconds_ttl, now)
+            return value
+
+    def delete(self, key: tuple) -> bool:
+        with self._lock:
+            entry = self._get_entry(key, time.time())
+            if entry is None:
+                return False
+            del self._storage[key]
+            self._deadlines.pop(key, None)
+            return True
+
+    def save_snapshot(self, filepath: str):
+        now = time.time()
+        entries = []
+        with self._lock:
+            items = list(self._storage.items())
+        for key, value in items:
+            if isinstance(key, tuple):
+                if value[1] is not None and value[1] <= now:
+                    continue
+                entries.append([list(key), value[0], value[1]])
+            else:
+                entries.append([key, value, None])
+        temp_path = f"{filepath}.tmp"
+        try:
+            with open(temp_path, "w") as file:
+                json.dump({"entries": entries}, file, default=str)
+            os.replace(temp_path, filepath)
+            logger.info(
+                f"State snapshot with {len(entries)} entries saved to "
+                f"'{filepath}'"
+            )
+        except Exception as e:
+            logger.error(
+                f"State snapshot saving error. {get_exception_error(e)}"
+            )
+
+    def load_snapshot(self, filepath: str):
+        if not os.path.exists(filepath):
+            return
+        try:
+            with open(filepath) as file:
+                entries = json.load(file)["entries"]
+        except Exception as e:
+            logger.error(
+                f"State snapshot loading error. {get_exception_error(e)}"
+            )
+            return
+
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            for key, value, expires_at in entries:
+                if isinstance(key, list):
+                    if expires_at is not None and expires_at <= now:
+                        continue
+                    key = tuple(key)
+                    self._storage[key] = (value, expires_at)
+                    if expires_at is not None:
+                        self._add_deadline(key, expires_at)
+                else:
+                    self._storage[key] = value
+                loaded += 1
+        logger.info(
+            f"State snapshot with {loaded} entries loaded from '{filepath}'"
+        )
+
+
+class ScopedState:
+    __slots__ = ("_store", "_scopes")
+
+    def __init__(self, store: StateStore, scopes: dict[str, tuple]):
+        self._store = store
+        self._scopes = scopes
+
+    def _get_key(self, key: Any, scope: str) -> tuple:
+        scope_key = self._scopes.get(scope)
+        if scope_key is None:
+            raise ValueError(
+                f"Unknown state scope '{scope}', available scopes: "
+                f"{', '.join(self._scopes)}"
+            )
+        return scope_key + (str(key),)
+
+    def get(
+        self, key: Any, default: Any = None,
+        scope: str = c.STATE_DEFAULT_SCOPE,
+    ) -> Any:
+        return self._store.get(self._get_key(key, scope), default)
+
+    def set(
+        self, key: Any, value: Any, seconds_ttl: float | None = None,
+        scope: str = c.STATE_DEFAULT_SCOPE,
+    ):
+        self._store.set(self._get_key(key, scope), value, seconds_ttl)
+
+    def cas(
+        self, key: Any, expected: Any, value: Any,
+        seconds_ttl: float | None = None,
+        scope: str = c.STATE_DEFAULT_SCOPE,
+    ) -> bool:
+        return self._store.compare_and_set(
+            self._get_key(key, scope), expected, value, seconds_ttl,
+        )
+
+    def incr(
+        self, key: Any, amount: int | float = 1,
+        seconds_ttl: float | None = None,
+        scope: str = c.STATE_DEFAULT_SCOPE,
+    ) -> int | float:
+        return self._store.increment(
+            self._get_key(key, scope), amount, seconds_ttl,
+        )
+
+    def delete(self, key: Any, scope: str = c.STATE_DEFAULT_SCOPE) -> bool:
+        return self._store.delete(self._get_key(key, scope))
+
+
+class SharedScopedState(ScopedState):
+    __slots__ = ()
+
+    async def get(
+        self, key: Any, default: Any = None,
+        scope: str = c.STATE_DEFAULT_SCOPE,
+    ) -> Any:
+        return await asyncio.to_thread(super().get, key, default, scope)
+
+    async def set(
+        self, key: Any, value: Any, seconds_ttl: float | None = None,
+        scope: str = c.STATE_DEFAULT_SCOPE,
+    ):
+        await asyncio.to_thread(super().set, key, value, seconds_ttl, scope)
+
+    async def cas(
+        self, key: Any, expected: Any, value: Any,
+        seconds_ttl: float | None = None,
+        scope: str = c.STATE_DEFAULT_SCOPE,
+    ) -> bool:
+        return await asyncio.to_thread(
+            super().cas, key, expected, value, seconds_ttl, scope,
+        )
+
+    async def incr(
+        self, key: Any, amount: int | float = 1,
+        seconds_ttl: float | None = None,
+        scope: str = c.STATE_DEFAULT_SCOPE,
+    ) -> int | float:
+        return await asyncio.to_thread(
+            super().incr, key, amount, seconds_ttl, scope,
+        )
+
+    async def delete(
+        self, key: Any, scope: str = c.STATE_DEFAULT_SCOPE,
+    ) -> bool:
+        return await asyncio.to_thread(super().delete, key, scope)
@@ -1,19 +1,35 @@
 import asyncio
 import json
 import os
+import time
 from asyncio.subprocess import create_subprocess_exec
+from collections import OrderedDict
 from copy import deepcopy
 from logging import getLogger
 from typing import Callable
 
-from jinja2 import BaseLoader, Environment, pass_context
+from jinja2 import (
+    BaseLoader,
+    Environment,
+    Template,
+    TemplateSyntaxError,
+    meta,
+    nodes,
+    pass_context,
+)
+from jinja2.lexer import newline_re
 from jinja2.runtime import Context
 
 import constants as c
+from shell_workers import ShellWorkers
 from utils import read_file, get_relative_abs_path, get_exception_error
 
 logger = getLogger(__name__)
 
+TEMPLATE_LOADING_NODES = (
+    nodes.Include, nodes.Import, nodes.FromImport, nodes.Extends,
+)
+
 
 class AccessibleVariable:
     def __init__(self, obj: dict | list):
@@ -33,11 +49,13 @@ class AccessibleVariable:
             self._obj = {}
 
     def __getattr__(self, key):
+        if key.startswith("__"):
+            raise AttributeError(key)
         if self._is_dict:
             return self._obj.get(key)
         try:
             key = int(key)
-        except KeyError:
+        except ValueError:
             return None
         if len(self._obj) > key:
             return self._obj[key]
@@ -78,6 +96,12 @@ class AccessibleVariable:
         return json.dumps(self._raw_obj)
 
 
+def get_raw_value(value: object) -> object:
+    if isinstance(value, AccessibleVariable):
+        return value._raw_obj
+    return value
+
+
 class AnyPathFSLoader(BaseLoader):
     def __init__(self, base_dir: str):
         self._base_dir = base_dir
@@ -104,8 +128,187 @@ class AnyPathFSLoader(BaseLoader):
         return source, template, lambda: True
 
 
+class TemplatesCache:
+    def __init__(self, environment: Environment):
+        self._env = environment
+        self._templates: dict[str, Template] = {}
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def environment(self) -> Environment:
+        return self._env
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def compile(self, source: str) -> Template:
+        template = self._templates.get(source)
+        if template is None:
+            template = self._env.from_string(source)
+            self._templates[source] = template
+        return template
+
+    def is_static(self, source: str) -> bool:
+        env = self._env
+        markers = [
+            env.block_start_string,
+            env.variable_start_string,
+            env.comment_start_string,
+            env.line_statement_prefix,
+            env.line_comment_prefix,
+        ]
+        for marker in markers:
+            if marker and marker in source:
+                return False
+        return True
+
+    def render_static(self, source: str) -> str:
+        lines = newline_re.split(source)[::2]
+        if not self._env.keep_trailing_newline and lines[-1] == "":
+            del lines[-1]
+        return self._env.newline_sequence.join(lines)
+
+    def get_variables(self, source: str) -> set[str] | None:
+        try:
+            template_ast = self._env.parse(source)
+        except TemplateSyntaxError:
+            return None
+        for _ in template_ast.find_all(TEMPLATE_LOADING_NODES):
+            return None
+        return meta.find_undeclared_variables(template_ast)
+
+    def get(self, source: str) -> Template:
+        template = self._templates.get(source)
+        if template is None:
+            self._misses += 1
+            template = self._env.from_string(source)
+            self._templates[source] = template
+        else:
+            self._hits += 1
+        return template
+
+
+def get_file_stat(file_path: str) -> os.stat_result:
+    try:
+        return os.stat(file_path)
+    except IOError as e:
+        logger.error(
+            f"File '{file_path}' reading error. {get_exception_error(e)}"
+        )
+        raise
+
+
+def read_changed_file(
+    file_path: str,
+    encoding: str | None = None,
+    modified: int | None = None,
+    size: int | None = None,
+) -> tuple[int, int, str | None]:
+    stat = get_file_stat(file_path)
+    if (stat.st_mtime_ns, stat.st_size) == (modified, size):
+        return modified, size, None
+    return stat.st_mtime_ns, stat.st_size, read_file(file_path, encoding)
+
+
+class FilesCache:
+    def __init__(
+        self,
+        max_size: int = c.FILES_CACHE_DEFAULT_MAX_SIZE,
+        max_file_size: int | None = None,
+        seconds_check_interval: float = (
+            c.FILES_CACHE_DEFAULT_SECONDS_CHECK_INTERVAL
+        ),
+    ):
+        self._max_size = max_size
+        self._max_file_size = max_size
+        if max_file_size is not None:
+            self._max_file_size = min(max_file_size, max_size)
+        self._seconds_check_interval = seconds_check_interval
+        self._files: OrderedDict[
+            tuple[str, str | None], tuple[int, int, str, float]
+        ] = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def _remove(self, key: tuple[str, str | None]):
+        cached = self._files.pop(key, None)
+        if cached is not None:
+            self._size -= cached[1]
+
+    def _add(
+        self,
+        key: tuple[str, str | None],
+        modified: int,
+        size: int,
+        content: str,
+        checked: float,
+    ):
+        self._remove(key)
+        if size > self._max_file_size:
+            return
+        self._files[key] = (modified, size, content, checked)
+        self._size += size
+        while self._size > self._max_size:
+            _, (_, evicted_size, _, _) = self._files.popitem(last=False)
+            self._size -= evicted_size
+
+    def _hit(self, key: tuple[str, str | None]) -> str:
+        self._files.move_to_end(key)
+        self._hits += 1
+        return self._files[key][2]
+
+    async def get(self, file_path: str, encoding: str | None = None) -> str:
+        key = (file_path, encoding)
+        cached = self._files.get(key)
+        now = time.monotonic()
+        if cached is not None and (
+            now - cached[3] < self._seconds_check_interval
+        ):
+            return self._hit(key)
+
+        modified, size = (None, None) if cached is None else cached[:2]
+        modified, size, content = await asyncio.to_thread(
+            read_changed_file, file_path, encoding, modified, size,
+        )
+        if content is None:
+            cached = self._files.get(key)
+            if cached is not None and cached[:2] == (modified, size):
+                self._files[key] = (*cached[:3], now)
+                return self._hit(key)
+            content = await asyncio.to_thread(read_file, file_path, encoding)
+
+        self._misses += 1
+        self._add(key, modified, size, content, now)
+        return content
+
+
 @pass_context
-def get_file_content(
+async def get_file_content(
     context: Context,
     path: str,
     encoding: str | None = None,
@@ -119,12 +322,9 @@ def get_file_content(
     try:
         file_path = get_relative_abs_path(base_dir, path)
         if use_cache:
-            if file_path not in files:
-                file_data = read_file(file_path, encoding)
-                files[file_path] = file_data
-            return files[file_path]
+            return await files.get(file_path, encoding)
         else:
-            return read_file(file_path, encoding)
+            return await asyncio.to_thread(read_file, file_path, encoding)
     except IOError:
         return None
 
@@ -163,15 +363,40 @@ async def run_shell_script(
         return None
 
 
-def create_base_environment(base_dir: str) -> Environment:
+def create_shell_worker_function(shell_workers: ShellWorkers) -> Callable:
+    async def run_shell_worker(
+        name: str, *args, stdin: str | None = None
+    ) -> AccessibleVariable | None:
+        result = await shell_workers.call(
+            name, [str(arg) for arg in args], stdin,
+        )
+        if result is None:
+            return None
+        return AccessibleVariable(result)
+
+    return run_shell_worker
+
+
+def create_base_environment(
+    base_dir: str,
+    shell_workers: ShellWorkers | None = None,
+    files_cache: FilesCache | None = None,
+) -> Environment:
+    if shell_workers is None:
+        shell_workers = ShellWorkers({})
+    if files_cache is None:
+        files_cache = FilesCache()
     result = Environment(
         loader=AnyPathFSLoader(base_dir),
         enable_async=True,
     )
     result.globals[c.TEMP_BASE_DIR_KEY] = base_dir
-    result.globals[c.TEMP_FILES_CACHE_KEY] = {}
+    result.globals[c.TEMP_FILES_CACHE_KEY] = files_cache
     result.globals[c.TEMP_RELATIVE_KEY] = get_relative_path
     result.globals[c.TEMP_INSERT_KEY] = get_file_content
     result.globals[c.TEMP_SCRIPT_KEY] = run_shell_script
+    result.globals[c.TEMP_SHELL_WORKER_KEY] = create_shell_worker_function(
+        shell_workers
+    )
 
     return result
@@ -1,5 +1,8 @@
 import logging
 import os
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Iterator
 
 import yaml
 from pydantic import ValidationError
@@ -115,3 +118,26 @@ def parse_from_yaml(value: bytes) -> dict:
         raise IOError(
             "YAML parsing error. " + get_exception_error(e)
         )
+
+
+class PhasesTimer:
+    def __init__(self):
+        self._phases: list[tuple[str, float]] = []
+
+    @property
+    def total(self) -> float:
+        return sum(duration for _, duration in self._phases)
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self._phases.append((phase, perf_counter() - start))
+
+    def get_report(self) -> str:
+        return ", ".join(
+            f"{phase} {duration * 1000:.1f} ms"
+            for phase, duration in self._phases
+        )
@@ -0,0 +1,72 @@
+import base64
+import json
+import logging
+
+import pytest
+
+from config.model import Config, LoggingFormat
+from logs import configure_logger
+from logs.formatters import JsonMessage
+from protobuf.compilers import StructureParser, generate_descriptor_pool
+from protobuf.definitions import ProtoFilesPaths
+from server.helpers import ProtoObjectResolver
+
+PROTO = """
+syntax = "proto3";
+
+package logging_test;
+
+message Blob {
+    string name = 1;
+    bytes data = 2;
+    bytes empty = 3;
+}
+"""
+
+DATA = b"\x00\x01binary\xff"
+
+
+@pytest.fixture
+def raw_response(tmp_path) -> dict:
+    proto_path = tmp_path / "blob.proto"
+    proto_path.write_text(PROTO)
+    proto_paths = ProtoFilesPaths(
+        base_dir_abs=str(tmp_path), proto_files_abs=[str(proto_path)],
+    )
+    pool = generate_descriptor_pool(proto_paths)
+    structures = StructureParser(pool, proto_paths).get_structures()
+    resolver = ProtoObjectResolver(structures, pool)
+    raw_value, _ = resolver.get_message_builder("logging_test.Blob").build(
+        {"name": "blob", "data": DATA}
+    )
+    return raw_value
+
+
+@pytest.mark.parametrize(
+    "logging_format", [LoggingFormat.YAML, LoggingFormat.JSONL],
+)
+def test_bytes_response_logged(raw_response, logging_format, capsys):
+    logging_config = Config(servers=[]).api_logging_config.model_copy(
+        update={"format": logging_format}
+    )
+    logger = logging.getLogger(f"mock_requests.test.{logging_format.value}")
+    loggers_config = logging_config.get_loggers_config()
+    configure_logger(logger, **loggers_config.model_dump())
+
+    logger.info(
+        "Output message",
+        extra={"response_message": JsonMessage(raw_response)},
+    )
+
+    captured = capsys.readouterr()
+    assert "Logging error" not in captured.err
+    assert "Output message" in captured.out
+    assert base64.b64encode(DATA).decode() in captured.out
+
+
+def test_json_message_bytes_as_base64():
+    message = JsonMessage({"data": DATA, "empty": b""})
+
+    assert json.loads(str(message)) == {
+        "data": base64.b64encode(DATA).decode(), "empty": "",
+    }